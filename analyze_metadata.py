@@ -4,10 +4,13 @@ Analyze NFT metadata files for completeness and issues.
 """
 
 import json
-import os
 from pathlib import Path
 from collections import defaultdict
 
+from token_ranges import TokenRanges
+
+SUPPLY = 10000
+
 def analyze_metadata_files():
     """Analyze all metadata files in the collection"""
     metadata_dir = Path("metadata_arweave")
@@ -23,16 +26,15 @@ def analyze_metadata_files():
     total_files = 0
     valid_files = 0
     invalid_files = []
-    missing_numbers = []
     issues = []
     
     # Attribute analysis
     all_attributes = defaultdict(set)
     rarity_counts = defaultdict(int)
     
-    # Check for expected range (1-10000)
-    expected_numbers = set(range(1, 10001))
-    found_numbers = set()
+    # Check for expected range (1-SUPPLY)
+    expected_numbers = TokenRanges.span(1, SUPPLY)
+    found_numbers = []
     
     # Process all JSON files
     for json_file in sorted(metadata_dir.glob("*.json")):
@@ -42,7 +44,7 @@ def analyze_metadata_files():
         try:
             # Parse number from filename
             nft_number = int(filename)
-            found_numbers.add(nft_number)
+            found_numbers.append(nft_number)
             
             # Read and validate JSON
             with open(json_file, 'r', encoding='utf-8') as f:
@@ -93,8 +95,8 @@ def analyze_metadata_files():
         except Exception as e:
             invalid_files.append(f"{json_file.name} (error: {str(e)})")
     
-    # Find missing numbers
-    missing_numbers = sorted(expected_numbers - found_numbers)
+    # Find missing numbers (as runs, so large gaps stay cheap to report)
+    missing_numbers = expected_numbers - TokenRanges.from_ids(found_numbers)
     
     # Report results
     print(f"📊 File Analysis Results:")
@@ -114,29 +116,13 @@ def analyze_metadata_files():
     
     if missing_numbers:
         print(f"❌ Missing Metadata Files ({len(missing_numbers)}):")
-        if len(missing_numbers) <= 20:
-            for num in missing_numbers:
-                print(f"   • #{num}.json")
-        else:
-            # Show ranges for large gaps
-            ranges = []
-            start = missing_numbers[0]
-            end = start
-            
-            for i in range(1, len(missing_numbers)):
-                if missing_numbers[i] == end + 1:
-                    end = missing_numbers[i]
-                else:
-                    ranges.append((start, end))
-                    start = missing_numbers[i]
-                    end = start
-            ranges.append((start, end))
-            
-            for start, end in ranges[:10]:
-                if start == end:
-                    print(f"   • #{start}.json")
-                else:
-                    print(f"   • #{start}.json to #{end}.json ({end-start+1} files)")
+        for start, end in missing_numbers.runs[:10]:
+            if start == end:
+                print(f"   • #{start}.json")
+            else:
+                print(f"   • #{start}.json to #{end}.json ({end-start+1} files)")
+        if len(missing_numbers.runs) > 10:
+            print(f"   ... and {len(missing_numbers.runs) - 10} more ranges")
         print()
     
     if issues:
@@ -162,7 +148,7 @@ def analyze_metadata_files():
     print()
     
     # Overall status
-    completion_rate = (valid_files / 10000) * 100 if 10000 > 0 else 0
+    completion_rate = (valid_files / SUPPLY) * 100 if SUPPLY > 0 else 0
     
     print(f"📈 Overall Status:")
     print(f"   • Collection completion: {completion_rate:.1f}%")
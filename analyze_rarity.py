@@ -4,79 +4,304 @@ NFT Rarity Analyzer for Skunk Squad Collection
 
 This script analyzes the generated NFT manifest to calculate rarity scores
 and identify the top rarest NFTs based on trait combinations.
+
+Scores are cached in .cache/rarity/ keyed by the manifest's content hash, so
+repeat runs (other --top values or tie-breaks) skip rescoring. Every edition's
+rank is written to output/rarity_ranked.csv for other tools to reuse (the full
+ranking is cached with the scores); with --no-ranked only the top-K report is
+built, from a partial sort.
+Reports for --metadata runs and non-default tie-breaks get a suffix
+(_metadata, _by_<tie-break>) so they don't overwrite the manifest-based ones.
+
+--metadata scores a folder of metadata JSON directly (attributes' trait_type,
+value and rarity_tier), parsing in a process pool with orjson when installed.
+Parsed attributes are cached per file, so only edited files are re-read.
+
+Usage:
+  python analyze_rarity.py
+  python analyze_rarity.py --top 100 --tie-break legendary
+  python analyze_rarity.py --no-ranked                    # top-K report only, skip the full ranking
+  python analyze_rarity.py --metadata metadata_arweave    # score the shipped metadata
 """
 
+import argparse
+import hashlib
+import os
+import pickle
+import re
+import numpy as np
 import pandas as pd
 import json
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+from rarity_index import IGNORED_TRAIT_TYPES
+
+# Rarity tier weights (higher = rarer); unknown or missing tiers count as common
+RARITY_TIER_WEIGHTS = {
+    'common': 1,
+    'rare': 3,
+    'legendary': 10,
+    'ultra': 25  # Not present in current generation but defined for future
+}
+
+# Layers present on every NFT (the base body) don't make any edition rarer
+UNSCORED_LAYERS = ('body',)
+
+# (minimum count, bonus) tiers, highest first; only the best matching tier applies
+LEGENDARY_BONUS_TIERS = ((3, 50), (2, 20))  # triple / double legendary
+RARE_BONUS_TIERS = ((4, 15), (3, 8))        # quad / triple rare
+
+# Order among equal scores: lowest edition, most legendary/rare traits, or signature hash
+TIE_BREAKS = ('edition', 'legendary', 'signature')
+REPORT_CACHE_DIR = Path(".cache") / "rarity"
+# Changed metadata files per worker task; below one chunk the pool isn't worth starting
+METADATA_CHUNK = 512
+
+
+def scored_layers(df):
+    """Layers to score, derived from the manifest's '<layer>_rarity' columns."""
+    return [
+        col[:-len('_rarity')] for col in df.columns
+        if col.endswith('_rarity') and col[:-len('_rarity')] not in UNSCORED_LAYERS
+    ]
+
+
+def rarity_bonus(legendary_counts, rare_counts):
+    """Vectorized bonus for multiple legendary/rare traits."""
+    legendary_counts = np.asarray(legendary_counts)
+    rare_counts = np.asarray(rare_counts)
+    bonus = np.select([legendary_counts >= n for n, _ in LEGENDARY_BONUS_TIERS],
+                      [b for _, b in LEGENDARY_BONUS_TIERS], 0)
+    bonus += np.select([rare_counts >= n for n, _ in RARE_BONUS_TIERS],
+                       [b for _, b in RARE_BONUS_TIERS], 0)
+    return bonus
+
+
+def _tier_lookup(column):
+    """Per-row (weight, is_legendary, is_rare) via the column's categorical codes."""
+    codes, uniques = pd.factorize(column, use_na_sentinel=False)
+    tiers = [str(u).lower() for u in uniques]
+    weights = np.array([RARITY_TIER_WEIGHTS.get(t, 1) for t in tiers], dtype=np.int64)
+    legendary = np.array([t == 'legendary' for t in tiers], dtype=bool)
+    rare = np.array([t == 'rare' for t in tiers], dtype=bool)
+    return weights[codes], legendary[codes], rare[codes]
+
+
 def calculate_rarity_score(df):
     """Calculate rarity score for each NFT based on trait rarity."""
-    
-    # Define rarity tier weights (higher = rarer)
-    rarity_weights = {
-        'common': 1,
-        'rare': 3,
-        'legendary': 10,
-        'ultra': 25  # Not present in current generation but defined for future
+    n = len(df)
+    score = np.zeros(n, dtype=np.int64)
+    legendary_count = np.zeros(n, dtype=np.int64)
+    rare_count = np.zeros(n, dtype=np.int64)
+
+    for layer in scored_layers(df):
+        weights, legendary, rare = _tier_lookup(df[f"{layer}_rarity"].to_numpy())
+        score += weights
+        legendary_count += legendary
+        rare_count += rare
+
+    score += rarity_bonus(legendary_count, rare_count)
+
+    return pd.DataFrame({
+        'edition': df['edition'].to_numpy(),
+        'rarity_score': score,
+        'legendary_traits': legendary_count,
+        'rare_traits': rare_count,
+        'signature': df['signature'].to_numpy()
+    })
+
+def rank_order(scores, tie_break='edition'):
+    """Row positions of scores (from calculate_rarity_score) sorted rarest first."""
+    keys = _sort_keys(scores, tie_break)
+    return np.lexsort(keys[::-1])
+
+
+def top_k(scores, k, tie_break='edition'):
+    """
+    Row positions of the k rarest editions, same order as rank_order()[:k].
+    argpartition finds the k-th best score in O(n); only rows at or above it are sorted.
+    """
+    n = len(scores)
+    if k <= 0:
+        return np.array([], dtype=np.intp)
+    if k >= n:
+        return rank_order(scores, tie_break)
+    values = scores['rarity_score'].to_numpy()
+    kth = np.partition(values, n - k)[n - k]
+    candidates = np.flatnonzero(values >= kth)  # includes every row tied with the k-th
+    keys = [key[candidates] for key in _sort_keys(scores, tie_break)]
+    return candidates[np.lexsort(keys[::-1])[:k]]
+
+
+def _sort_keys(scores, tie_break):
+    """Sort keys, most significant first (lexsort wants them reversed)."""
+    if tie_break not in TIE_BREAKS:
+        raise ValueError(f"Unknown tie-break '{tie_break}' (expected one of {', '.join(TIE_BREAKS)})")
+    keys = [-scores['rarity_score'].to_numpy()]
+    if tie_break == 'legendary':
+        keys += [-scores['legendary_traits'].to_numpy(), -scores['rare_traits'].to_numpy()]
+    elif tie_break == 'signature':
+        keys.append(scores['signature'].astype(str).to_numpy())
+    keys.append(scores['edition'].to_numpy())
+    return keys
+
+
+def _scoring_fingerprint():
+    config = [RARITY_TIER_WEIGHTS, UNSCORED_LAYERS, LEGENDARY_BONUS_TIERS, RARE_BONUS_TIERS]
+    return json.dumps(config, sort_keys=True).encode('utf-8')
+
+
+def load_scores(manifest_path, cache_dir=REPORT_CACHE_DIR, use_cache=True):
+    """
+    Scores + per-edition trait columns for a manifest, cached under cache_dir keyed by the
+    manifest's content hash and the scoring rules. Returns (entry, cache_path, hit) where
+    entry = {'scores': DataFrame, 'traits': DataFrame indexed by edition, 'ranked': {tie_break: order}}.
+    """
+    digest = hashlib.sha256(_scoring_fingerprint())
+    with open(manifest_path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    cache_path = Path(cache_dir) / f"{digest.hexdigest()[:32]}.pkl"
+    if use_cache and cache_path.exists():
+        try:
+            return pd.read_pickle(cache_path), cache_path, True
+        except Exception:
+            pass  # unreadable cache entry: rebuild it
+
+    return score_entry(pd.read_csv(manifest_path)), cache_path, False
+
+
+def score_entry(df):
+    """Scores and trait columns for a manifest-shaped frame, in the layout load_scores caches."""
+    layers = scored_layers(df)
+    columns = [c for layer in layers for c in (f"{layer}_trait", f"{layer}_rarity") if c in df.columns]
+    return {
+        'scores': calculate_rarity_score(df),
+        'traits': df.set_index('edition')[columns],
+        'ranked': {},
     }
-    
-    # Calculate rarity score for each NFT
-    scores = []
-    
-    for _, row in df.iterrows():
-        score = 0
-        legendary_count = 0
-        rare_count = 0
-        
-        # Check each trait layer for rarity
-        trait_layers = ['background', 'tail', 'arm_right', 'arm_left', 'head', 'emblem', 'shoes']
-        
-        for layer in trait_layers:
-            rarity_col = f"{layer}_rarity"
-            if rarity_col in df.columns:
-                rarity = str(row[rarity_col]).lower()
-                weight = rarity_weights.get(rarity, 1)
-                score += weight
-                
-                if rarity == 'legendary':
-                    legendary_count += 1
-                elif rarity == 'rare':
-                    rare_count += 1
-        
-        # Bonus scoring for multiple rare/legendary traits
-        if legendary_count >= 3:
-            score += 50  # Triple legendary bonus
-        elif legendary_count >= 2:
-            score += 20  # Double legendary bonus
-            
-        if rare_count >= 4:
-            score += 15  # Quad rare bonus
-        elif rare_count >= 3:
-            score += 8   # Triple rare bonus
-            
-        scores.append({
-            'edition': row['edition'],
-            'rarity_score': score,
-            'legendary_traits': legendary_count,
-            'rare_traits': rare_count,
-            'signature': row['signature']
-        })
-    
-    return pd.DataFrame(scores)
+
+
+def save_scores(entry, cache_path):
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = cache_path.with_suffix('.tmp')
+    pd.to_pickle(entry, tmp)
+    tmp.replace(cache_path)
+
+
+def write_ranked(scores, order, path):
+    """Every edition with its rank, rarest first."""
+    ranked = scores.iloc[order][['edition', 'rarity_score', 'legendary_traits', 'rare_traits', 'signature']]
+    ranked.insert(0, 'rank', np.arange(1, len(ranked) + 1))
+    path.parent.mkdir(parents=True, exist_ok=True)
+    ranked.to_csv(path, index=False)
+
+def parse_metadata_files(paths):
+    """
+    Pool worker: [(path, edition, {trait_type: (value, rarity_tier)})] for <edition>.json files.
+    Unreadable files come back with edition None so they are retried on the next run.
+    """
+    parsed = []
+    for path in paths:
+        try:
+            edition = int(Path(path).stem)
+            with open(path, 'rb') as f:
+                meta = _json_loads(f.read())
+            traits = {
+                str(a['trait_type']): (str(a.get('value')), str(a.get('rarity_tier', 'common')).lower())
+                for a in meta.get('attributes', [])
+                if isinstance(a, dict) and 'trait_type' in a and 'display_type' not in a
+                and a['trait_type'] not in IGNORED_TRAIT_TYPES
+            }
+        except (OSError, ValueError, AttributeError, TypeError):
+            edition, traits = None, {}
+        parsed.append((path, edition, traits))
+    return parsed
+
+
+def load_metadata_frame(directory, workers=None, cache_dir=REPORT_CACHE_DIR, use_cache=True):
+    """
+    Manifest-shaped frame (edition, signature, <layer>_trait, <layer>_rarity) built from the
+    attributes in a folder of <edition>.json files. Parsed attributes are cached per file
+    (mtime + size) so re-analysis only re-reads files that changed.
+    Returns (df, reparsed_count).
+    """
+    from generate import combo_signature
+
+    directory = Path(directory)
+    key = hashlib.sha256(str(directory.resolve()).encode('utf-8')).hexdigest()[:32]
+    cache_path = Path(cache_dir) / f"metadata_{key}.pkl"
+    cached = {}
+    if use_cache and cache_path.exists():
+        try:
+            with open(cache_path, 'rb') as f:
+                cached = pickle.load(f)
+        except Exception:
+            cached = {}
+
+    files, stale = {}, []
+    with os.scandir(directory) as it:
+        for entry in it:
+            if not re.fullmatch(r"\d+\.json", entry.name):
+                continue
+            st = entry.stat()
+            fingerprint = (st.st_mtime_ns, st.st_size)
+            hit = cached.get(entry.name)
+            if hit is not None and hit[0] == fingerprint:
+                files[entry.name] = hit
+            else:
+                files[entry.name] = (fingerprint, None, {}, None)
+                stale.append(entry.path)
+
+    if len(stale) > METADATA_CHUNK and workers != 1:
+        chunks = [stale[i:i + METADATA_CHUNK] for i in range(0, len(stale), METADATA_CHUNK)]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = [row for chunk in pool.map(parse_metadata_files, chunks) for row in chunk]
+    else:
+        results = parse_metadata_files(stale)
+    for path, edition, traits in results:
+        name = os.path.basename(path)
+        fingerprint = files[name][0] if edition is not None else None
+        signature = combo_signature({layer: value for layer, (value, _) in traits.items()})
+        files[name] = (fingerprint, edition, traits, signature)
+
+    if use_cache and (stale or len(files) != len(cached)):
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = cache_path.with_suffix('.tmp')
+        with open(tmp, 'wb') as f:
+            pickle.dump(files, f, protocol=pickle.HIGHEST_PROTOCOL)
+        tmp.replace(cache_path)
+
+    parsed = sorted((e, sig, t) for _, e, t, sig in files.values() if e is not None)
+    layers = sorted({layer for _, _, traits in parsed for layer in traits})
+    columns = {'edition': [e for e, _, _ in parsed], 'signature': [sig for _, sig, _ in parsed]}
+    for layer in layers:
+        values = [t.get(layer, ('None', 'common')) for _, _, t in parsed]
+        columns[f"{layer}_trait"] = [v for v, _ in values]
+        columns[f"{layer}_rarity"] = [r for _, r in values]
+    return pd.DataFrame(columns), len(stale)
+
 
 def get_trait_summary(df, edition_num):
-    """Get a summary of traits for a specific edition."""
-    row = df[df['edition'] == edition_num].iloc[0]
+    """Get a summary of traits for a specific edition (df may be indexed by edition)."""
+    if df.index.name == 'edition':
+        row = df.loc[edition_num]
+    else:
+        row = df[df['edition'] == edition_num].iloc[0]
     
     traits = {}
-    trait_layers = ['background', 'tail', 'arm_right', 'arm_left', 'head', 'emblem', 'shoes']
-    
-    for layer in trait_layers:
+    for layer in scored_layers(df):
         trait_col = f"{layer}_trait"
         rarity_col = f"{layer}_rarity"
         
-        if trait_col in df.columns and rarity_col in df.columns:
+        if trait_col in df.columns:
             trait_name = str(row[trait_col])
             rarity = str(row[rarity_col])
             traits[layer] = {'trait': trait_name, 'rarity': rarity}
@@ -84,38 +309,76 @@ def get_trait_summary(df, edition_num):
     return traits
 
 def main():
-    # Load the manifest
-    manifest_path = Path("output/manifest.csv")
-    if not manifest_path.exists():
-        print("Error: manifest.csv not found in output directory")
-        return
-    
-    df = pd.read_csv(manifest_path)
-    
-    # Calculate rarity scores
-    rarity_df = calculate_rarity_score(df)
-    
-    # Sort by rarity score (highest first)
-    top_rare = rarity_df.sort_values('rarity_score', ascending=False).head(25)
+    ap = argparse.ArgumentParser(description="Rank Skunk Squad editions by tier-weighted rarity score")
+    ap.add_argument("--manifest", type=Path, default=Path("output/manifest.csv"), help="Generator manifest CSV")
+    ap.add_argument("--top", type=int, default=25, help="How many of the rarest editions to report")
+    ap.add_argument("--tie-break", choices=TIE_BREAKS, default="edition", help="Order among equal scores")
+    ap.add_argument("--outdir", type=Path, default=Path("output"), help="Where reports and the ranked list are written")
+    ap.add_argument("--metadata", type=Path, default=None, help="Score a folder of <edition>.json metadata (e.g. metadata_arweave) instead of the manifest")
+    ap.add_argument("--workers", type=int, default=None, help="Processes for parsing metadata (default: CPU count)")
+    ap.add_argument("--no-ranked", action="store_true", help="Skip writing the full ranking of every edition to <outdir>/rarity_ranked.csv")
+    ap.add_argument("--no-cache", action="store_true", help=f"Ignore the score cache in {REPORT_CACHE_DIR}")
+    args = ap.parse_args()
+
+    suffix = "" if args.tie_break == "edition" else f"_by_{args.tie_break}"
+    if args.metadata:
+        # What actually shipped: attributes from the metadata files, reparsed only where they changed
+        if not args.metadata.is_dir():
+            print(f"Error: {args.metadata} not found")
+            return []
+        df, reparsed = load_metadata_frame(args.metadata, workers=args.workers, use_cache=not args.no_cache)
+        print(f"Parsed {reparsed:,} changed of {len(df):,} metadata files in {args.metadata}")
+        if df.empty:
+            return []
+        entry, cache_path, hit = score_entry(df), None, False
+        suffix = "_metadata" + suffix
+    else:
+        # Load the manifest
+        manifest_path = args.manifest
+        if not manifest_path.exists():
+            print(f"Error: {manifest_path} not found")
+            return []
+
+        # Scores and per-edition traits, reused from the cache when the manifest hasn't changed
+        entry, cache_path, hit = load_scores(manifest_path, use_cache=not args.no_cache)
+    rarity_df = entry['scores']
+    by_edition = entry['traits']
+    k = max(0, min(args.top, len(rarity_df)))
+
+    # The full ranking is computed once per manifest and tie-break and cached; with
+    # --no-ranked the top-K alone only needs a partial sort
+    order = entry['ranked'].get(args.tie_break)
+    ranked_added = order is None and not args.no_ranked
+    if ranked_added:
+        order = rank_order(rarity_df, args.tie_break)
+        entry['ranked'][args.tie_break] = order
+    top_order = order[:k] if order is not None else top_k(rarity_df, k, args.tie_break)
+    if cache_path is not None and not args.no_cache and (not hit or ranked_added):
+        save_scores(entry, cache_path)
+    ranked_path = None
+    if not args.no_ranked:
+        ranked_path = args.outdir / f"rarity_ranked{suffix}.csv"
+        write_ranked(rarity_df, order, ranked_path)
+    top_rare = rarity_df.iloc[top_order]
     
-    print("🏆 TOP 25 RAREST SKUNK SQUAD NFTs 🏆")
+    print(f"🏆 TOP {k} RAREST SKUNK SQUAD NFTs 🏆" + ("  (cached)" if hit else ""))
     print("=" * 80)
     
     # Create detailed report
     report = []
     
-    for i, (_, nft) in enumerate(top_rare.iterrows(), 1):
-        edition = int(nft['edition'])
-        score = nft['rarity_score']
-        legendary_count = nft['legendary_traits']
-        rare_count = nft['rare_traits']
+    for i, nft in enumerate(top_rare.itertuples(index=False), 1):
+        edition = int(nft.edition)
+        score = int(nft.rarity_score)
+        legendary_count = int(nft.legendary_traits)
+        rare_count = int(nft.rare_traits)
         
         # Get trait details
-        traits = get_trait_summary(df, edition)
+        traits = get_trait_summary(by_edition, edition)
         
         print(f"\n#{i:2d} - Skunk Squad #{edition:3d}")
         print(f"     Rarity Score: {score:3d} | Legendary: {legendary_count} | Rare: {rare_count}")
-        print(f"     Signature: {nft['signature'][:16]}...")
+        print(f"     Signature: {nft.signature[:16]}...")
         
         # Print traits with rarity indicators
         for layer, info in traits.items():
@@ -129,22 +392,26 @@ def main():
             'rarity_score': score,
             'legendary_traits': legendary_count,
             'rare_traits': rare_count,
-            'signature': nft['signature'],
+            'signature': nft.signature,
             'traits': traits
         })
     
     print(f"\n" + "=" * 80)
-    print(f"Analysis complete! Top 25 rarest NFTs identified.")
-    print(f"Total legendary traits in top 25: {top_rare['legendary_traits'].sum()}")
-    print(f"Total rare traits in top 25: {top_rare['rare_traits'].sum()}")
-    print(f"Average rarity score: {top_rare['rarity_score'].mean():.1f}")
+    print(f"Analysis complete! Top {k} rarest NFTs identified.")
+    print(f"Total legendary traits in top {k}: {top_rare['legendary_traits'].sum()}")
+    print(f"Total rare traits in top {k}: {top_rare['rare_traits'].sum()}")
+    if k:
+        print(f"Average rarity score: {top_rare['rarity_score'].mean():.1f}")
     
     # Save detailed report
-    report_path = Path("output/top_25_rarest_report.json")
+    args.outdir.mkdir(parents=True, exist_ok=True)
+    report_path = args.outdir / f"top_{k}_rarest_report{suffix}.json"
     with open(report_path, 'w') as f:
         json.dump(report, f, indent=2)
     
     print(f"\nDetailed report saved to: {report_path}")
+    if ranked_path is not None:
+        print(f"Ranked list of all {len(rarity_df):,} editions: {ranked_path}")
     
     # Return edition numbers for copying files
     return top_rare['edition'].tolist()
@@ -153,5 +420,6 @@ if __name__ == "__main__":
     top_editions = main()
     
     # Print edition numbers for easy reference
-    print(f"\nTop 25 Edition Numbers:")
-    print(f"{', '.join(map(str, top_editions))}")
+    if top_editions:
+        print(f"\nTop {len(top_editions)} Edition Numbers:")
+        print(f"{', '.join(map(str, top_editions))}")
@@ -4,19 +4,19 @@ Compare uploaded NFTs from Arweave with local metadata collection
 to identify what's missing from the upload.
 """
 
-import os
 import csv
-import json
 from pathlib import Path
 
+from token_ranges import TokenRanges
+
 def read_uploaded_nfts():
     """Read the uploaded NFTs CSV and extract NFT numbers"""
     csv_path = Path("uploaded_nfts.csv")
     if not csv_path.exists():
         print("Error: uploaded_nfts.csv not found")
-        return set(), []
+        return TokenRanges(), []
     
-    uploaded_nfts = set()
+    uploaded_nfts = []
     upload_details = []
     
     with open(csv_path, 'r', encoding='utf-8') as file:
@@ -28,7 +28,7 @@ def read_uploaded_nfts():
                 nft_number = filename.replace('.png', '')
                 try:
                     nft_num = int(nft_number)
-                    uploaded_nfts.add(nft_num)
+                    uploaded_nfts.append(nft_num)
                     upload_details.append({
                         'number': nft_num,
                         'filename': filename,
@@ -39,52 +39,31 @@ def read_uploaded_nfts():
                 except ValueError:
                     print(f"Warning: Could not parse NFT number from '{filename}'")
     
-    return uploaded_nfts, upload_details
+    return TokenRanges.from_ids(uploaded_nfts), upload_details
 
 def read_local_metadata():
     """Read local metadata files and extract NFT numbers"""
     metadata_dir = Path("metadata_arweave")
     if not metadata_dir.exists():
         print("Error: metadata_arweave directory not found")
-        return set()
+        return TokenRanges()
     
-    local_nfts = set()
+    local_nfts = []
     
     for json_file in metadata_dir.glob("*.json"):
         filename = json_file.stem  # Gets filename without .json extension
         try:
             nft_number = int(filename)
-            local_nfts.add(nft_number)
+            local_nfts.append(nft_number)
         except ValueError:
             print(f"Warning: Could not parse NFT number from '{json_file.name}'")
     
-    return local_nfts
+    return TokenRanges.from_ids(local_nfts)
 
 def analyze_ranges(nft_set):
-    """Analyze number ranges to find gaps"""
-    if not nft_set:
-        return []
-    
-    sorted_nums = sorted(nft_set)
-    ranges = []
-    gaps = []
-    
-    start = sorted_nums[0]
-    end = start
-    
-    for i in range(1, len(sorted_nums)):
-        if sorted_nums[i] == end + 1:
-            end = sorted_nums[i]
-        else:
-            ranges.append((start, end))
-            # Record gap
-            if end + 1 < sorted_nums[i]:
-                gaps.append((end + 1, sorted_nums[i] - 1))
-            start = sorted_nums[i]
-            end = start
-    
-    ranges.append((start, end))
-    return ranges, gaps
+    """(continuous ranges, gaps between them) as lists of (start, end), from the run-length form"""
+    tokens = nft_set if isinstance(nft_set, TokenRanges) else TokenRanges.from_ids(nft_set)
+    return tokens.runs, tokens.gaps().runs
 
 def main():
     print("🔍 Analyzing Uploaded vs Local NFT Collections...")
@@ -113,7 +92,7 @@ def main():
     # Analyze upload ranges
     if uploaded_nfts:
         upload_ranges, upload_gaps = analyze_ranges(uploaded_nfts)
-        upload_min, upload_max = min(uploaded_nfts), max(uploaded_nfts)
+        upload_min, upload_max = uploaded_nfts.min, uploaded_nfts.max
         
         print(f"📈 Upload Range Analysis:")
         print(f"   • Range: #{upload_min:,} to #{upload_max:,}")
@@ -164,10 +143,10 @@ def main():
     # Check for unexpected uploads
     if uploaded_but_not_local:
         print(f"⚠️  Uploaded but not in local metadata ({len(uploaded_but_not_local)} items):")
-        for nft_num in sorted(uploaded_but_not_local)[:20]:
-            print(f"   • NFT #{nft_num}")
-        if len(uploaded_but_not_local) > 20:
-            print(f"   ... and {len(uploaded_but_not_local) - 20} more")
+        for start, end in uploaded_but_not_local.runs[:20]:
+            print(f"   • NFT #{start}" if start == end else f"   • NFT #{start:,} to #{end:,}")
+        if len(uploaded_but_not_local.runs) > 20:
+            print(f"   ... and {len(uploaded_but_not_local.runs) - 20} more ranges")
         print()
     
     # Summary statistics
@@ -178,11 +157,11 @@ def main():
     print(f"   • Remaining to upload: {len(not_uploaded):,} NFTs")
     
     if local_nfts:
-        local_min, local_max = min(local_nfts), max(local_nfts)
+        local_min, local_max = local_nfts.min, local_nfts.max
         print(f"   • Local collection range: #{local_min:,} to #{local_max:,}")
     
     if uploaded_nfts:
-        upload_min, upload_max = min(uploaded_nfts), max(uploaded_nfts)
+        upload_min, upload_max = uploaded_nfts.min, uploaded_nfts.max
         print(f"   • Uploaded range: #{upload_min:,} to #{upload_max:,}")
 
 if __name__ == "__main__":
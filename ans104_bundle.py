@@ -0,0 +1,553 @@
+#!/usr/bin/env python3
+"""
+Offline ANS-104 Bundle Packer for Skunk Squad Collection
+
+Packs images, metadata and an Arweave path manifest into ANS-104 data-item
+bundles on disk, signed with a local Arweave JWK. Every data-item ID is
+sha256(signature), so all IDs — and therefore the ar:// links inside metadata and
+the manifest — are known before anything is uploaded. No per-file ArDrive export
+to reconcile afterwards.
+
+Two streaming passes:
+  1. Hash + sign (process pool): each file is read once to compute its deep hash,
+     signed, and only the ~1 KB data-item header is kept. Metadata "image" fields are
+     rewritten to ar://<IMAGE_ID> into <outdir>/metadata (the source folder is left
+     untouched, layout kept as written) and those copies are signed.
+  2. Write: bundle headers (item count, sizes, IDs) then headers + file bytes copied
+     straight from disk, split into bundles of at most --max-bundle-mb.
+
+Usage:
+  python ans104_bundle.py --generate-test-key test_wallet.json
+  python ans104_bundle.py --wallet wallet.json --images output/images --metadata output/metadata --outdir output/bundles
+  python ans104_bundle.py --verify output/bundles/bundle_000.bin
+
+Outputs (in --outdir): bundle_NNN.bin, metadata/ (the signed metadata), data_items.csv (path,id,bundle,bytes),
+txid_mapping.csv (token_id,image_txid,image_filename) and the manifest ID for
+the contract baseURI: ar://<MANIFEST_ID>/metadata/
+"""
+
+import argparse
+import base64
+import csv
+import hashlib
+import json
+import os
+import random
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from uri_rewriter import set_field
+
+SIGNATURE_TYPE_ARWEAVE = 1
+SIGNATURE_LENGTH = 512
+OWNER_LENGTH = 512
+PSS_SALT_LENGTH = 32
+READ_SIZE = 1024 * 1024
+
+CONTENT_TYPES = {
+    ".png": "image/png",
+    ".jpg": "image/jpeg",
+    ".jpeg": "image/jpeg",
+    ".gif": "image/gif",
+    ".webp": "image/webp",
+    ".json": "application/json",
+}
+MANIFEST_CONTENT_TYPE = "application/x.arweave-manifest+json"
+
+
+# --- encoding helpers -----------------------------------------------------------
+
+def b64url_encode(data):
+    return base64.urlsafe_b64encode(data).decode("ascii").rstrip("=")
+
+
+def b64url_decode(text):
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+def b64url_to_int(text):
+    return int.from_bytes(b64url_decode(text), "big")
+
+
+def int_to_b64url(value):
+    return b64url_encode(value.to_bytes((value.bit_length() + 7) // 8, "big"))
+
+
+def _avro_long(n):
+    n = (n << 1) ^ (n >> 63)  # zigzag
+    out = bytearray()
+    while n & ~0x7F:
+        out.append((n & 0x7F) | 0x80)
+        n >>= 7
+    out.append(n)
+    return bytes(out)
+
+
+def serialize_tags(tags):
+    """Avro array<{name: bytes, value: bytes}>, as ANS-104 expects. Empty list → b''."""
+    if not tags:
+        return b""
+    out = _avro_long(len(tags))
+    for name, value in tags:
+        for field in (name.encode("utf-8"), value.encode("utf-8")):
+            out += _avro_long(len(field)) + field
+    return out + _avro_long(0)
+
+
+# --- deep hash (SHA-384) -------------------------------------------------------------
+
+def _sha384(data):
+    return hashlib.sha384(data).digest()
+
+
+def deep_hash_blob(length, data_digest):
+    """Deep hash of a blob given its length and sha384 digest (lets data be hashed in a stream)."""
+    return _sha384(_sha384(b"blob" + str(length).encode()) + data_digest)
+
+
+def deep_hash_list(hashed_items):
+    """Deep hash of a list whose elements are already deep-hashed."""
+    acc = _sha384(b"list" + str(len(hashed_items)).encode())
+    for item in hashed_items:
+        acc = _sha384(acc + item)
+    return acc
+
+
+def deep_hash_bytes(data):
+    return deep_hash_blob(len(data), _sha384(data))
+
+
+# --- RSA-PSS (SHA-256) -----------------------------------------------------------------
+
+def _mgf1(seed, length):
+    out = b""
+    counter = 0
+    while len(out) < length:
+        out += hashlib.sha256(seed + counter.to_bytes(4, "big")).digest()
+        counter += 1
+    return out[:length]
+
+
+def _xor(a, b):
+    return (int.from_bytes(a, "big") ^ int.from_bytes(b, "big")).to_bytes(len(a), "big")
+
+
+class ArweaveSigner:
+    """RSA-PSS signer over an Arweave JWK (owner = modulus n)."""
+
+    def __init__(self, jwk):
+        self.n = b64url_to_int(jwk["n"])
+        self.e = b64url_to_int(jwk["e"])
+        self.d = b64url_to_int(jwk["d"])
+        self.p = b64url_to_int(jwk["p"])
+        self.q = b64url_to_int(jwk["q"])
+        self.dp = b64url_to_int(jwk["dp"])
+        self.dq = b64url_to_int(jwk["dq"])
+        self.qi = b64url_to_int(jwk["qi"])
+        self.mod_bits = self.n.bit_length()
+        self.key_bytes = (self.mod_bits + 7) // 8
+        if self.key_bytes != SIGNATURE_LENGTH:
+            raise ValueError(f"Arweave keys must be 4096-bit RSA, got {self.mod_bits} bits")
+        self.owner = self.n.to_bytes(self.key_bytes, "big")
+
+    def _pss_encode(self, message):
+        em_bits = self.mod_bits - 1
+        em_len = (em_bits + 7) // 8
+        m_hash = hashlib.sha256(message).digest()
+        salt = os.urandom(PSS_SALT_LENGTH)
+        h = hashlib.sha256(b"\x00" * 8 + m_hash + salt).digest()
+        db = b"\x00" * (em_len - PSS_SALT_LENGTH - 32 - 2) + b"\x01" + salt
+        masked = bytearray(_xor(db, _mgf1(h, em_len - 32 - 1)))
+        masked[0] &= 0xFF >> (8 * em_len - em_bits)
+        return bytes(masked) + h + b"\xbc"
+
+    def sign(self, message):
+        m = int.from_bytes(self._pss_encode(message), "big")
+        # CRT: two half-size exponentiations instead of one full one
+        s1 = pow(m, self.dp, self.p)
+        s2 = pow(m, self.dq, self.q)
+        s = s2 + self.q * ((self.qi * (s1 - s2)) % self.p)
+        return s.to_bytes(self.key_bytes, "big")
+
+
+def pss_verify(owner, message, signature):
+    n = int.from_bytes(owner, "big")
+    mod_bits = n.bit_length()
+    em_bits = mod_bits - 1
+    em_len = (em_bits + 7) // 8
+    em = pow(int.from_bytes(signature, "big"), 65537, n).to_bytes(em_len, "big")
+    if em[-1] != 0xBC:
+        return False
+    masked, h = em[:em_len - 33], em[em_len - 33:-1]
+    db = bytearray(_xor(masked, _mgf1(h, em_len - 33)))
+    db[0] &= 0xFF >> (8 * em_len - em_bits)
+    sep = db.find(b"\x01")
+    if sep < 0 or any(db[:sep]):
+        return False
+    salt = bytes(db[sep + 1:])
+    m_hash = hashlib.sha256(message).digest()
+    return hashlib.sha256(b"\x00" * 8 + m_hash + salt).digest() == h
+
+
+def _is_probable_prime(n, rounds=40):
+    if n < 2:
+        return False
+    for small in (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37):
+        if n % small == 0:
+            return n == small
+    d, r = n - 1, 0
+    while d % 2 == 0:
+        d //= 2
+        r += 1
+    rng = random.SystemRandom()
+    for _ in range(rounds):
+        x = pow(rng.randrange(2, n - 1), d, n)
+        if x in (1, n - 1):
+            continue
+        for _ in range(r - 1):
+            x = pow(x, 2, n)
+            if x == n - 1:
+                break
+        else:
+            return False
+    return True
+
+
+def _random_prime(bits, e):
+    rng = random.SystemRandom()
+    while True:
+        candidate = rng.getrandbits(bits) | (3 << (bits - 2)) | 1
+        if (candidate - 1) % e and _is_probable_prime(candidate):
+            return candidate
+
+
+def generate_test_key(bits=4096):
+    """New RSA JWK for local testing. Use a real Arweave wallet for anything you upload."""
+    e = 65537
+    while True:
+        p, q = _random_prime(bits // 2, e), _random_prime(bits // 2, e)
+        n = p * q
+        if p != q and n.bit_length() == bits:
+            break
+    if p < q:
+        p, q = q, p
+    d = pow(e, -1, (p - 1) * (q - 1))
+    return {
+        "kty": "RSA",
+        "e": int_to_b64url(e),
+        "n": int_to_b64url(n),
+        "d": int_to_b64url(d),
+        "p": int_to_b64url(p),
+        "q": int_to_b64url(q),
+        "dp": int_to_b64url(d % (p - 1)),
+        "dq": int_to_b64url(d % (q - 1)),
+        "qi": int_to_b64url(pow(q, -1, p)),
+    }
+
+
+# --- data items ---------------------------------------------------------------------------
+
+def sign_data_item(signer, tags, data_length, data_digest):
+    """
+    Build a signed data-item header (everything before the data).
+    Returns (id_bytes, header_bytes). No target or anchor.
+    """
+    tag_bytes = serialize_tags(tags)
+    message = deep_hash_list([
+        deep_hash_bytes(b"dataitem"),
+        deep_hash_bytes(b"1"),
+        deep_hash_bytes(str(SIGNATURE_TYPE_ARWEAVE).encode()),
+        deep_hash_bytes(signer.owner),
+        deep_hash_bytes(b""),  # target
+        deep_hash_bytes(b""),  # anchor
+        deep_hash_bytes(tag_bytes),
+        deep_hash_blob(data_length, data_digest),
+    ])
+    signature = signer.sign(message)
+    header = (
+        SIGNATURE_TYPE_ARWEAVE.to_bytes(2, "little")
+        + signature
+        + signer.owner
+        + b"\x00"  # no target
+        + b"\x00"  # no anchor
+        + len(tags).to_bytes(8, "little")
+        + len(tag_bytes).to_bytes(8, "little")
+        + tag_bytes
+    )
+    return hashlib.sha256(signature).digest(), header
+
+
+def _content_tags(path):
+    return [("Content-Type", CONTENT_TYPES.get(Path(path).suffix.lower(), "application/octet-stream"))]
+
+
+_signer = None
+
+
+def _init_worker(jwk):
+    global _signer
+    _signer = ArweaveSigner(jwk)
+
+
+def sign_bytes(path, data):
+    """Worker: sign in-memory file data. Returns (path, id, header, data_length)."""
+    item_id, header = sign_data_item(_signer, _content_tags(path), len(data), _sha384(data))
+    return str(path), item_id, header, len(data)
+
+
+def sign_file(path):
+    """Worker: stream-hash one file and sign its data item. Returns (path, id, header, data_length)."""
+    h = hashlib.sha384()
+    length = 0
+    with open(path, "rb") as fh:
+        while True:
+            block = fh.read(READ_SIZE)
+            if not block:
+                break
+            h.update(block)
+            length += len(block)
+    item_id, header = sign_data_item(_signer, _content_tags(path), length, h.digest())
+    return str(path), item_id, header, length
+
+
+def rewrite_and_sign_metadata(job):
+    """Worker: point "image" at ar://<IMAGE_ID>, write the result into out_dir and sign that copy."""
+    path, image_ids, out_dir = job
+    raw = Path(path).read_bytes()
+    meta = json.loads(raw)
+    if isinstance(meta, dict) and "image" in meta:
+        image_name = str(meta.get("image") or "").rstrip("/").rsplit("/", 1)[-1]
+        if image_name not in image_ids:
+            image_name = f"{Path(path).stem}.png"
+        if image_name in image_ids:
+            uri = f"ar://{image_ids[image_name]}"
+            raw = set_field(raw, "image", uri) or raw
+    out_path = Path(out_dir) / Path(path).name
+    tmp = Path(str(out_path) + ".tmp")
+    tmp.write_bytes(raw)
+    os.replace(tmp, out_path)
+    return sign_bytes(out_path, raw)
+
+
+# --- bundles --------------------------------------------------------------------------------
+
+class Item:
+    __slots__ = ("key", "id", "header", "length", "source", "data")
+
+    def __init__(self, key, item_id, header, length, source=None, data=None):
+        self.key = key
+        self.id = item_id
+        self.header = header
+        self.length = length
+        self.source = source
+        self.data = data
+
+    @property
+    def size(self):
+        return len(self.header) + self.length
+
+
+def _list_files(directory, suffixes):
+    with os.scandir(directory) as it:
+        return sorted(
+            (e.path for e in it if e.is_file() and Path(e.name).suffix.lower() in suffixes),
+            key=lambda p: (len(Path(p).stem), Path(p).name),
+        )
+
+
+def write_bundle(path, items):
+    """ANS-104 bundle: item count, (size, id) pairs, then items; file data is copied from disk."""
+    with open(path, "wb") as out:
+        out.write(len(items).to_bytes(32, "little"))
+        for item in items:
+            out.write(item.size.to_bytes(32, "little") + item.id)
+        for item in items:
+            out.write(item.header)
+            if item.data is not None:
+                out.write(item.data)
+            else:
+                with open(item.source, "rb") as fh:
+                    shutil.copyfileobj(fh, out, READ_SIZE)
+
+
+def split_bundles(items, max_bytes):
+    """
+    Group items into bundles of at most max_bytes: 32-byte item count, then a 64-byte
+    (size, id) entry plus the item itself for each. A single larger item gets a bundle of its own.
+    """
+    bundles, current, current_size = [], [], 0
+    for item in items:
+        if current and 32 + current_size + item.size + 64 > max_bytes:
+            bundles.append(current)
+            current, current_size = [], 0
+        current.append(item)
+        current_size += item.size + 64
+    if current:
+        bundles.append(current)
+    return bundles
+
+
+def build_bundles(jwk, images_dir, metadata_dir, outdir, workers=None, max_bundle_mb=500):
+    workers = workers or os.cpu_count() or 1
+    outdir = Path(outdir)
+    meta_out = outdir / "metadata"
+    meta_out.mkdir(parents=True, exist_ok=True)
+    signer = ArweaveSigner(jwk)
+    owner_address = b64url_encode(hashlib.sha256(signer.owner).digest())
+    print(f"🔑 Signing as {owner_address}")
+
+    image_files = _list_files(images_dir, set(CONTENT_TYPES) - {".json"})
+    meta_files = _list_files(metadata_dir, {".json"})
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(jwk,)) as pool:
+        print(f"🖼️  Signing {len(image_files):,} images with {workers} worker(s)...")
+        images = [
+            Item(f"images/{Path(p).name}", item_id, header, length, source=p)
+            for p, item_id, header, length in pool.map(sign_file, image_files, chunksize=32)
+        ]
+        image_ids = {Path(i.key).name: b64url_encode(i.id) for i in images}
+
+        print(f"📝 Rewriting image URIs into {meta_out} + signing {len(meta_files):,} metadata files...")
+        metas = [
+            Item(f"metadata/{Path(p).stem}", item_id, header, length, source=p)
+            for p, item_id, header, length in pool.map(
+                rewrite_and_sign_metadata, [(p, image_ids, meta_out) for p in meta_files], chunksize=32
+            )
+        ]
+
+    paths = {item.key: {"id": b64url_encode(item.id)} for item in images + metas}
+    manifest = {"manifest": "arweave/paths", "version": "0.1.0", "paths": paths}
+    if metas:
+        manifest["index"] = {"path": metas[0].key}
+    manifest_data = json.dumps(manifest, separators=(",", ":")).encode("utf-8")
+    manifest_id, manifest_header = sign_data_item(
+        signer, [("Content-Type", MANIFEST_CONTENT_TYPE)], len(manifest_data), _sha384(manifest_data)
+    )
+    manifest_item = Item("manifest", manifest_id, manifest_header, len(manifest_data), data=manifest_data)
+    manifest_id_str = b64url_encode(manifest_id)
+
+    all_items = images + metas + [manifest_item]
+    bundles = split_bundles(all_items, max_bundle_mb * 1024 * 1024)
+    rows = []
+    for n, bundle in enumerate(bundles):
+        bundle_path = outdir / f"bundle_{n:03d}.bin"
+        write_bundle(bundle_path, bundle)
+        rows.extend(
+            {"path": item.key, "id": b64url_encode(item.id), "bundle": bundle_path.name, "bytes": item.size}
+            for item in bundle
+        )
+        print(f"   ✅ {bundle_path.name}: {len(bundle):,} data items, {bundle_path.stat().st_size:,} bytes")
+
+    with open(outdir / "data_items.csv", "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=["path", "id", "bundle", "bytes"])
+        writer.writeheader()
+        writer.writerows(rows)
+    # Same layout process_arweave_export.py produces, for the downstream metadata scripts
+    with open(outdir / "txid_mapping.csv", "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["token_id", "image_txid", "image_filename"])
+        for item in images:
+            name = Path(item.key).name
+            if Path(name).stem.isdigit():
+                writer.writerow([int(Path(name).stem), b64url_encode(item.id), name])
+    with open(outdir / "manifest.json", "wb") as f:
+        f.write(manifest_data)
+
+    print(f"\n📦 {len(all_items):,} data items in {len(bundles)} bundle(s) → {outdir}")
+    print(f"   • Manifest ID: {manifest_id_str}")
+    print(f"🔗 Contract baseURI: ar://{manifest_id_str}/metadata/")
+    return {"manifest": manifest_id_str, "bundles": len(bundles), "items": len(all_items)}
+
+
+def verify_bundle(path, sample=None):
+    """Check every (or `sample` random) data item: ID = sha256(signature) and a valid signature."""
+    with open(path, "rb") as fh:
+        count = int.from_bytes(fh.read(32), "little")
+        entries = [(int.from_bytes(fh.read(32), "little"), fh.read(32)) for _ in range(count)]
+        offsets, pos = [], 32 + 64 * count
+        for size, _ in entries:
+            offsets.append(pos)
+            pos += size
+        indices = range(count)
+        if sample and sample < count:
+            indices = sorted(random.sample(range(count), sample))
+        bad = 0
+        for i in indices:
+            size, expected_id = entries[i]
+            fh.seek(offsets[i])
+            sig_type = int.from_bytes(fh.read(2), "little")
+            signature = fh.read(SIGNATURE_LENGTH)
+            owner = fh.read(OWNER_LENGTH)
+            target_flag = fh.read(1)
+            target = fh.read(32) if target_flag == b"\x01" else b""
+            anchor_flag = fh.read(1)
+            anchor = fh.read(32) if anchor_flag == b"\x01" else b""
+            fh.read(8)
+            tag_len = int.from_bytes(fh.read(8), "little")
+            tag_bytes = fh.read(tag_len)
+            data_len = size - (2 + SIGNATURE_LENGTH + OWNER_LENGTH + 2 + len(target) + len(anchor) + 16 + tag_len)
+            h = hashlib.sha384()
+            remaining = data_len
+            while remaining:
+                block = fh.read(min(READ_SIZE, remaining))
+                h.update(block)
+                remaining -= len(block)
+            message = deep_hash_list([
+                deep_hash_bytes(b"dataitem"),
+                deep_hash_bytes(b"1"),
+                deep_hash_bytes(str(sig_type).encode()),
+                deep_hash_bytes(owner),
+                deep_hash_bytes(target),
+                deep_hash_bytes(anchor),
+                deep_hash_bytes(tag_bytes),
+                deep_hash_blob(data_len, h.digest()),
+            ])
+            if hashlib.sha256(signature).digest() != expected_id or not pss_verify(owner, message, signature):
+                bad += 1
+                print(f"   ❌ item {i}: {b64url_encode(expected_id)}")
+    checked = len(indices)
+    print(f"{'✅' if not bad else '❌'} {path}: {checked - bad}/{checked} data items verified")
+    return bad == 0
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Pack images + metadata + path manifest into signed ANS-104 bundles")
+    ap.add_argument("--wallet", type=Path, help="Arweave JWK wallet file used to sign data items")
+    ap.add_argument("--images", type=Path, default=Path("output/images"), help="Images directory")
+    ap.add_argument("--metadata", type=Path, default=Path("output/metadata"), help="Metadata directory (left untouched; rewritten copies go to <outdir>/metadata)")
+    ap.add_argument("--outdir", type=Path, default=Path("output/bundles"), help="Where to write bundles and ID reports")
+    ap.add_argument("--workers", type=int, default=None, help="Signing processes (default: CPU count)")
+    ap.add_argument("--max-bundle-mb", type=int, default=500, help="Split into bundles of at most this many MiB")
+    ap.add_argument("--generate-test-key", type=Path, metavar="PATH", help="Write a new 4096-bit test JWK to PATH and exit")
+    ap.add_argument("--verify", type=Path, metavar="BUNDLE", help="Verify IDs and signatures in a bundle file and exit")
+    ap.add_argument("--verify-sample", type=int, default=None, help="With --verify, check only this many random items")
+    args = ap.parse_args()
+
+    if args.generate_test_key:
+        print("🔑 Generating 4096-bit test key (this can take a little while)...")
+        args.generate_test_key.write_text(json.dumps(generate_test_key()), encoding="utf-8")
+        print(f"✅ Test key written: {args.generate_test_key}")
+        return 0
+    if args.verify:
+        return 0 if verify_bundle(args.verify, args.verify_sample) else 1
+    if not args.wallet or not args.wallet.exists():
+        print("❌ --wallet is required (or create one with --generate-test-key)")
+        return 1
+    for d in (args.images, args.metadata):
+        if not d.is_dir():
+            print(f"❌ Directory not found: {d}")
+            return 1
+
+    if (args.outdir / "metadata").resolve() == args.metadata.resolve():
+        print(f"❌ --outdir would overwrite the source metadata ({args.metadata}); pick another --outdir")
+        return 1
+
+    jwk = json.loads(args.wallet.read_text(encoding="utf-8"))
+    build_bundles(jwk, args.images, args.metadata, args.outdir,
+                  workers=args.workers, max_bundle_mb=args.max_bundle_mb)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Streaming ArDrive Export → Arweave Metadata → Path Manifest Pipeline
+
+One pass replaces process_arweave_export.py → generate_arweave_metadata.py →
+extract_metadata_txids.py / update_folder_manifest.py and their intermediate
+CSVs. Every stage is a generator, so memory stays flat no matter how large the
+export is:
+
+  export_rows      ArDrive export CSV rows
+  classify         → ExportEntry(kind image|metadata|contract, token_id, txid)
+  rewrite_metadata image rows: <metadata>/<id>.json → <out>/<id>.json with image ar://<txid>
+  manifest_paths   → (manifest path, txid)
+  write_manifest   arweave/paths manifest, streamed to disk (manifest_writer.py)
+
+Rewritten tokens are appended to <out>/.pipeline_journal.tsv with the image TXID
+and the source file's fingerprint (size, mtime, --style). A re-run (after an
+interruption, or with a newer export) skips every token whose TXID and source
+fingerprint are unchanged and whose output still exists; edited source metadata is
+rewritten. The journal is compacted to one line per token when it is loaded;
+--restart ignores it.
+
+Metadata TXIDs only exist once <out> has been uploaded, so the first run usually
+yields images only; run again on the export that includes the metadata folder
+to get the manifest for the contract's base URI.
+
+Usage:
+  python arweave_pipeline.py latest_export.csv
+  python arweave_pipeline.py latest_export.csv --layout flat --manifest nft_manifest_ready.json
+  python arweave_pipeline.py latest_export.csv --metadata output/metadata --out metadata_arweave --restart
+"""
+
+import argparse
+import csv
+import json
+import os
+import re
+from collections import namedtuple
+from pathlib import Path
+
+from manifest_writer import MANIFEST_STYLES, ManifestWriter, format_size
+from metadata_writer import METADATA_STYLES, dumps_metadata, write_bytes
+from process_arweave_export import extract_token_id_from_filename, validate_arweave_txid
+
+JOURNAL_NAME = ".pipeline_journal.tsv"
+LAYOUTS = ("folder", "flat")
+MAX_PROBLEMS_SHOWN = 10
+
+ExportEntry = namedtuple("ExportEntry", "kind token_id txid line")
+
+
+class Stats:
+    def __init__(self):
+        self.rows = 0
+        self.images = 0
+        self.metadata = 0
+        self.written = 0
+        self.skipped = 0
+        self.missing = 0
+        self.invalid = 0
+        self.paths = 0
+        self.manifest_bytes = 0
+        self.problems = []
+        self.problem_count = 0
+
+    def problem(self, message):
+        self.problem_count += 1
+        if len(self.problems) < MAX_PROBLEMS_SHOWN:
+            self.problems.append(message)
+
+
+def export_rows(csv_path):
+    """(line number, row dict) for each row of an ArDrive export CSV."""
+    with open(csv_path, newline="", encoding="utf-8") as f:
+        for line, row in enumerate(csv.DictReader(f), start=2):
+            yield line, row
+
+
+def classify(rows, stats):
+    """PNG rows → image entries, <id>.json / contract.json rows → metadata entries."""
+    seen = {"image": set(), "metadata": set(), "contract": set()}
+    for line, row in rows:
+        stats.rows += 1
+        name = (row.get("File Name") or "").strip()
+        txid = (row.get("Data Transaction ID") or "").strip()
+        if name.endswith(".png"):
+            kind, token_id = "image", extract_token_id_from_filename(name)
+        elif name == "contract.json":
+            kind, token_id = "contract", None
+        elif re.fullmatch(r"\d+\.json", name):
+            kind, token_id = "metadata", int(name[:-5])
+        else:
+            continue  # folders, manifests and other files in the drive
+        if kind == "image" and token_id is None:
+            stats.problem(f"Line {line}: Invalid filename format '{name}'")
+            continue
+        if not validate_arweave_txid(txid):
+            stats.problem(f"Line {line}: Invalid transaction ID '{txid}' for {name}")
+            continue
+        if token_id in seen[kind]:
+            owner = f" for token {token_id}" if token_id is not None else ""
+            stats.problem(f"Line {line}: Duplicate {kind}{owner} ({name})")
+            continue
+        seen[kind].add(token_id)
+        yield ExportEntry(kind, token_id, txid, line)
+
+
+def source_stamp(stat, style):
+    """Journal fingerprint of a source metadata file and the output style."""
+    return f"{stat.st_size}:{stat.st_mtime_ns}:{style}"
+
+
+def load_journal(path):
+    """
+    {token_id: (image_txid, source stamp)} already rewritten by earlier runs; the last line
+    per token wins. The file is rewritten with one line per token if it had more.
+    """
+    done, lines = {}, 0
+    if path.exists():
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                lines += 1
+                parts = line.rstrip("\n").split("\t")
+                if len(parts) == 3 and parts[0].isdigit():
+                    done[int(parts[0])] = (parts[1], parts[2])
+    if lines > len(done):
+        tmp = path.with_name(path.name + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.writelines(f"{token_id}\t{txid}\t{stamp}\n" for token_id, (txid, stamp) in done.items())
+        os.replace(tmp, path)
+    return done
+
+
+def rewrite_metadata(entries, metadata_dir, out_dir, journal_path, stats, style="pretty", restart=False):
+    """Rewrite each image entry's metadata to ar://<txid> (journaled); every entry is passed on."""
+    done = {} if restart else load_journal(journal_path)
+    with open(journal_path, "w" if restart else "a", encoding="utf-8") as journal:
+        for entry in entries:
+            if entry.kind == "image":
+                stats.images += 1
+                src = metadata_dir / f"{entry.token_id}.json"
+                dst = out_dir / f"{entry.token_id}.json"
+                try:
+                    stamp = source_stamp(src.stat(), style)
+                except OSError:
+                    stamp = None
+                if stamp is None:
+                    stats.missing += 1
+                    stats.problem(f"Line {entry.line}: no metadata for token {entry.token_id} ({src})")
+                elif done.get(entry.token_id) == (entry.txid, stamp) and dst.exists():
+                    stats.skipped += 1
+                else:
+                    try:
+                        with open(src, "rb") as f:
+                            meta = json.loads(f.read())
+                        meta["image"] = f"ar://{entry.txid}"
+                        if "external_url" in meta:
+                            base_url = meta["external_url"].split("/token/")[0]
+                            meta["external_url"] = f"{base_url}/token/{entry.token_id}"
+                        write_bytes(dst, dumps_metadata(meta, style))
+                    except (OSError, ValueError, AttributeError, TypeError) as e:
+                        stats.invalid += 1
+                        stats.problem(f"Line {entry.line}: could not rewrite metadata for token {entry.token_id} ({src}: {e})")
+                    else:
+                        journal.write(f"{entry.token_id}\t{entry.txid}\t{stamp}\n")
+                        journal.flush()
+                        stats.written += 1
+            elif entry.kind == "metadata":
+                stats.metadata += 1
+            yield entry
+
+
+def manifest_paths(entries, layout):
+    """(manifest path, txid); the flat layout (ar://MANIFEST/<id>) leaves images out."""
+    for entry in entries:
+        if entry.kind == "metadata":
+            yield (f"metadata/{entry.token_id}" if layout == "folder" else str(entry.token_id)), entry.txid
+        elif entry.kind == "contract":
+            yield ("metadata/contract" if layout == "folder" else "contract.json"), entry.txid
+        elif layout == "folder":
+            yield f"images/{entry.token_id}", entry.txid
+
+
+def write_manifest(paths, out_path, stats, style="pretty"):
+    """
+    Stream an arweave/paths manifest (manifest_writer.py); 'index' points at the lowest
+    metadata token and is written after 'paths'. Nothing is kept on disk if there were no paths.
+    """
+    index_token = None
+    manifest = ManifestWriter(out_path, style, version="0.2.0")
+    with manifest:
+        for path, txid in paths:
+            manifest.add(path, txid)
+            token = path.rsplit("/", 1)[-1]
+            if token.isdigit() and not path.startswith("images/") and (index_token is None or int(token) < index_token):
+                index_token = int(token)
+                manifest.set_index(path)
+        if not manifest.paths:
+            manifest.abort()
+    stats.paths = manifest.paths
+    stats.manifest_bytes = manifest.bytes
+
+
+def main():
+    ap = argparse.ArgumentParser(description="ArDrive export → ar:// metadata → path manifest, in one streaming pass")
+    ap.add_argument("export", type=Path, help="ArDrive export CSV (File Name, Data Transaction ID, ...)")
+    ap.add_argument("--metadata", type=Path, default=Path("output/metadata"), help="Source metadata folder")
+    ap.add_argument("--out", type=Path, default=Path("metadata_arweave"), help="Rewritten metadata folder (upload this)")
+    ap.add_argument("--manifest", type=Path, default=Path("folder_based_manifest_final.json"), help="Manifest to write")
+    ap.add_argument("--manifest-style", choices=MANIFEST_STYLES, default="pretty", help="minified drops all whitespace (smaller upload)")
+    ap.add_argument("--layout", choices=LAYOUTS, default="folder", help="folder: metadata/<id> + images/<id>; flat: <id>")
+    ap.add_argument("--style", choices=METADATA_STYLES, default="pretty", help="Metadata JSON layout (see metadata_writer.py)")
+    ap.add_argument("--restart", action="store_true", help="Ignore the resume journal and rewrite everything")
+    args = ap.parse_args()
+
+    print("🦨 Skunk Squad NFT - Arweave Pipeline")
+    print("=" * 50)
+    if not args.export.exists():
+        print(f"❌ Export not found: {args.export}")
+        return 1
+    args.out.mkdir(parents=True, exist_ok=True)
+
+    stats = Stats()
+    entries = classify(export_rows(args.export), stats)
+    entries = rewrite_metadata(entries, args.metadata, args.out, args.out / JOURNAL_NAME, stats, args.style, args.restart)
+    write_manifest(manifest_paths(entries, args.layout), args.manifest, stats, args.manifest_style)
+
+    print(f"📂 {stats.rows:,} export rows: {stats.images:,} images, {stats.metadata:,} metadata files")
+    print(f"📝 Metadata: {stats.written:,} written, {stats.skipped:,} unchanged (journal), {stats.missing:,} missing, "
+          f"{stats.invalid:,} invalid → {args.out}")
+    if stats.paths:
+        print(f"🗺️  Manifest: {stats.paths:,} paths, {format_size(stats.manifest_bytes)} → {args.manifest}")
+    else:
+        print("🗺️  No manifest paths yet: upload the metadata folder, export again and re-run")
+    if stats.problem_count:
+        print(f"\n⚠️  {stats.problem_count} problem(s):")
+        for message in stats.problems:
+            print(f"   {message}")
+        if stats.problem_count > len(stats.problems):
+            print(f"   ... and {stats.problem_count - len(stats.problems)} more")
+    if stats.metadata and args.layout == "folder":
+        print("\n📋 Base URI: ar://MANIFEST_TXID/metadata/  (after uploading the manifest)")
+    elif stats.metadata:
+        print("\n📋 Base URI: ar://MANIFEST_TXID/  (after uploading the manifest)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
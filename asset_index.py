@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Persistent Trait Asset Index for Skunk Squad Collection
+
+generate.py's preflight, layer_availability.py, run_preflight_check.py,
+tools/compute_combinations.py and map_assets.py all resolve catalog paths and
+check trait files. They share resolve_asset_path() and this index:
+
+  assets(path PRIMARY KEY, present, size, mtime_ns,   -- stat fingerprint
+         sha256, width, height, mode, bbox,           -- content details
+         checked_at)
+
+The index lives in .cache/asset_index.sqlite next to this script, whichever directory
+the tools are run from (asset_index.py --db picks another file).
+
+Each lookup still stats every file (cheap), but hashing and decoding happen only
+when a file's (size, mtime) fingerprint changed. After the first scan, availability
+reports and preflight on large trait libraries are limited by stat() alone. bbox is
+the alpha channel's bounding box "left,top,right,bottom" ("" if fully transparent).
+
+Usage:
+  python asset_index.py                          # refresh + summarize traits_catalog.csv
+  python asset_index.py --csv traits_catalog.mapped.csv --rescan
+"""
+
+import argparse
+import csv
+import hashlib
+import os
+import re
+import sqlite3
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from PIL import Image
+
+# Anchored to the repo (like map_assets.py's listing cache), not to the working directory
+ASSET_INDEX_PATH = Path(__file__).resolve().parent / ".cache" / "asset_index.sqlite"
+REMOTE_RE = re.compile(r"^[a-zA-Z]+://")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS assets (
+    path       TEXT PRIMARY KEY,
+    present    INTEGER NOT NULL,
+    size       INTEGER,
+    mtime_ns   INTEGER,
+    sha256     TEXT,
+    width      INTEGER,
+    height     INTEGER,
+    mode       TEXT,
+    bbox       TEXT,
+    checked_at REAL NOT NULL
+);
+"""
+COLUMNS = ("path", "present", "size", "mtime_ns", "sha256", "width", "height", "mode", "bbox", "checked_at")
+
+
+def is_remote(path):
+    return bool(REMOTE_RE.match(str(path)))
+
+
+def resolve_asset_path(raw, base_dir=None):
+    """
+    Catalog 'file' value → path string. URLs are returned normalized (backslashes, and the
+    'https:/host' that Path() leaves behind); relative paths resolve against base_dir (the
+    catalog's folder) when given.
+    """
+    s = str(raw).strip().replace("\\", "/")
+    s = re.sub(r"^(https?):/+", r"\1://", s)
+    if is_remote(s):
+        return s
+    p = Path(s).expanduser()
+    if base_dir is not None and not p.is_absolute():
+        p = (Path(base_dir) / p).resolve()
+    return str(p)
+
+
+def inspect_asset(path):
+    """(sha256, width, height, mode, bbox) for one file; image fields are None for non-images."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    width = height = mode = bbox = None
+    try:
+        with Image.open(path) as im:
+            width, height = im.size
+            mode = im.mode
+            if "A" in im.getbands():
+                box = im.getchannel("A").getbbox()
+            elif "transparency" in im.info:
+                box = im.convert("RGBA").getchannel("A").getbbox()
+            else:
+                box = (0, 0, width, height)
+            bbox = ",".join(map(str, box)) if box else ""
+    except (OSError, ValueError, Image.DecompressionBombError):
+        pass
+    return digest.hexdigest(), width, height, mode, bbox
+
+
+class AssetIndex:
+    """SQLite-backed stat/content cache for trait files; lookups return {path: row dict}."""
+
+    def __init__(self, path=ASSET_INDEX_PATH, workers=None):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.workers = workers or min(8, os.cpu_count() or 1)
+        self.conn = sqlite3.connect(str(self.path))
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM assets").fetchone()[0]
+
+    def lookup(self, paths, rescan=False):
+        """
+        Current info for local asset paths (already resolved), refreshing rows whose stat
+        fingerprint changed. URLs are skipped. Returns {path: row dict}; row['present'] is 0/1.
+        Rows are stored under absolute paths, since the index is shared between working directories.
+        """
+        paths = list(dict.fromkeys(str(p) for p in paths if not is_remote(p)))
+        keys = {path: os.path.abspath(path) for path in paths}
+        known = {}
+        unique_keys = list(dict.fromkeys(keys.values()))
+        for i in range(0, len(unique_keys), 500):
+            chunk = unique_keys[i:i + 500]
+            sql = f"SELECT {', '.join(COLUMNS)} FROM assets WHERE path IN ({', '.join('?' * len(chunk))})"
+            for row in self.conn.execute(sql, chunk):
+                known[row[0]] = dict(zip(COLUMNS, row))
+
+        result, changed, stale = {}, [], []
+        now = time.time()
+        for path in paths:
+            key = keys[path]
+            try:
+                st = os.stat(key)
+            except OSError:
+                row = known.get(key)
+                if row is None or row["present"]:
+                    row = dict.fromkeys(COLUMNS)
+                    row.update(path=key, present=0, checked_at=now)
+                    changed.append(row)
+                    known[key] = row
+                result[path] = row
+                continue
+            row = known.get(key)
+            if rescan or row is None or not row["present"] or (row["size"], row["mtime_ns"]) != (st.st_size, st.st_mtime_ns):
+                row = dict.fromkeys(COLUMNS)
+                row.update(path=key, present=1, size=st.st_size, mtime_ns=st.st_mtime_ns, checked_at=now)
+                stale.append(row)
+                known[key] = row
+            result[path] = row
+
+        if stale:
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                for row, details in zip(stale, pool.map(lambda r: inspect_asset(r["path"]), stale)):
+                    row.update(zip(("sha256", "width", "height", "mode", "bbox"), details))
+            changed.extend(stale)
+        if changed:
+            with self.conn:
+                self.conn.executemany(
+                    f"INSERT OR REPLACE INTO assets ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})",
+                    [tuple(row[c] for c in COLUMNS) for row in changed],
+                )
+        return result
+
+    def present(self, paths):
+        """
+        {path: bool} for local paths and URLs. URLs always count as available (they are
+        not fetched); callers that need to verify remote assets must check them themselves.
+        """
+        info = self.lookup(paths)
+        return {str(p): is_remote(p) or bool(info[str(p)]["present"]) for p in paths}
+
+
+def catalog_assets(csv_path):
+    """[(layer, trait_name, raw_file, resolved)] for every row of a traits catalog CSV."""
+    csv_path = Path(csv_path)
+    base_dir = csv_path.resolve().parent
+    rows = []
+    with csv_path.open(newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            raw = (row.get("file") or "").strip()
+            resolved = resolve_asset_path(raw, base_dir) if raw else ""
+            rows.append(((row.get("layer") or "").strip(), (row.get("trait_name") or "").strip(), raw, resolved))
+    return rows
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Refresh and summarize the trait asset index")
+    ap.add_argument("--csv", type=Path, default=Path("traits_catalog.csv"), help="Traits catalog CSV")
+    ap.add_argument("--db", type=Path, default=ASSET_INDEX_PATH, help="Index database")
+    ap.add_argument("--rescan", action="store_true", help="Re-hash and re-decode every file, ignoring fingerprints")
+    args = ap.parse_args()
+
+    if not args.csv.exists():
+        print(f"❌ Catalog not found: {args.csv}")
+        return 2
+    rows = catalog_assets(args.csv)
+    started = time.perf_counter()
+    with AssetIndex(args.db) as index:
+        info = index.lookup([r[3] for r in rows if r[3]], rescan=args.rescan)
+    elapsed = time.perf_counter() - started
+
+    missing = [r for r in rows if not r[3] or (not is_remote(r[3]) and not info[r[3]]["present"])]
+    local = [info[r[3]] for r in rows if r[3] in info and info[r[3]]["present"]]
+    print(f"🗂️  {len(rows)} catalog rows, {len(local)} local files, {len(missing)} missing ({elapsed * 1000:.0f} ms)")
+
+    # Trait layers are stacked on one canvas, so every layer should share its dimensions
+    sizes = Counter((r["width"], r["height"]) for r in local if r["width"])
+    if len(sizes) > 1:
+        common = sizes.most_common(1)[0][0]
+        print(f"⚠️  Mixed dimensions (most common {common[0]}x{common[1]}):")
+        for r in local:
+            if r["width"] and (r["width"], r["height"]) != common:
+                print(f"   {r['width']}x{r['height']} {r['mode']} {r['path']}")
+    by_hash = defaultdict(list)
+    for r in {r["path"]: r for r in local}.values():  # catalog rows may share a file
+        by_hash[r["sha256"]].append(r["path"])
+    for paths in by_hash.values():
+        if len(paths) > 1:
+            print(f"ℹ️  Identical files: {', '.join(paths)}")
+    for layer, trait, raw, _ in missing[:40]:
+        print(f"   ❌ {layer}/{trait}: {raw or '(no file)'}")
+    return 1 if missing else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -3,8 +3,14 @@
  * Handles badge checking, awarding, and management
  */
 
+const fs = require('fs');
+const path = require('path');
 const db = require('../config/db-config');
 
+// Written by rarity_index.py (per-edition rank, rarity_score, information_content, tier_score)
+const RARITY_INDEX_PATH = process.env.RARITY_INDEX_PATH ||
+    path.join(__dirname, '../../output/rarity_index.json');
+
 class BadgeService {
     /**
      * Check and award badges for a member
@@ -71,10 +77,20 @@ class BadgeService {
                     isEligible = memberData.wallet_address !== null;
                     break;
 
-                case 'rarity_score':
-                    // TODO: Implement when we have rarity scores
-                    isEligible = false;
+                case 'rarity_score': {
+                    // criteria: { min, metric? } or { max_rank }; metric defaults to rarity_score
+                    const rarity = await this.getMemberRarity(memberId);
+                    const metric = criteria.metric || 'rarity_score';
+                    if (criteria.max_rank) {
+                        isEligible = rarity.bestRank !== null && rarity.bestRank.rank <= criteria.max_rank;
+                        metadata = rarity.bestRank ? { token_id: rarity.bestRank.token_id, rarity_rank: rarity.bestRank.rank } : {};
+                    } else {
+                        const best = rarity.best[metric];
+                        isEligible = !!best && best.value >= criteria.min;
+                        metadata = best ? { token_id: best.token_id, [metric]: best.value } : {};
+                    }
                     break;
+                }
 
                 case 'login_streak':
                     // TODO: Implement login tracking
@@ -171,6 +187,7 @@ class BadgeService {
      */
     async getBadgeProgress(memberId) {
         const memberData = await this.getMemberData(memberId);
+        memberData.rarity = await this.getMemberRarity(memberId);
         const allBadges = await this.getAllBadges();
         
         return allBadges.map(badge => {
@@ -204,6 +221,16 @@ class BadgeService {
             case 'profile_complete':
                 return this.isProfileComplete(memberData) ? 100 : 50;
             
+            case 'rarity_score': {
+                const rarity = memberData.rarity;
+                if (!rarity) return 0;
+                if (criteria.max_rank) {
+                    return rarity.bestRank && rarity.bestRank.rank <= criteria.max_rank ? 100 : 0;
+                }
+                const best = rarity.best[criteria.metric || 'rarity_score'];
+                return best ? Math.min(100, (best.value / criteria.min) * 100) : 0;
+            }
+            
             default:
                 return 0;
         }
@@ -240,6 +267,56 @@ class BadgeService {
         return result.rows[0];
     }
 
+    /**
+     * Load the rarity index, re-reading it only when the file changes
+     */
+    loadRarityIndex() {
+        try {
+            const { mtimeMs } = fs.statSync(RARITY_INDEX_PATH);
+            if (!this.rarityIndex || this.rarityIndexMtime !== mtimeMs) {
+                this.rarityIndex = JSON.parse(fs.readFileSync(RARITY_INDEX_PATH, 'utf8'));
+                this.rarityIndexMtime = mtimeMs;
+            }
+            return this.rarityIndex;
+        } catch (error) {
+            console.error('Rarity index unavailable:', error.message);
+            return null;
+        }
+    }
+
+    /**
+     * Best rarity among a member's NFTs: highest value per numeric metric and best (lowest) rank
+     */
+    async getMemberRarity(memberId) {
+        const rarity = { best: {}, bestRank: null };
+        const index = this.loadRarityIndex();
+        if (!index) {
+            return rarity;
+        }
+
+        const result = await db.query(
+            'SELECT DISTINCT token_id FROM member_nfts WHERE member_id = $1',
+            [memberId]
+        );
+
+        for (const { token_id } of result.rows) {
+            const entry = index.editions[String(token_id)];
+            if (!entry) continue;
+
+            for (const [metric, value] of Object.entries(entry)) {
+                if (metric === 'rank' || typeof value !== 'number') continue;
+                if (!rarity.best[metric] || value > rarity.best[metric].value) {
+                    rarity.best[metric] = { value, token_id };
+                }
+            }
+            if (!rarity.bestRank || entry.rank < rarity.bestRank.rank) {
+                rarity.bestRank = { rank: entry.rank, token_id };
+            }
+        }
+
+        return rarity;
+    }
+
     /**
      * Check if profile is complete
      */
@@ -1,74 +1,51 @@
-def auto_generate_txid_files(images_dir="."):
-    base = Path(images_dir)
-    pngs = list(base.glob("*.png"))
-    for img in pngs:
-        token_id = Path(img.name).stem.split("__")[0]
-        txid_file = base / f"{token_id}.txid"
-        if not txid_file.exists():
-            dummy_txid = f"DUMMY_TXID_{token_id}"
-            txid_file.write_text(dummy_txid)
-            print(f"Created {txid_file} with dummy TXID: {dummy_txid}")
-    print(f"Auto-generated .txid files for {len(pngs)} PNGs.")
-
-def generate_txid_files_from_csv(csv_path="txid_map.csv", output_dir="."):
-    base = Path(output_dir)
-    if not Path(csv_path).exists():
-        print(f"ERROR: {csv_path} not found.", file=sys.stderr)
-        return
-    with open(csv_path, newline="", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            token_id = str(row.get("token_id", "")).strip()
-            txid = str(row.get("image_txid", "")).strip()
-            if not token_id or not txid:
-                print(f"Skipping row missing token_id/image_txid: {row}")
-                continue
-            txid_file = base / f"{token_id}.txid"
-            txid_file.write_text(txid)
-            print(f"Created {txid_file} with TXID: {txid}")
-    print(f".txid files generated from {csv_path}.")
-def simulate_test_images(num_images=10):
-    print(f"Simulating {num_images} test images and .txid files...")
-    # First image: user-specified background and TXID
-    first_name = "0001__Background-Bo.png"
-    first_txid = "BTgPmylg9Yc4jni_TF-0tcEyY7YCL9zEYLZa92i__Bo"
-    Path(first_name).write_text("dummy image content")
-    Path("0001.txid").write_text(first_txid)
-    # Remaining images: generic traits and TXIDs
-    for i in range(2, num_images + 1):
-        fname = f"{i:04d}__Background-Test__Trait-Value{i}.png"
-        txid = f"TXID_{i:04d}"
-        Path(fname).write_text("dummy image content")
-        Path(f"{i:04d}.txid").write_text(txid)
-    print("Test files created.")
-    option_b_from_filenames(".")
-    print("Test run complete. Output in metadata_out/")
-    # Clean up dummy files (optional)
-    for i in range(1, num_images + 1):
-        Path(f"{i:04d}__Background-Test__Trait-Value{i}.png").unlink(missing_ok=True)
-        Path(f"{i:04d}.txid").unlink(missing_ok=True)
-    Path(first_name).unlink(missing_ok=True)
-    print("Dummy files cleaned up.")
-
 #!/usr/bin/env python3
 # Skunk Squad NFT asset storage:
 # ArDrive: https://app.ardrive.io/#/drives/a7009e14-f5ab-4485-b955-c80db1a7f350?name=SkunkSquadNFT
+"""
+Build token metadata JSON for ArDrive-hosted images.
 
-ARDRIVE_LINK = "https://app.ardrive.io/#/drives/a7009e14-f5ab-4485-b955-c80db1a7f350?name=SkunkSquadNFT"
-IMAGE_URL_PREFIX = ARDRIVE_LINK + "/"
+Option A: metadata_input.csv with token_id, image_txid, name, description and one
+          column per trait.
+Option B: image filenames that encode the token and its traits, e.g.
+          0001__Background-Bo__Head-Cap.png, each with a 0001.txid sidecar holding
+          the image's transaction ID.
+
+Option B lists the folder once with os.scandir, pairs every image with its sidecar
+from that listing (no per-file existence checks), and parses/renders in parallel
+chunks on a process pool. Rendered files go through metadata_writer's batched
+background writer; progress and error counts are reported per chunk.
+
+Usage:
+  python build_metadata.py                                # Option A if metadata_input.csv exists, else B on .
+  python build_metadata.py --images output/images --workers 8
+  python build_metadata.py --images output/images --auto-txid     # write DUMMY_TXID sidecars first
+  python build_metadata.py --txid-csv txid_map.csv --images output/images
+"""
+
+import argparse
 import csv
-import json
 import os
 import re
 import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
+from metadata_writer import MetadataWriter, dumps_metadata
+
+ARDRIVE_LINK = "https://app.ardrive.io/#/drives/a7009e14-f5ab-4485-b955-c80db1a7f350?name=SkunkSquadNFT"
+IMAGE_URL_PREFIX = ARDRIVE_LINK + "/"
+
 OUT_DIR = Path("metadata_out")
-OUT_DIR.mkdir(exist_ok=True)
+SCAN_CHUNK = 2048
+PROGRESS_INTERVAL = 1.0  # seconds between progress lines
+MAX_ERRORS_SHOWN = 20
 
 # Fixed columns for Option A
 COL_FIXED = ["token_id", "image_txid", "name", "description"]
 
+
 def row_to_metadata(row, image_url_prefix=IMAGE_URL_PREFIX):
     token_id = int(row["token_id"])
     name = row.get("name", f"Skunk Squad #{token_id:04d}")
@@ -88,22 +65,24 @@ def row_to_metadata(row, image_url_prefix=IMAGE_URL_PREFIX):
     }
     return token_id, meta
 
-def option_a_from_csv(csv_path="metadata_input.csv"):
+
+def option_a_from_csv(csv_path="metadata_input.csv", out_dir=OUT_DIR):
     if not Path(csv_path).exists():
         print(f"ERROR: {csv_path} not found. For Option B, delete this file and use filenames.", file=sys.stderr)
         sys.exit(1)
-    with open(csv_path, newline="", encoding="utf-8") as f:
+    Path(out_dir).mkdir(exist_ok=True)
+    with open(csv_path, newline="", encoding="utf-8") as f, MetadataWriter() as writer:
         reader = csv.DictReader(f)
         for row in reader:
             if not row.get("token_id") or not row.get("image_txid"):
                 print(f"Skipping row missing token_id/image_txid: {row}")
                 continue
             token_id, meta = row_to_metadata(row)
-            (OUT_DIR / f"{token_id}.json").write_text(
-                json.dumps(meta, ensure_ascii=False, indent=2), encoding="utf-8"
-            )
+            writer.write_json(Path(out_dir) / f"{token_id}.json", meta, ensure_ascii=False)
+
 
-    
+def parse_filename(fname):
+    """'0001__Background-Bo__Head-Cap.png' → (1, {"Background": "Bo", "Head": "Cap"})."""
     stem = Path(fname).stem
     parts = stem.split("__")
     try:
@@ -120,11 +99,188 @@ def option_a_from_csv(csv_path="metadata_input.csv"):
         attrs[k] = v
     return token_id, attrs
 
-if __name__ == "__main__":
-    # Run the simulation test for 10 images:
-    # simulate_test_images(10)
-    if Path("metadata_input.csv").exists():
-        option_a_from_csv("metadata_input.csv")
-        print(f"Done. Wrote JSONs to {OUT_DIR.resolve()}")
 
+def sidecar_name(png_name):
+    """The .txid sidecar paired with an image: '0001__Background-Bo.png' → '0001.txid'."""
+    return Path(png_name).stem.split("__")[0] + ".txid"
+
+
+def scan_images(images_dir):
+    """
+    One os.scandir pass → ([(png name, sidecar name or None)], number of sidecars).
+    Sorted by name so chunks and output order are stable.
+    """
+    pngs, txids = [], set()
+    with os.scandir(images_dir) as it:
+        for entry in it:
+            name = entry.name
+            if name.endswith(".png"):
+                pngs.append(name)
+            elif name.endswith(".txid"):
+                txids.add(name)
+    pngs.sort()
+    pairs = []
+    for name in pngs:
+        sidecar = sidecar_name(name)
+        pairs.append((name, sidecar if sidecar in txids else None))
+    return pairs, len(txids)
 
+
+def _build_chunk(job):
+    """Worker: parse, read sidecars and render one chunk → ([(token_id, bytes)], Counter, errors)."""
+    images_dir, pairs, image_url_prefix = job
+    rendered, counts, errors = [], Counter(), []
+    for png, sidecar in pairs:
+        if sidecar is None:
+            counts["missing_txid"] += 1
+            errors.append(f"{png}: no {sidecar_name(png)} sidecar")
+            continue
+        try:
+            txid = Path(images_dir, sidecar).read_text(encoding="utf-8").strip()
+        except OSError as e:
+            counts["errors"] += 1
+            errors.append(f"{sidecar}: {e}")
+            continue
+        if not txid:
+            counts["errors"] += 1
+            errors.append(f"{sidecar}: empty")
+            continue
+        token_id, attrs = parse_filename(png)
+        _, meta = row_to_metadata({"token_id": token_id, "image_txid": txid, **attrs}, image_url_prefix)
+        rendered.append((token_id, dumps_metadata(meta, ensure_ascii=False)))
+        counts["built"] += 1
+    return rendered, counts, errors
+
+
+def option_b_from_filenames(images_dir=".", out_dir=OUT_DIR, workers=None, image_url_prefix=IMAGE_URL_PREFIX):
+    """Metadata for every filename-encoded image with a .txid sidecar. Returns a Counter of outcomes."""
+    started = time.perf_counter()
+    pairs, sidecars = scan_images(images_dir)
+    print(f"📂 {len(pairs):,} images, {sidecars:,} .txid sidecars in {images_dir}")
+    Path(out_dir).mkdir(exist_ok=True)
+    jobs = [(str(images_dir), pairs[i:i + SCAN_CHUNK], image_url_prefix) for i in range(0, len(pairs), SCAN_CHUNK)]
+    totals, errors, seen = Counter(), [], set()
+    done, reported = 0, started
+    with MetadataWriter() as writer:
+        if len(jobs) > 1 and workers != 1:
+            pool = ProcessPoolExecutor(max_workers=workers)
+            results = pool.map(_build_chunk, jobs)
+        else:
+            pool = None
+            results = map(_build_chunk, jobs)
+        try:
+            for (rendered, counts, chunk_errors), job in zip(results, jobs):
+                for token_id, data in rendered:
+                    if token_id in seen:
+                        totals["duplicates"] += 1
+                        chunk_errors.append(f"token {token_id}: more than one image, keeping the first")
+                        continue
+                    seen.add(token_id)
+                    writer.write(Path(out_dir) / f"{token_id}.json", data)
+                totals.update(counts)
+                errors.extend(chunk_errors)
+                done += len(job[1])
+                if time.perf_counter() - reported < PROGRESS_INTERVAL and done < len(pairs):
+                    continue
+                reported = time.perf_counter()
+                problems = totals["missing_txid"] + totals["errors"] + totals["duplicates"]
+                print(f"⏳ {done:,}/{len(pairs):,} images, {totals['built'] - totals['duplicates']:,} built, {problems:,} problems")
+        finally:
+            if pool is not None:
+                pool.shutdown()
+    totals["written"] = writer.files
+    elapsed = time.perf_counter() - started
+    print(f"✅ Wrote {writer.files:,} metadata files to {Path(out_dir).resolve()} in {elapsed:.2f}s")
+    if errors:
+        print(f"⚠️  {totals['missing_txid']:,} without sidecar, {totals['errors']:,} unreadable/empty sidecars, "
+              f"{totals['duplicates']:,} duplicate tokens")
+        for message in errors[:MAX_ERRORS_SHOWN]:
+            print(f"   {message}")
+        if len(errors) > MAX_ERRORS_SHOWN:
+            print(f"   ... and {len(errors) - MAX_ERRORS_SHOWN:,} more")
+    return totals
+
+
+def auto_generate_txid_files(images_dir="."):
+    """Write a DUMMY_TXID_<id> sidecar for every image that has none (one listing, batched writes)."""
+    pairs, _ = scan_images(images_dir)
+    missing = sorted({sidecar_name(png) for png, sidecar in pairs if sidecar is None})
+    with MetadataWriter() as writer:
+        for name in missing:
+            writer.write(Path(images_dir) / name, f"DUMMY_TXID_{name[:-len('.txid')]}".encode("utf-8"))
+    print(f"Auto-generated {len(missing):,} .txid files for {len(pairs):,} PNGs.")
+
+
+def generate_txid_files_from_csv(csv_path="txid_map.csv", output_dir="."):
+    base = Path(output_dir)
+    if not Path(csv_path).exists():
+        print(f"ERROR: {csv_path} not found.", file=sys.stderr)
+        return
+    skipped = 0
+    with open(csv_path, newline="", encoding="utf-8") as f, MetadataWriter() as writer:
+        reader = csv.DictReader(f)
+        for row in reader:
+            token_id = str(row.get("token_id", "")).strip()
+            txid = str(row.get("image_txid", "")).strip()
+            if not token_id or not txid:
+                skipped += 1
+                continue
+            writer.write(base / f"{token_id}.txid", txid.encode("utf-8"))
+    print(f"{writer.files:,} .txid files generated from {csv_path} ({skipped:,} rows missing token_id/image_txid skipped).")
+
+
+def simulate_test_images(num_images=10):
+    print(f"Simulating {num_images} test images and .txid files...")
+    # First image: user-specified background and TXID
+    first_name = "0001__Background-Bo.png"
+    first_txid = "BTgPmylg9Yc4jni_TF-0tcEyY7YCL9zEYLZa92i__Bo"
+    Path(first_name).write_text("dummy image content")
+    Path("0001.txid").write_text(first_txid)
+    # Remaining images: generic traits and TXIDs
+    for i in range(2, num_images + 1):
+        fname = f"{i:04d}__Background-Test__Trait-Value{i}.png"
+        txid = f"TXID_{i:04d}"
+        Path(fname).write_text("dummy image content")
+        Path(f"{i:04d}.txid").write_text(txid)
+    print("Test files created.")
+    option_b_from_filenames(".")
+    print("Test run complete. Output in metadata_out/")
+    # Clean up dummy files (optional)
+    for i in range(1, num_images + 1):
+        Path(f"{i:04d}__Background-Test__Trait-Value{i}.png").unlink(missing_ok=True)
+        Path(f"{i:04d}.txid").unlink(missing_ok=True)
+    Path(first_name).unlink(missing_ok=True)
+    print("Dummy files cleaned up.")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Build token metadata from metadata_input.csv (A) or image filenames (B)")
+    ap.add_argument("--csv", type=Path, default=Path("metadata_input.csv"), help="Option A input; Option B is used when it doesn't exist")
+    ap.add_argument("--images", type=Path, default=Path("."), help="Option B image folder (with .txid sidecars)")
+    ap.add_argument("--out", type=Path, default=OUT_DIR, help="Metadata output folder")
+    ap.add_argument("--workers", type=int, default=None, help="Option B worker processes (default: CPU count; 1 = in-process)")
+    ap.add_argument("--auto-txid", action="store_true", help="Create DUMMY_TXID sidecars for images without one first")
+    ap.add_argument("--txid-csv", type=Path, default=None, help="Create sidecars from a token_id,image_txid CSV first")
+    ap.add_argument("--simulate", type=int, default=None, metavar="N", help="Run Option B on N simulated images and clean up")
+    args = ap.parse_args()
+
+    if args.simulate:
+        simulate_test_images(args.simulate)
+        return 0
+    if args.txid_csv:
+        generate_txid_files_from_csv(args.txid_csv, args.images)
+    if args.auto_txid:
+        auto_generate_txid_files(args.images)
+    if args.csv.exists():
+        option_a_from_csv(args.csv, args.out)
+        print(f"Done. Wrote JSONs to {args.out.resolve()}")
+        return 0
+    if not args.images.is_dir():
+        print(f"❌ Image folder not found: {args.images}")
+        return 1
+    totals = option_b_from_filenames(args.images, args.out, args.workers)
+    return 1 if totals["written"] == 0 else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
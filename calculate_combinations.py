@@ -6,6 +6,10 @@ Calculate total possible combinations for Skunk Squad NFT collection
 import pandas as pd
 from collections import defaultdict
 import math
+from pathlib import Path
+
+from combination_forecast import forecast_tables, load_usable_tables, print_summary, retry_warning
+from generate import parse_layer_order
 
 def calculate_combinations():
     # Load the traits catalog
@@ -61,6 +65,20 @@ def calculate_combinations():
         percentage = (count / len(df)) * 100
         print(f"   {rarity.capitalize():10} : {count:2d} traits ({percentage:.1f}%)")
     
+    # The raw product ignores weights; skewed weights make duplicates far more likely
+    print(f"\n🎲 Weighted Uniqueness Forecast (10,000 NFTs, --max-retries 100,000):")
+    tables = load_usable_tables(Path('traits_catalog.csv'))
+    layer_order = parse_layer_order(None)
+    missing = [layer for layer in layer_order if layer not in tables]
+    if missing:
+        print(f"   ⚠️  No usable assets for: {', '.join(missing)}")
+    else:
+        summary = forecast_tables(tables, layer_order, 10000, 100000)
+        print_summary(summary)
+        warning = retry_warning(summary)
+        if warning:
+            print(f"   ⚠️  {warning}")
+    
     return total_combinations, counts_per_layer
 
 if __name__ == "__main__":
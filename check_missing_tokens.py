@@ -1,15 +1,25 @@
 import json
 
+from token_ranges import TokenRanges, format_run
+
+SUPPLY = 10000
+
 with open('nft_manifest_ready.json') as f:
     manifest = json.load(f)
 
-existing = set(int(k) for k in manifest['paths'].keys())
-all_tokens = set(range(1, 10001))
-missing = all_tokens - existing
+existing = TokenRanges.from_ids(int(k) for k in manifest['paths'] if k.isdigit())
+missing = TokenRanges.span(1, SUPPLY) - existing
+extra = existing - TokenRanges.span(1, SUPPLY)
 
 if missing:
-    print(f"❌ Missing {len(missing)} token ID(s): {sorted(missing)}")
+    print(f"❌ Missing {len(missing)} token ID(s) in {len(missing.runs)} range(s): {missing}")
+    for start, end in missing.runs[:20]:
+        print(f"   • {format_run(start, end, unit='tokens')}")
+    if len(missing.runs) > 20:
+        print(f"   ... and {len(missing.runs) - 20} more ranges")
 else:
-    print("✅ All 10,000 tokens present!")
+    print(f"✅ All {SUPPLY:,} tokens present!")
+if extra:
+    print(f"⚠️  {len(extra)} token ID(s) outside 1-{SUPPLY}: {extra}")
 
 print(f"\nTotal tokens in manifest: {len(existing)}")
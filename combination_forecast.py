@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+Unique Combination Forecaster for Skunk Squad Collection
+
+The raw product of traits per layer overstates how many unique editions a weighted
+catalog can comfortably produce: with skewed weights most draws land on a small set
+of likely combinations and generate.py spends its --max-retries on duplicates.
+
+This works from the same weighted layer tables generate.py samples from:
+
+  * Per-layer trait probabilities are kept as exact Fractions (options sharing a trait
+    name are merged, since the duplicate check compares names). Combinations are
+    grouped by exact probability, so a catalog with 10^9 combinations collapses to a
+    few thousand {probability: count} groups with big-integer counts.
+  * Draws are Poissonized: after t draws the number of distinct combinations is a sum
+    of independent indicators with mean sum n·(1 - e^(-p·t)) and matching variance.
+    A normal approximation of that count gives P(fewer than N unique after t draws),
+    which is integrated for the expected number of draws and inverted for percentiles.
+    Poissonized draw counts are slightly more spread out than real ones, so the
+    percentile and --max-retries risk are on the conservative side.
+  * generate.py runs the same forecast as a pre-check with float probabilities (rounded
+    to 12 significant digits for grouping) and gives up once more than
+    PRECHECK_MAX_GROUPS groups appear, so catalogs with many distinct weights can't
+    stall a generation run; this script keeps the exact Fractions.
+
+Usage:
+  python combination_forecast.py --supply 10000
+  python combination_forecast.py --rarity-weights "legendary=0.1,rare=1,common=10" --supply 10000 --max-retries 100000
+"""
+
+import argparse
+import math
+from collections import Counter, defaultdict
+from fractions import Fraction
+from pathlib import Path
+
+import numpy as np
+
+# Warn before a run when the chance of exhausting --max-retries is above this
+RETRY_RISK_WARNING = 0.01
+DEFAULT_PERCENTILE = 99.0
+# generate.py's pre-check skips the forecast beyond this many probability groups
+PRECHECK_MAX_GROUPS = 20000
+# Draw counts evaluated at once when integrating (bounds the draws x groups matrix)
+T_BLOCK = 256
+
+
+def layer_probabilities(opts):
+    """{probability: number of trait names} for one layer, weighted like choose_trait."""
+    weights = [Fraction(repr(float(w))) for _, _, w, _ in opts]
+    if sum(weights) <= 0:
+        weights = [Fraction(1)] * len(opts)  # choose_trait falls back to uniform
+    total = sum(weights)
+    by_name = defaultdict(Fraction)
+    for (name, _, _, _), w in zip(opts, weights):
+        by_name[str(name)] += w / total
+    return Counter(p for p in by_name.values() if p > 0)
+
+
+def combination_groups(layer_tables, layer_order, exact=True, max_groups=None):
+    """
+    {probability: number of combinations} over the layers generate.py draws from. With
+    exact=False probabilities are floats rounded to 12 significant digits; returns None
+    as soon as there are more than max_groups groups.
+    """
+    groups = {Fraction(1) if exact else 1.0: 1}
+    for layer in layer_order:
+        probs = layer_probabilities(layer_tables.get(layer, []))
+        if not exact:
+            floats = Counter()
+            for q, m in probs.items():
+                floats[float(q)] += m
+            probs = floats
+        merged = defaultdict(int)
+        for p, n in groups.items():
+            for q, m in probs.items():
+                merged[p * q if exact else float(f"{p * q:.12g}")] += n * m
+            if max_groups is not None and len(merged) > max_groups:
+                return None
+        groups = merged
+    return dict(groups)
+
+
+class Forecast:
+    """Distinct-combination count after t (Poissonized) draws, for a set of probability groups."""
+
+    def __init__(self, groups):
+        self.total = sum(groups.values())
+        self.p = np.array([float(p) for p in groups], dtype=np.float64)
+        self.n = np.array([float(n) for n in groups.values()], dtype=np.float64)
+
+    def effective_combinations(self):
+        """1 / P(two draws collide): the size of a uniform catalog with the same duplicate rate."""
+        return 1.0 / float((self.n * self.p * self.p).sum())
+
+    def unique_after(self, t):
+        """(mean, std) of the number of distinct combinations after t draws."""
+        t = np.atleast_1d(np.asarray(t, dtype=np.float64))
+        seen = -np.expm1(-np.outer(t, self.p))  # P(combination drawn at least once)
+        mean = seen @ self.n
+        var = (seen * (1.0 - seen)) @ self.n
+        return mean, np.sqrt(var)
+
+    def shortfall_probability(self, supply, t):
+        """P(fewer than supply distinct combinations after t draws)."""
+        mean, std = self.unique_after(t)
+        z = (supply - 0.5 - mean) / np.maximum(std, 1e-12)
+        cdf = 0.5 * np.vectorize(math.erfc)(-z / math.sqrt(2.0))
+        return cdf if np.ndim(t) else float(cdf[0])
+
+    def draws_for(self, supply, probability):
+        """Smallest draw count t with P(at least supply unique after t) >= probability."""
+        if supply > self.total:
+            return math.inf
+        target = 1.0 - probability
+        lo, hi = 0.0, float(max(supply, 1))
+        while self.shortfall_probability(supply, hi) > target:
+            lo, hi = hi, hi * 2.0
+            if hi > 1e18:
+                return math.inf
+        for _ in range(100):
+            mid = (lo + hi) / 2.0
+            if self.shortfall_probability(supply, mid) > target:
+                lo = mid
+            else:
+                hi = mid
+            if hi - lo <= max(0.5, hi * 1e-9):
+                break
+        return math.ceil(hi)
+
+    def expected_draws(self, supply, steps=4096):
+        """E[draws to reach supply unique] = integral of P(fewer than supply unique after t) dt."""
+        if supply > self.total:
+            return math.inf
+        start = self.draws_for(supply, 1e-12)
+        end = self.draws_for(supply, 1.0 - 1e-12)
+        if not math.isfinite(end):
+            return math.inf
+        t = np.linspace(start, end, steps)
+        shortfall = np.concatenate([self.shortfall_probability(supply, t[i:i + T_BLOCK])
+                                    for i in range(0, steps, T_BLOCK)])
+        return float(start + ((shortfall[1:] + shortfall[:-1]) / 2.0 * np.diff(t)).sum())
+
+    def summary(self, supply, max_retries=None, percentile=DEFAULT_PERCENTILE):
+        expected = self.expected_draws(supply)
+        doc = {
+            "supply": supply,
+            "total_combinations": self.total,
+            "probability_groups": len(self.p),
+            "effective_combinations": self.effective_combinations(),
+            "expected_draws": expected,
+            "expected_duplicates": expected - supply,
+            "percentile": percentile,
+            "percentile_draws": self.draws_for(supply, percentile / 100.0),
+        }
+        if max_retries is not None:
+            doc["max_retries"] = max_retries
+            doc["retry_exhaustion_probability"] = (
+                1.0 if supply > self.total else self.shortfall_probability(supply, float(max_retries))
+            )
+        return doc
+
+
+def forecast_tables(layer_tables, layer_order, supply, max_retries=None, percentile=DEFAULT_PERCENTILE,
+                    exact=True, max_groups=None):
+    """Forecast summary for generate.py's usable tables and layer order (None if over max_groups)."""
+    groups = combination_groups(layer_tables, layer_order, exact, max_groups)
+    if groups is None:
+        return None
+    return Forecast(groups).summary(supply, max_retries, percentile)
+
+
+def retry_warning(summary):
+    """One-line warning when --max-retries is likely to stop a run short, else None."""
+    risk = summary and summary.get("retry_exhaustion_probability")
+    if risk is None or risk < RETRY_RISK_WARNING:
+        return None
+    if summary["supply"] > summary["total_combinations"]:
+        return (f"only {summary['total_combinations']:,} combinations exist; "
+                f"{summary['supply']:,} unique editions are impossible")
+    return (f"{risk:.1%} chance of hitting --max-retries {summary['max_retries']:,} before "
+            f"{summary['supply']:,} unique editions (expected {summary['expected_draws']:,.0f} draws, "
+            f"p{summary['percentile']:g} {summary['percentile_draws']:,})")
+
+
+def print_summary(summary):
+    print(f"   Total combinations:     {summary['total_combinations']:,}")
+    print(f"   Effective combinations: {summary['effective_combinations']:,.0f} (same duplicate rate, uniform weights)")
+    print(f"   Expected draws:         {summary['expected_draws']:,.0f} for {summary['supply']:,} unique "
+          f"(~{summary['expected_duplicates']:,.0f} duplicates rejected)")
+    print(f"   {'p%g draws:' % summary['percentile']:23} {summary['percentile_draws']:,}")
+    if "max_retries" in summary:
+        risk = summary["retry_exhaustion_probability"]
+        icon = "⚠️ " if risk >= RETRY_RISK_WARNING else "✅"
+        print(f"   Max retries {summary['max_retries']:,}: {icon} {risk:.2%} chance of stopping short")
+
+
+def load_usable_tables(csv_path=None, traits_dir=None, rarity_weights=None):
+    """generate.py's usable layer tables for a catalog CSV or traits directory."""
+    from generate import apply_rarity_weights, build_layer_tables, filter_usable_tables, load_catalog, load_from_dir
+
+    df = load_from_dir(traits_dir) if traits_dir else load_catalog(csv_path)
+    return filter_usable_tables(apply_rarity_weights(build_layer_tables(df), rarity_weights or {}))
+
+
+def main():
+    from generate import parse_layer_order, parse_rarity_weights
+
+    ap = argparse.ArgumentParser(description="Forecast draws needed for N unique weighted combinations")
+    ap.add_argument("--csv", type=Path, default=Path(__file__).parent.joinpath("traits_catalog.csv"), help="Traits catalog CSV")
+    ap.add_argument("--traits-dir", type=Path, default=None, help="Traits directory (alternative to --csv)")
+    ap.add_argument("--rarity-weights", type=str, default=None, help="Same overrides as generate.py, e.g. 'legendary=0.1,rare=1,common=10'")
+    ap.add_argument("--layer-order", type=str, default=None, help="Same as generate.py --layer-order")
+    ap.add_argument("--supply", type=int, default=10000, help="Unique editions wanted")
+    ap.add_argument("--max-retries", type=int, default=100000, help="generate.py --max-retries to check against")
+    ap.add_argument("--percentile", type=float, default=DEFAULT_PERCENTILE, help="Report this percentile of draws needed")
+    args = ap.parse_args()
+
+    tables = load_usable_tables(args.csv, args.traits_dir, parse_rarity_weights(args.rarity_weights))
+    layer_order = parse_layer_order(args.layer_order)
+    missing = [layer for layer in layer_order if layer not in tables]
+    if missing:
+        print(f"❌ No usable traits for layer(s): {', '.join(missing)}; generate.py would refuse to run")
+        return 1
+
+    summary = forecast_tables(tables, layer_order, args.supply, args.max_retries, args.percentile)
+    print("🎲 UNIQUE COMBINATION FORECAST (weighted sampling)")
+    print("=" * 60)
+    print(f"Layers: {', '.join(layer_order)}")
+    print_summary(summary)
+    warning = retry_warning(summary)
+    if warning:
+        print(f"\n⚠️  {warning}")
+        return 2
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
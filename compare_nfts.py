@@ -4,19 +4,19 @@ Compare NFT collections between Arweave export CSV and local metadata files
 to identify missing items.
 """
 
-import os
 import csv
-import json
 from pathlib import Path
 
+from token_ranges import TokenRanges, format_run
+
 def read_arweave_export():
-    """Read the Arweave export CSV file and extract NFT numbers"""
+    """Read the Arweave export CSV file and extract NFT numbers (as TokenRanges)"""
     csv_path = Path("export_data.csv")
     if not csv_path.exists():
         print("Error: export_data.csv not found")
-        return set()
+        return TokenRanges()
     
-    arweave_nfts = set()
+    arweave_nfts = []
     
     with open(csv_path, 'r', encoding='utf-8') as file:
         reader = csv.DictReader(file)
@@ -26,30 +26,37 @@ def read_arweave_export():
                 # Extract number from filename like "123.png"
                 nft_number = filename.replace('.png', '')
                 try:
-                    arweave_nfts.add(int(nft_number))
+                    arweave_nfts.append(int(nft_number))
                 except ValueError:
                     print(f"Warning: Could not parse NFT number from '{filename}'")
     
-    return arweave_nfts
+    return TokenRanges.from_ids(arweave_nfts)
 
 def read_local_metadata():
-    """Read local metadata files and extract NFT numbers"""
+    """Read local metadata files and extract NFT numbers (as TokenRanges)"""
     metadata_dir = Path("metadata_arweave")
     if not metadata_dir.exists():
         print("Error: metadata_arweave directory not found")
-        return set()
+        return TokenRanges()
     
-    local_nfts = set()
+    local_nfts = []
     
     for json_file in metadata_dir.glob("*.json"):
         filename = json_file.stem  # Gets filename without .json extension
         try:
             nft_number = int(filename)
-            local_nfts.add(nft_number)
+            local_nfts.append(nft_number)
         except ValueError:
             print(f"Warning: Could not parse NFT number from '{json_file.name}'")
     
-    return local_nfts
+    return TokenRanges.from_ids(local_nfts)
+
+def print_runs(tokens, limit=20):
+    """Report lines for the first `limit` runs of a TokenRanges."""
+    for start, end in tokens.runs[:limit]:
+        print(f"   • NFT {format_run(start, end)}")
+    if len(tokens.runs) > limit:
+        print(f"   ... and {len(tokens.runs) - limit} more ranges")
 
 def main():
     print("🔍 Comparing NFT collections...")
@@ -67,16 +74,10 @@ def main():
     missing_in_local = arweave_nfts - local_nfts
     missing_in_arweave = local_nfts - arweave_nfts
     
-    # Report results
+    # Report results as ranges
     if missing_in_local:
         print(f"❌ Missing from local metadata ({len(missing_in_local)} items):")
-        missing_sorted = sorted(missing_in_local)
-        for i, nft_num in enumerate(missing_sorted):
-            if i < 20:  # Show first 20
-                print(f"   • NFT #{nft_num}")
-            elif i == 20:
-                print(f"   ... and {len(missing_sorted) - 20} more")
-                break
+        print_runs(missing_in_local)
         print()
     else:
         print("✅ All Arweave NFTs are present in local metadata")
@@ -84,13 +85,7 @@ def main():
     
     if missing_in_arweave:
         print(f"⚠️  Extra in local metadata ({len(missing_in_arweave)} items):")
-        extra_sorted = sorted(missing_in_arweave)
-        for i, nft_num in enumerate(extra_sorted):
-            if i < 20:  # Show first 20
-                print(f"   • NFT #{nft_num}")
-            elif i == 20:
-                print(f"   ... and {len(extra_sorted) - 20} more")
-                break
+        print_runs(missing_in_arweave)
         print()
     else:
         print("✅ No extra items in local metadata")
@@ -104,12 +99,10 @@ def main():
     
     # Range analysis
     if arweave_nfts:
-        arweave_min, arweave_max = min(arweave_nfts), max(arweave_nfts)
-        print(f"   • Arweave range: #{arweave_min} to #{arweave_max}")
+        print(f"   • Arweave range: #{arweave_nfts.min} to #{arweave_nfts.max} ({len(arweave_nfts.runs)} continuous runs)")
     
     if local_nfts:
-        local_min, local_max = min(local_nfts), max(local_nfts)
-        print(f"   • Local range: #{local_min} to #{local_max}")
+        print(f"   • Local range: #{local_nfts.min} to #{local_nfts.max} ({len(local_nfts.runs)} continuous runs)")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Contact Sheet Builder for Skunk Squad Collection Review
+
+Streams generated images into tiled N×M contact sheets with edition labels so a
+whole collection can be reviewed page by page instead of file by file.
+
+  - Reads output/manifest.csv and thumbnails from output/images/<edition>.png
+  - Optional ordering by rarity score (analyze_rarity.calculate_rarity_score)
+  - Optional trait filters, e.g. --filter head="Legendary nuclear neon"
+  - Thumbnails for a page are decoded in parallel; only one sheet is held in memory
+
+Usage:
+  python contact_sheets.py --cols 10 --rows 10 --thumb 256 --sort rarity
+  python contact_sheets.py --filter background=Space --outdir output/sheets_space
+"""
+
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+from PIL import Image, ImageDraw, ImageFont
+
+LABEL_HEIGHT = 18
+BACKGROUND = (24, 24, 24)
+LABEL_COLOR = (235, 235, 235)
+MISSING_COLOR = (90, 20, 20)
+
+
+def load_thumbnail(path, thumb):
+    """Decode one image and shrink it to fit a thumb×thumb box (None if missing)."""
+    try:
+        with Image.open(path) as img:
+            # reduce() is a cheap integer box filter; finish with an exact thumbnail
+            factor = max(1, min(img.size) // (thumb * 2))
+            small = img.reduce(factor) if factor > 1 else img.copy()
+        small.thumbnail((thumb, thumb), Image.LANCZOS)
+        return small.convert("RGBA")
+    except (FileNotFoundError, OSError):
+        return None
+
+
+def select_editions(df, filters=None, sort=None):
+    """Apply trait filters and ordering; returns a list of (edition, label) tuples."""
+    for layer, value in (filters or []):
+        col = f"{layer}_trait"
+        if col not in df.columns:
+            raise ValueError(f"Manifest has no column '{col}' for filter {layer}={value}")
+        df = df[df[col].astype(str) == value]
+
+    if sort == "rarity" and len(df):
+        from analyze_rarity import calculate_rarity_score
+
+        scores = calculate_rarity_score(df)
+        scores = scores.sort_values(["rarity_score", "edition"], ascending=[False, True])
+        return [
+            (int(ed), f"#{int(ed)}  {int(sc)}")
+            for ed, sc in zip(scores["edition"], scores["rarity_score"])
+        ]
+    editions = sorted(int(e) for e in df["edition"])
+    return [(ed, f"#{ed}") for ed in editions]
+
+
+def build_sheet(entries, images_dir, cols, rows, thumb, pool, font):
+    """Compose one contact sheet from (edition, label) entries."""
+    cell_w, cell_h = thumb, thumb + LABEL_HEIGHT
+    sheet = Image.new("RGB", (cols * cell_w, rows * cell_h), BACKGROUND)
+    draw = ImageDraw.Draw(sheet)
+    paths = [Path(images_dir) / f"{edition}.png" for edition, _ in entries]
+    missing = 0
+    # map() yields in order; each thumbnail is pasted and dropped immediately
+    for idx, ((edition, label), tile) in enumerate(zip(entries, pool.map(lambda p: load_thumbnail(p, thumb), paths))):
+        x = (idx % cols) * cell_w
+        y = (idx // cols) * cell_h
+        if tile is None:
+            missing += 1
+            draw.rectangle([x, y, x + thumb - 1, y + thumb - 1], fill=MISSING_COLOR)
+        else:
+            ox = x + (thumb - tile.size[0]) // 2
+            oy = y + (thumb - tile.size[1]) // 2
+            sheet.paste(tile, (ox, oy), tile)
+        draw.text((x + 4, y + thumb + 3), label, fill=LABEL_COLOR, font=font)
+    return sheet, missing
+
+
+def build_contact_sheets(manifest_path, images_dir, outdir, cols=10, rows=10, thumb=256,
+                         sort=None, filters=None, workers=8, fmt="png"):
+    """Write contact_sheet_XXX.<fmt> pages to outdir and return the list of written paths."""
+    df = pd.read_csv(manifest_path)
+    entries = select_editions(df, filters=filters, sort=sort)
+    if not entries:
+        print("⚠️  No editions matched; nothing to do.")
+        return []
+
+    outdir = Path(outdir)
+    outdir.mkdir(parents=True, exist_ok=True)
+    per_page = cols * rows
+    pages = (len(entries) + per_page - 1) // per_page
+    font = ImageFont.load_default()
+    written = []
+    total_missing = 0
+
+    print(f"🗂️  {len(entries):,} editions → {pages} sheet(s) of {cols}×{rows}")
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for page in range(pages):
+            chunk = entries[page * per_page:(page + 1) * per_page]
+            sheet, missing = build_sheet(chunk, images_dir, cols, rows, thumb, pool, font)
+            total_missing += missing
+            out_path = outdir / f"contact_sheet_{page + 1:03d}.{fmt}"
+            if fmt == "jpg":
+                sheet.save(out_path, quality=90)
+            else:
+                sheet.save(out_path)
+            del sheet
+            written.append(out_path)
+            print(f"   ✅ {out_path.name}: #{chunk[0][0]} … #{chunk[-1][0]}")
+
+    if total_missing:
+        print(f"⚠️  {total_missing} image(s) missing (shown as red tiles)")
+    print(f"📁 Sheets written to: {outdir}")
+    return written
+
+
+def parse_filter(arg):
+    if "=" not in arg:
+        raise argparse.ArgumentTypeError(f"Filter must look like layer=value, got '{arg}'")
+    layer, value = arg.split("=", 1)
+    return layer.strip(), value.strip()
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Build tiled contact sheets for collection review")
+    ap.add_argument("--manifest", type=Path, default=Path("output/manifest.csv"), help="Generator manifest CSV")
+    ap.add_argument("--images", type=Path, default=Path("output/images"), help="Directory with <edition>.png images")
+    ap.add_argument("--outdir", type=Path, default=Path("output/contact_sheets"), help="Where to write sheets")
+    ap.add_argument("--cols", type=int, default=10, help="Tiles per row")
+    ap.add_argument("--rows", type=int, default=10, help="Rows per sheet")
+    ap.add_argument("--thumb", type=int, default=256, help="Thumbnail edge in pixels")
+    ap.add_argument("--sort", choices=["edition", "rarity"], default="edition", help="Tile ordering")
+    ap.add_argument("--filter", type=parse_filter, action="append", default=[], help="Only editions with layer=trait (repeatable)")
+    ap.add_argument("--workers", type=int, default=8, help="Parallel image readers")
+    ap.add_argument("--format", choices=["png", "jpg"], default="png", help="Sheet file format")
+    args = ap.parse_args()
+
+    if not args.manifest.exists():
+        print(f"❌ Manifest not found: {args.manifest}")
+        return 1
+
+    build_contact_sheets(
+        args.manifest, args.images, args.outdir,
+        cols=args.cols, rows=args.rows, thumb=args.thumb,
+        sort=args.sort, filters=args.filter, workers=args.workers, fmt=args.format,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
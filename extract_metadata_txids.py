@@ -1,5 +1,6 @@
 import csv
-import json
+
+from manifest_writer import format_size, write_manifest
 
 print("🦨 Extracting Metadata Transaction IDs from ArDrive Export...")
 print("="*60)
@@ -29,28 +30,17 @@ if len(metadata_txids) > 0:
         print(f"   {i}.json → {metadata_txids[i]}")
         print(f"   URL: https://arweave.net/{metadata_txids[i]}")
     
-    # Build manifest
-    manifest = {
-        "manifest": "arweave/paths",
-        "version": "0.2.0",
-        "index": {
-            "path": str(min(metadata_txids.keys()))
-        },
-        "paths": {}
-    }
-    
-    for token_id in sorted(metadata_txids.keys()):
-        manifest["paths"][str(token_id)] = {
-            "id": metadata_txids[token_id]
-        }
-    
-    # Save manifest
+    # Stream the manifest straight to disk, tokens in ascending order
     output_file = 'nft_manifest_ready.json'
-    with open(output_file, 'w') as f:
-        json.dump(manifest, f, indent=2)
+    paths, size = write_manifest(
+        output_file,
+        ((str(token_id), metadata_txids[token_id]) for token_id in sorted(metadata_txids)),
+        version="0.2.0",
+        index=str(min(metadata_txids)),
+    )
     
-    print(f"\n✅ Created manifest: {output_file}")
-    print(f"   Total paths: {len(manifest['paths'])}")
+    print(f"\n✅ Created manifest: {output_file} ({format_size(size)})")
+    print(f"   Total paths: {paths}")
     print(f"\n📋 NEXT STEPS:")
     print(f"   1. Upload {output_file} to Arweave/ArDrive")
     print(f"   2. Get the transaction ID of the uploaded manifest")
@@ -28,15 +28,55 @@ Usage:
 
   After generation, upload output/images to IPFS/ArDrive.
   If you have a distinct base URI for images, pass --images-suburi "ipfs://IMAGES_CID/".
+  Or pass --ipfs-car output/collection.car to compute the CIDs locally (ipfs_car.py):
+  metadata gets final ipfs://<IMAGES_CID>/ image URIs and everything is packed into one
+  CAR file ready for `ipfs dag import` or a pinning service.
+
+Preview renders:
+  Pass --preview-scale 2|4|8 to composite from cached 1/2, 1/4 or 1/8 copies of every
+  trait asset (built once under .cache/pyramid and refreshed when an asset changes).
+  Use a separate --outdir for previews so full renders are not overwritten.
+
+Rendering & PNG size:
+  --workers N composites and encodes editions in N worker processes (trait sampling stays
+  in the main process, so --seed runs are reproducible regardless of N).
+  --png-mode lossless|quantize re-encodes each image to the smallest PNG found (see
+  png_optimize.py) and writes per-edition savings to <outdir>/png_sizes.csv.
+  --tile-height H composites the canvas in horizontal strips of H rows and streams them
+  straight into the PNG, so memory per worker no longer grows with --image-width/-height
+  (useful for 4096² or print-size renders). Tiled renders skip --png-mode.
+
+Metadata files:
+  --metadata-style compact|canonical writes minified JSON (about 30% fewer bytes to store);
+  canonical also sorts keys so identical metadata always hashes the same. Files are
+  written by a background thread (metadata_writer.py); --metadata-fsync makes each write
+  durable and atomic at some cost in speed.
+
+Visual duplicates:
+  With --visual-dupes report|reject every rendered edition gets a perceptual hash
+  (perceptual_hash.py, stored in the manifest 'phash' column) that is checked against a
+  BK-tree of earlier editions. report lists near-identical renders in
+  <outdir>/visual_duplicates.csv; reject discards them and resamples the edition.
+  --visual-dupe-distance sets the Hamming threshold (of 448 bits). If --max-retries runs
+  out while rejected editions are still waiting for a resample, the highest editions are
+  renumbered into the gaps (so editions stay 1..N) and the run exits non-zero.
+
+Uniqueness:
+  Before sampling, the weighted catalog is checked with combination_forecast.py; a warning
+  is printed when --max-retries is likely to run out before --supply unique combinations.
+  The check uses float math and is skipped for catalogs with too many distinct weight
+  products (run combination_forecast.py for the exact forecast).
 
 License: MIT
 """
 
 import argparse
+import csv
 import hashlib
 import json
 import random
-from collections import defaultdict, OrderedDict
+from collections import defaultdict, deque, OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor
 from pathlib import Path
 from typing import Dict, List, Tuple, Optional
 import io
@@ -46,6 +86,13 @@ import urllib.request
 from PIL import Image
 import pandas as pd
 
+from png_optimize import PNG_MODES, DEFAULT_MIN_PSNR, optimize_png
+from png_stream import StreamingPNGWriter
+from perceptual_hash import HASH_BITS, BKTree, format_hash, perceptual_hash
+from metadata_writer import METADATA_STYLES, MetadataTemplate, MetadataWriter, write_bytes
+from combination_forecast import PRECHECK_MAX_GROUPS, forecast_tables, retry_warning
+from asset_index import AssetIndex, is_remote, resolve_asset_path
+
 # ✅ Updated default order per your spec (Background, Tail, Body)
 DEFAULT_LAYER_ORDER = [
     "background",
@@ -58,6 +105,10 @@ DEFAULT_LAYER_ORDER = [
     "shoes",
 ]
 
+# Downscale factors kept in the trait asset pyramid (1/2, 1/4, 1/8)
+PYRAMID_SCALES = (2, 4, 8)
+PYRAMID_CACHE_DIR = Path(".cache") / "pyramid"
+
 def load_catalog(csv_path: Path) -> pd.DataFrame:
     csv_path = Path(csv_path).expanduser()
     if not csv_path.exists():
@@ -87,17 +138,66 @@ def build_layer_tables(df: pd.DataFrame) -> Dict[str, List[Tuple[str, Path, floa
     for _, row in df.iterrows():
         layer = str(row["layer"]).strip()
         trait = str(row["trait_name"]).strip()
-        raw_path = str(row["file"]).strip()
-        # Resolve relative paths against the CSV directory if provided
-        if csv_parent and not re.match(r'^[a-zA-Z]+://', raw_path) and not Path(raw_path).is_absolute():
-            filepath = (csv_parent / raw_path).resolve()
-        else:
-            filepath = Path(raw_path).expanduser()
+        # Relative paths resolve against the CSV directory if provided
+        filepath = Path(resolve_asset_path(row["file"], csv_parent))
         weight = float(row["weight"])
         rarity = str(row["rarity_tier"]).strip()
         tables[layer].append((trait, filepath, weight, rarity))
     return tables
 
+def parse_rarity_weights(arg: Optional[str]) -> Dict[str, float]:
+    """Parse 'legendary=0.1,rare=1,common=10' into {rarity: weight}; invalid pairs are skipped."""
+    rarity_weights: Dict[str, float] = {}
+    if not arg:
+        return rarity_weights
+    for pair in arg.split(","):
+        if "=" in pair:
+            k, v = pair.split("=", 1)
+            try:
+                rarity_weights[k.strip()] = float(v.strip())
+            except ValueError:
+                print(f"Warning: invalid rarity weight for '{pair}', skipping")
+    return rarity_weights
+
+def apply_rarity_weights(tables: Dict[str, List[Tuple[str, Path, float, str]]],
+                         rarity_weights: Dict[str, float]) -> Dict[str, List[Tuple[str, Path, float, str]]]:
+    """Override each trait's weight with its rarity tier's weight, where one is given."""
+    if not rarity_weights:
+        return tables
+    for layer, opts in tables.items():
+        new_opts = []
+        for trait, path, weight, rarity in opts:
+            rw = rarity_weights.get(rarity, rarity_weights.get(rarity.lower(), None))
+            if rw is not None:
+                new_opts.append((trait, path, float(rw), rarity))
+            else:
+                new_opts.append((trait, path, weight, rarity))
+        tables[layer] = new_opts
+    return tables
+
+def filter_usable_tables(tables: Dict[str, List[Tuple[str, Path, float, str]]],
+                         on_missing=None,
+                         available: Optional[Dict[str, bool]] = None) -> Dict[str, List[Tuple[str, str, float, str]]]:
+    """
+    Keep only options whose file exists locally or is a URL; layers left empty are dropped.
+    available: optional {path: bool} from AssetIndex.present (default: stat each file).
+    """
+    usable_tables = {}
+    for layer, opts in tables.items():
+        usable = []
+        for trait, path, weight, rarity in opts:
+            s = resolve_asset_path(path)
+            ok = available.get(s) if available is not None else None
+            if ok is None:
+                ok = is_remote(s) or Path(s).exists()
+            if ok:
+                usable.append((trait, s, float(weight), rarity))
+            elif on_missing:
+                on_missing(layer, s)
+        if usable:
+            usable_tables[layer] = usable
+    return usable_tables
+
 def load_from_dir(dir_path: Path) -> pd.DataFrame:
     """
     Build a DataFrame similar to the CSV format from a directory structure.
@@ -150,6 +250,53 @@ def load_from_dir(dir_path: Path) -> pd.DataFrame:
     df.attrs["__csv_path__"] = str(dir_path)
     return df
 
+def _pyramid_key(src: str) -> str:
+    """Cache key for an asset: local files are keyed by path + stat fingerprint, URLs by the URL."""
+    p = Path(src)
+    if p.exists():
+        st = p.stat()
+        ident = f"{p.resolve()}|{st.st_size}|{st.st_mtime_ns}"
+    else:
+        ident = src
+    return hashlib.sha1(ident.encode("utf-8")).hexdigest()[:20]
+
+def build_asset_pyramid(tables: Dict[str, List[Tuple[str, Path, float, str]]],
+                        cache_dir: Path = PYRAMID_CACHE_DIR,
+                        scales: Tuple[int, ...] = PYRAMID_SCALES) -> Dict[str, Dict[int, Path]]:
+    """
+    Build (or reuse) downscaled copies of every trait asset.
+    Returns {asset path string: {scale: cached png path}}. Each level is reduced from the
+    previous one with a box filter on premultiplied alpha, so edges stay clean when composited.
+    """
+    cache_dir = Path(cache_dir)
+    pyramid: Dict[str, Dict[int, Path]] = {}
+    for layer, opts in tables.items():
+        for trait, path, weight, rarity in opts:
+            s = str(path).replace("\\", "/")
+            # Look-ups go through Path(...) like chosen_files do, so key on the same string form
+            lookup = str(Path(s))
+            if lookup in pyramid:
+                continue
+            key = _pyramid_key(s)
+            levels = {scale: cache_dir / f"1_{scale}" / f"{key}.png" for scale in scales}
+            if not all(p.exists() for p in levels.values()):
+                try:
+                    img = open_image_keep_size(s, None)
+                except FileNotFoundError:
+                    continue
+                prev_scale = 1
+                premul = img.convert("RGBa")
+                for scale in sorted(scales):
+                    premul = premul.reduce(scale // prev_scale)
+                    prev_scale = scale
+                    out = levels[scale]
+                    out.parent.mkdir(parents=True, exist_ok=True)
+                    tmp = out.with_suffix(".tmp")
+                    premul.convert("RGBA").save(tmp, format="PNG")
+                    tmp.replace(out)
+            pyramid[lookup] = levels
+    return pyramid
+
 def choose_trait(options: List[Tuple[str, Path, float, str]]) -> Tuple[str, Path, str]:
     # Weighted random choice
     names, paths, weights, rarities = zip(*options)
@@ -222,6 +369,59 @@ def compose_image(chosen_files: "OrderedDict[str, Path]", enforce_size: Optional
             raise FileNotFoundError(f"Missing file for layer '{layer}': {p}")
     return base_img
 
+def compose_image_tiled(chosen_files: "OrderedDict[str, Path]", out_path: Path,
+                        enforce_size: Optional[Tuple[int,int]]=None, strip_height: int=256,
+                        thumb_size: int=64) -> Image.Image:
+    """
+    Strip-by-strip equivalent of compose_image() that writes the PNG as it goes.
+    Layers are decoded once at their own (asset) size; only one canvas strip of
+    strip_height rows exists at a time. Returns a thumb_size-wide thumbnail
+    assembled from the strips (for hashing), since the full image is never held.
+    """
+    layers = []
+    for layer, p in chosen_files.items():
+        s = str(p).replace("\\", "/")
+        try:
+            layers.append(open_image_keep_size(s, None))
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Missing file for layer '{layer}': {p}")
+    size = enforce_size or layers[0].size
+    width, height = size
+
+    thumb = Image.new("RGBA", (thumb_size, thumb_size), (0,0,0,0))
+    with open(out_path, "wb") as fp:
+        writer = StreamingPNGWriter(fp, width, height)
+        for y0 in range(0, height, strip_height):
+            y1 = min(height, y0 + strip_height)
+            strip = Image.new("RGBA", (width, y1 - y0), (0,0,0,0))
+            for idx, img in enumerate(layers):
+                # Same centering as compose_image / open_image_keep_size
+                ox = (width - img.size[0]) // 2
+                oy = (height - img.size[1]) // 2
+                sy0, sy1 = max(0, y0 - oy), min(img.size[1], y1 - oy)
+                if sy0 >= sy1:
+                    continue
+                piece = img.crop((0, sy0, img.size[0], sy1))
+                dest = (ox, oy + sy0 - y0)
+                if idx == 0:
+                    if enforce_size is None:
+                        strip.paste(piece, dest)
+                    else:
+                        strip.paste(piece, dest, piece)
+                elif img.size == size:
+                    strip.alpha_composite(piece, dest)
+                else:
+                    layer_strip = Image.new("RGBA", strip.size, (0,0,0,0))
+                    layer_strip.paste(piece, dest, piece)
+                    strip.alpha_composite(layer_strip)
+            writer.write_rows(strip.tobytes())
+            # Cumulative rounding keeps thumbnail rows aligned with canvas rows
+            t0, t1 = y0 * thumb_size // height, y1 * thumb_size // height
+            if t1 > t0:
+                thumb.paste(strip.resize((thumb_size, t1 - t0), Image.BOX), (0, t0))
+        writer.close()
+    return thumb
+
 def make_attributes(chosen_meta: "OrderedDict[str, Tuple[str,str]]") -> List[Dict[str,str]]:
     attrs = []
     for layer, (trait_name, rarity) in chosen_meta.items():
@@ -232,6 +432,30 @@ def make_attributes(chosen_meta: "OrderedDict[str, Tuple[str,str]]") -> List[Dic
         })
     return attrs
 
+def render_edition(job: Dict) -> Dict:
+    """
+    Worker entry point: compose one edition, encode it and write the PNG.
+    Runs in a worker process when --workers > 1, so it only takes/returns plain data.
+    """
+    render_files = OrderedDict((layer, Path(p)) for layer, p in job["render_files"])
+    img_path = Path(job["img_path"])
+    result = {"edition": job["edition"], "image": str(img_path)}
+    if job.get("tile_height"):
+        thumb = compose_image_tiled(render_files, img_path, enforce_size=job["enforce_size"], strip_height=job["tile_height"])
+        if job.get("phash"):
+            result["phash"] = perceptual_hash(thumb)
+        return result
+    img = compose_image(render_files, enforce_size=job["enforce_size"])
+    if job.get("phash"):
+        result["phash"] = perceptual_hash(img)
+    if job["png_mode"] == "default":
+        img.save(img_path)
+        return result
+    data, method, baseline = optimize_png(img, job["png_mode"], job["min_psnr"])
+    img_path.write_bytes(data)
+    result.update({"png_method": method, "baseline_bytes": baseline, "bytes": len(data)})
+    return result
+
 def parse_layer_order(arg: Optional[str]) -> List[str]:
     if not arg:
         return DEFAULT_LAYER_ORDER
@@ -258,6 +482,16 @@ def main():
     ap.add_argument("--max-retries", type=int, default=100000, help="Max attempts to find unique combos")
     ap.add_argument("--image-width", type=int, default=None, help="Force output image width (optional)")
     ap.add_argument("--image-height", type=int, default=None, help="Force output image height (optional)")
+    ap.add_argument("--preview-scale", type=int, choices=PYRAMID_SCALES, default=None, help="Fast preview: composite from cached 1/N trait assets (2, 4 or 8)")
+    ap.add_argument("--workers", type=int, default=1, help="Worker processes for compositing/encoding (1 = in-process)")
+    ap.add_argument("--png-mode", choices=PNG_MODES, default="default", help="PNG encoding: default, lossless (smallest exact) or quantize (allow lossy palette)")
+    ap.add_argument("--tile-height", type=int, default=0, help="Composite in strips of this many rows and stream to PNG (bounded memory for large canvases; 0 = off)")
+    ap.add_argument("--visual-dupes", choices=["off", "report", "reject"], default="off", help="Perceptual duplicate check (adds a 'phash' manifest column): off, report to visual_duplicates.csv, or reject and resample")
+    ap.add_argument("--visual-dupe-distance", type=int, default=2, help=f"Max perceptual hash distance (bits of {HASH_BITS}) treated as a duplicate")
+    ap.add_argument("--png-min-psnr", type=float, default=DEFAULT_MIN_PSNR, help="Minimum PSNR (dB) for --png-mode quantize to accept a quantized palette")
+    ap.add_argument("--metadata-style", choices=METADATA_STYLES, default="pretty", help="Metadata JSON layout: pretty (indented), compact, or canonical (minified, sorted keys)")
+    ap.add_argument("--metadata-fsync", action="store_true", help="fsync each metadata file and write it atomically (slower, survives power loss)")
+    ap.add_argument("--ipfs-car", type=Path, default=None, help="After generation, compute IPFS CIDs locally, point metadata images at ipfs://<IMAGES_CID>/ and pack everything into this CAR file")
     args = ap.parse_args()
 
     if args.seed is not None:
@@ -268,30 +502,9 @@ def main():
     else:
         df = load_catalog(args.csv)
 
-    # Parse rarity weight mapping
-    rarity_weights = {}
-    if args.rarity_weights:
-        for pair in args.rarity_weights.split(","):
-            if "=" in pair:
-                k, v = pair.split("=", 1)
-                try:
-                    rarity_weights[k.strip()] = float(v.strip())
-                except ValueError:
-                    print(f"Warning: invalid rarity weight for '{pair}', skipping")
-
-    tables = build_layer_tables(df)
-
-    # Apply rarity weight mapping (override weights)
-    if rarity_weights:
-        for layer, opts in tables.items():
-            new_opts = []
-            for trait, path, weight, rarity in opts:
-                rw = rarity_weights.get(rarity, rarity_weights.get(rarity.lower(), None))
-                if rw is not None:
-                    new_opts.append((trait, path, float(rw), rarity))
-                else:
-                    new_opts.append((trait, path, weight, rarity))
-            tables[layer] = new_opts
+    # Parse rarity weight mapping and apply it (overrides catalog weights)
+    rarity_weights = parse_rarity_weights(args.rarity_weights)
+    tables = apply_rarity_weights(build_layer_tables(df), rarity_weights)
 
     def vprint(*a, **k):
         if args.verbose:
@@ -302,14 +515,12 @@ def main():
         missing = []
         for layer, opts in tables.items():
             for trait, path, weight, rarity in opts:
-                s = str(path)
-                s = s.replace("\\", "/")
-                s = re.sub(r'^(https?):/+', r"\1://", s)
-                p = Path(s)
-                if p.exists():
+                s = resolve_asset_path(path)
+                # present() treats URLs as available; only local files may skip the check here
+                if not is_remote(s) and available.get(s):
                     vprint(f"OK: {layer} -> {s}")
                     continue
-                if re.match(r'^[a-zA-Z]+://', s):
+                if is_remote(s):
                     try:
                         with urllib.request.urlopen(s) as resp:
                             if resp.status >= 400:
@@ -330,6 +541,9 @@ def main():
         if L not in tables:
             vprint(f"Warning: layer '{L}' not present in CSV (will be skipped if empty)")
 
+    # Local files are checked against the persistent asset index (only changed files are re-read)
+    with AssetIndex() as asset_index:
+        available = asset_index.present([resolve_asset_path(p) for opts in tables.values() for _, p, _, _ in opts])
     missing = preflight_assets(tables)
     if missing:
         vprint("Preflight found missing assets:")
@@ -350,25 +564,29 @@ def main():
     enforce_size = None
     if args.image_width and args.image_height:
         enforce_size = (int(args.image_width), int(args.image_height))
+    if args.tile_height and args.png_mode != "default":
+        print("Warning: --png-mode is ignored for tiled renders (--tile-height); images are streamed directly")
+    if enforce_size and args.preview_scale:
+        enforce_size = (max(1, enforce_size[0] // args.preview_scale), max(1, enforce_size[1] // args.preview_scale))
 
     used_signatures = set()
     manifest_rows = []
+    png_rows = []
+    dupe_rows = []
+    phash_index = BKTree()
+    retry_editions = deque()  # editions whose render was rejected as a visual duplicate
+    edition_meta = {}         # edition -> chosen_meta, to rewrite metadata if the edition is renumbered
     edition = 1
     attempts = 0
 
     # Pre-filter options to those that exist or are URLs
-    usable_tables = {}
-    for layer, opts in tables.items():
-        usable = []
-        for trait, path, weight, rarity in opts:
-            s = str(path).replace('\\','/')
-            p = Path(s)
-            if p.exists() or re.match(r'^[a-zA-Z]+://', s):
-                usable.append((trait, s, float(weight), rarity))
-            else:
-                vprint(f"Skipping missing file for layer {layer}: {s}")
-        if usable:
-            usable_tables[layer] = usable
+    usable_tables = filter_usable_tables(tables, on_missing=lambda layer, s: vprint(f"Skipping missing file for layer {layer}: {s}"),
+                                         available=available)
+
+    pyramid = {}
+    if args.preview_scale:
+        pyramid = build_asset_pyramid(usable_tables)
+        vprint(f"Preview mode: compositing from 1/{args.preview_scale} assets ({len(pyramid)} cached)")
 
     # If any layer in layer_order has no usable entries, generation will fail
     for L in layer_order:
@@ -376,71 +594,199 @@ def main():
             print(f"Error: no usable assets found for layer '{L}'. Cannot generate images.")
             raise SystemExit(1)
 
-    while edition <= args.supply and attempts < args.max_retries:
-        attempts += 1
-        chosen_files = OrderedDict()
-        chosen_meta = OrderedDict()
-        try:
-            for layer in layer_order:
-                opts = usable_tables[layer]
-                name, path_str, rarity = choose_trait([(t, Path(p), w, r) for (t,p,w,r) in opts])
-                chosen_files[layer] = Path(path_str)
-                chosen_meta[layer] = (name, rarity)
-
-            sig = combo_signature({k: v[0] for k,v in chosen_meta.items()})
-            if sig in used_signatures:
-                # duplicate, retry
-                continue
-
-            # Compose and save image
-            img = compose_image(chosen_files, enforce_size=enforce_size)
-            img_path = out_images.joinpath(f"{edition}.png")
-            img.save(img_path)
-
-            # Build metadata
-            image_ref = (args.images_suburi.rstrip('/') + '/' + f"{edition}.png") if args.images_suburi else (args.base_uri.rstrip('/') + '/' + f"images/{edition}.png")
-            meta = {
-                "name": f"{args.name_prefix}{edition}",
-                "description": args.description,
-                "image": image_ref,
-                "attributes": make_attributes(chosen_meta)
-            }
-            meta_path = out_meta.joinpath(f"{edition}.json")
-            with open(meta_path, 'w', encoding='utf-8') as mf:
-                json.dump(meta, mf, indent=2)
-
-            # Build enriched manifest row with per-layer trait/file/rarity
-            row = {
+    # Weighted sampling can run out of --max-retries long before the raw combination count suggests
+    forecast = forecast_tables(usable_tables, layer_order, args.supply, args.max_retries,
+                               exact=False, max_groups=PRECHECK_MAX_GROUPS)
+    if forecast is None:
+        vprint(f"Skipping the uniqueness forecast: over {PRECHECK_MAX_GROUPS:,} probability groups")
+    warning = retry_warning(forecast)
+    if warning:
+        print(f"Warning: {warning}; see combination_forecast.py")
+
+    def render_metadata(edition, chosen_meta):
+        image_ref = (args.images_suburi.rstrip('/') + '/' + f"{edition}.png") if args.images_suburi else (args.base_uri.rstrip('/') + '/' + f"images/{edition}.png")
+        return meta_template.render(edition, image_ref, make_attributes(chosen_meta))
+
+    def compact_editions(holes):
+        """Move the highest editions into editions left empty by rejected renders; returns {old: new}."""
+        rows = {r['edition']: r for r in manifest_rows}
+        renumbered = {}
+        for hole in sorted(holes):
+            last = max(rows, default=0)
+            if last < hole:
+                break
+            row = rows.pop(last)
+            img_path = out_images.joinpath(f"{hole}.png")
+            Path(row['image']).replace(img_path)
+            Path(row['metadata']).unlink(missing_ok=True)
+            meta_path = out_meta.joinpath(f"{hole}.json")
+            write_bytes(meta_path, render_metadata(hole, edition_meta.pop(last)), fsync=args.metadata_fsync, atomic=args.metadata_fsync)
+            row.update({'edition': hole, 'image': str(img_path), 'metadata': str(meta_path)})
+            rows[hole] = row
+            renumbered[last] = hole
+        for r in png_rows:
+            r['edition'] = renumbered.get(r['edition'], r['edition'])
+        for r in dupe_rows:
+            r['duplicate_of'] = renumbered.get(r['duplicate_of'], r['duplicate_of'])
+        return renumbered
+
+    def finalize(edition, sig, chosen_files, chosen_meta, result):
+        """Write metadata and manifest rows once an edition's image has been rendered."""
+        img_path = Path(result["image"])
+        phash = result.get("phash")
+        if phash is not None:
+            matches = phash_index.search(phash, args.visual_dupe_distance)
+            if matches:
+                distance, other = matches[0]
+                dupe_rows.append({'edition': edition, 'duplicate_of': other, 'distance': distance,
+                                  'signature': sig, 'action': args.visual_dupes})
+                if args.visual_dupes == "reject":
+                    vprint(f"Edition {edition} looks like edition {other} (distance {distance}); resampling")
+                    img_path.unlink(missing_ok=True)
+                    retry_editions.append(edition)
+                    return
+            phash_index.add(phash, edition)
+        # Build metadata
+        meta_path = out_meta.joinpath(f"{edition}.json")
+        meta_writer.write(meta_path, render_metadata(edition, chosen_meta))
+        edition_meta[edition] = chosen_meta
+
+        # Build enriched manifest row with per-layer trait/file/rarity
+        row = {
+            'edition': edition,
+            'signature': sig,
+            'image': str(img_path),
+            'metadata': str(meta_path)
+        }
+        if phash is not None:
+            row['phash'] = format_hash(phash)
+        # Add per-layer columns: for each layer add '<layer>_trait', '<layer>_file', '<layer>_rarity'
+        for layer, (tname, rarity) in chosen_meta.items():
+            key_trait = f"{layer}_trait"
+            key_file = f"{layer}_file"
+            key_rarity = f"{layer}_rarity"
+            row[key_trait] = tname
+            row[key_file] = str(chosen_files[layer])
+            row[key_rarity] = rarity
+        manifest_rows.append(row)
+        if "bytes" in result:
+            png_rows.append({
                 'edition': edition,
-                'signature': sig,
-                'image': str(img_path),
-                'metadata': str(meta_path)
-            }
-            # Add per-layer columns: for each layer add '<layer>_trait', '<layer>_file', '<layer>_rarity'
-            for layer, (tname, rarity) in chosen_meta.items():
-                key_trait = f"{layer}_trait"
-                key_file = f"{layer}_file"
-                key_rarity = f"{layer}_rarity"
-                row[key_trait] = tname
-                row[key_file] = str(chosen_files[layer])
-                row[key_rarity] = rarity
-            manifest_rows.append(row)
-            used_signatures.add(sig)
-            if args.verbose:
-                print(f"Created edition {edition} (sig={sig})")
-            edition += 1
+                'baseline_bytes': result["baseline_bytes"],
+                'bytes': result["bytes"],
+                'saved_bytes': result["baseline_bytes"] - result["bytes"],
+                'method': result["png_method"],
+            })
+        if args.verbose:
+            print(f"Created edition {edition} (sig={sig})")
 
+    def drain_one():
+        edition_done, sig, chosen_files, chosen_meta, pending = in_flight.popleft()
+        try:
+            result = pending.result() if isinstance(pending, Future) else pending
         except FileNotFoundError as e:
             print(f"Asset error during generation: {e}")
             raise
-
-    if edition <= args.supply:
-        print(f"Stopped after {attempts} attempts; produced {edition-1} unique editions.")
+        finalize(edition_done, sig, chosen_files, chosen_meta, result)
+
+    # Editions are rendered in order; at most max_in_flight are queued on the pool at once
+    executor = ProcessPoolExecutor(max_workers=args.workers) if args.workers > 1 else None
+    max_in_flight = max(1, args.workers * 2)
+    in_flight = deque()
+    meta_template = MetadataTemplate(args.name_prefix, args.description, style=args.metadata_style)
+    meta_writer = MetadataWriter(fsync=args.metadata_fsync)
+    try:
+        while True:
+            while (retry_editions or edition <= args.supply) and attempts < args.max_retries:
+                attempts += 1
+                chosen_files = OrderedDict()
+                chosen_meta = OrderedDict()
+                for layer in layer_order:
+                    opts = usable_tables[layer]
+                    name, path_str, rarity = choose_trait([(t, Path(p), w, r) for (t,p,w,r) in opts])
+                    chosen_files[layer] = Path(path_str)
+                    chosen_meta[layer] = (name, rarity)
+
+                sig = combo_signature({k: v[0] for k,v in chosen_meta.items()})
+                if sig in used_signatures:
+                    # duplicate, retry
+                    continue
+                used_signatures.add(sig)
+
+                # Rejected visual duplicates get their edition number back before new ones are issued
+                target = retry_editions.popleft() if retry_editions else edition
+                render_files = chosen_files
+                if args.preview_scale:
+                    render_files = OrderedDict(
+                        (layer, pyramid[str(p)][args.preview_scale] if str(p) in pyramid else p)
+                        for layer, p in chosen_files.items()
+                    )
+                job = {
+                    "edition": target,
+                    "render_files": [(layer, str(p)) for layer, p in render_files.items()],
+                    "enforce_size": enforce_size,
+                    "img_path": str(out_images.joinpath(f"{target}.png")),
+                    "png_mode": args.png_mode,
+                    "min_psnr": args.png_min_psnr,
+                    "tile_height": args.tile_height,
+                    "phash": args.visual_dupes != "off",
+                }
+                if executor:
+                    pending = executor.submit(render_edition, job)
+                else:
+                    try:
+                        pending = render_edition(job)
+                    except FileNotFoundError as e:
+                        print(f"Asset error during generation: {e}")
+                        raise
+                in_flight.append((target, sig, chosen_files, chosen_meta, pending))
+                if target == edition:
+                    edition += 1
+                while len(in_flight) >= max_in_flight:
+                    drain_one()
+            # Draining can reject editions, which sends us back to sampling
+            if not in_flight:
+                break
+            drain_one()
+    finally:
+        if executor:
+            executor.shutdown(wait=True, cancel_futures=True)
+        meta_writer.close()
+
+    # --max-retries ran out before every rejected edition was resampled
+    renumbered = compact_editions(retry_editions) if retry_editions else {}
+    produced = len(manifest_rows)
+    manifest_rows.sort(key=lambda r: r['edition'])
+    if produced < args.supply:
+        print(f"Stopped after {attempts} attempts; produced {produced} unique editions.")
     else:
         print(f"Successfully generated {args.supply} editions.")
+    if retry_editions:
+        moves = ", ".join(f"{old}->{new}" for old, new in sorted(renumbered.items()))
+        print(f"Error: --max-retries ran out with {len(retry_editions)} rejected visual duplicate(s) not resampled; "
+              f"editions renumbered to stay 1..{produced}" + (f" ({moves})" if moves else ""))
+
+    if dupe_rows:
+        dupe_report = Path(args.outdir) / 'visual_duplicates.csv'
+        with open(dupe_report, 'w', newline='', encoding='utf-8') as dupe_fp:
+            writer = csv.DictWriter(dupe_fp, fieldnames=['edition', 'duplicate_of', 'distance', 'signature', 'action'])
+            writer.writeheader()
+            writer.writerows(dupe_rows)
+        verb = "rejected and resampled" if args.visual_dupes == "reject" else "found"
+        print(f"Visual duplicates {verb}: {len(dupe_rows)} (see {dupe_report})")
+
+    if png_rows:
+        png_report = Path(args.outdir) / 'png_sizes.csv'
+        with open(png_report, 'w', newline='', encoding='utf-8') as pf:
+            writer = csv.DictWriter(pf, fieldnames=['edition', 'baseline_bytes', 'bytes', 'saved_bytes', 'method'])
+            writer.writeheader()
+            writer.writerows(png_rows)
+        baseline_total = sum(r['baseline_bytes'] for r in png_rows)
+        total = sum(r['bytes'] for r in png_rows)
+        saved_pct = (100.0 * (baseline_total - total) / baseline_total) if baseline_total else 0.0
+        print(f"PNG bytes: {total:,} vs {baseline_total:,} default ({saved_pct:.1f}% saved); per-edition report: {png_report}")
 
     # Write manifest CSV
-    import csv
     manifest_path = Path(args.outdir) / 'manifest.csv'
     # Determine all fieldnames (base fields + per-layer fields present in rows)
     base_fields = ['edition', 'signature', 'image', 'metadata']
@@ -459,6 +805,14 @@ def main():
         for r in manifest_rows:
             writer.writerow(r)
 
+    if args.ipfs_car:
+        from ipfs_car import build_collection_car
+
+        build_collection_car(out_images, out_meta, args.ipfs_car, workers=max(1, args.workers))
+
+    if retry_editions:
+        raise SystemExit(1)
+
 if __name__ == '__main__':
     main()
 
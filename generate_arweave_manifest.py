@@ -5,63 +5,40 @@ Creates a manifest.json file that maps paths to Arweave transaction IDs
 for use with ar:// URLs in the smart contract.
 """
 
+import argparse
 import json
-import csv
 from pathlib import Path
 
-def create_arweave_manifest():
+from manifest_writer import MANIFEST_STYLES, format_size, write_manifest
+
+def manifest_template_paths(supply=10000):
+    """Placeholder (path, txid) pairs in path_sort_key order: 1..supply, then the collection files."""
+    for i in range(1, supply + 1):
+        yield str(i), f"METADATA_{i}_TXID_TO_BE_REPLACED"
+        if i % 1000 == 0:
+            print(f"   ✅ Added {i} metadata paths...")
+    # Collection homepage (optional), contract and unrevealed metadata
+    yield "contract.json", "CONTRACT_METADATA_TXID_TO_BE_REPLACED"
+    yield "index.html", "INDEX_TXID_TO_BE_REPLACED"
+    yield "unrevealed.json", "UNREVEALED_METADATA_TXID_TO_BE_REPLACED"
+
+def create_arweave_manifest(manifest_file="arweave_manifest_complete.json", style="pretty", supply=10000):
     """
     Create an Arweave manifest file that maps NFT metadata paths to transaction IDs.
     The manifest allows accessing files via ar://MANIFEST_TXID/path structure.
+    Entries are streamed to disk (manifest_writer.py) instead of built in memory.
     """
     
     print("🔄 Generating Arweave Manifest for Skunk Squad NFT Collection...")
     print("=" * 60)
     
-    # Initialize manifest structure
-    manifest = {
-        "manifest": "arweave/paths",
-        "version": "0.1.0",
-        "index": {
-            "path": "index.html"
-        },
-        "paths": {}
-    }
-    
-    # Add index file (optional - collection homepage)
-    manifest["paths"]["index.html"] = {
-        "id": "INDEX_TXID_TO_BE_REPLACED"
-    }
-    
-    # Add contract metadata
-    manifest["paths"]["contract.json"] = {
-        "id": "CONTRACT_METADATA_TXID_TO_BE_REPLACED"
-    }
-    
-    # Add unrevealed metadata
-    manifest["paths"]["unrevealed.json"] = {
-        "id": "UNREVEALED_METADATA_TXID_TO_BE_REPLACED"
-    }
+    print(f"📝 Adding metadata paths for NFTs 1-{supply}...")
+    paths, size = write_manifest(manifest_file, manifest_template_paths(supply), style, index="index.html")
     
-    # Add all NFT metadata files (1-10000)
-    print("📝 Adding metadata paths for NFTs 1-10000...")
-    for i in range(1, 10001):
-        manifest["paths"][str(i)] = {
-            "id": f"METADATA_{i}_TXID_TO_BE_REPLACED"
-        }
-        
-        if i % 1000 == 0:
-            print(f"   ✅ Added {i} metadata paths...")
-    
-    # Save manifest
-    manifest_file = "arweave_manifest_complete.json"
-    with open(manifest_file, 'w') as f:
-        json.dump(manifest, f, indent=2)
-    
-    print(f"\n✅ Manifest created: {manifest_file}")
-    print(f"📊 Total paths: {len(manifest['paths'])}")
+    print(f"\n✅ Manifest created: {manifest_file} ({format_size(size)})")
+    print(f"📊 Total paths: {paths}")
     print(f"   • Collection metadata: 3 files")
-    print(f"   • NFT metadata: 10,000 files")
+    print(f"   • NFT metadata: {supply:,} files")
     
     # Create usage instructions
     create_usage_instructions()
@@ -125,95 +102,26 @@ def create_usage_instructions():
     print("📋 Usage instructions created: arweave_manifest_instructions.json")
 
 def create_manifest_update_script():
-    """Create a script to update the manifest with real transaction IDs"""
-    
-    script_content = '''#!/usr/bin/env python3
-"""
-Update Arweave Manifest with Real Transaction IDs
-Run this after uploading files to Arweave to replace placeholder TXIDs.
-"""
-
-import json
-import csv
-from pathlib import Path
-
-def update_manifest_with_txids(manifest_file, export_csv):
-    """Update manifest with real transaction IDs from ArDrive export"""
-    
-    print("🔄 Updating manifest with real transaction IDs...")
-    
-    # Load manifest
-    with open(manifest_file, 'r') as f:
-        manifest = json.load(f)
-    
-    # Load transaction IDs from export CSV
-    txid_map = {}
-    with open(export_csv, 'r') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            filename = row['File Name']
-            txid = row['Data Transaction ID']
-            txid_map[filename] = txid
-    
-    print(f"📊 Loaded {len(txid_map)} transaction IDs from export")
+    """Point at update_manifest.py, which fills in real transaction IDs (it ships with the repo)."""
     
-    # Update manifest paths
-    updated = 0
-    for path, data in manifest["paths"].items():
-        if path == "index.html":
-            # Update if you have an index.html file
-            continue
-        elif path == "contract.json":
-            if "contract.json" in txid_map:
-                data["id"] = txid_map["contract.json"]
-                updated += 1
-        elif path == "unrevealed.json":
-            if "unrevealed.json" in txid_map:
-                data["id"] = txid_map["unrevealed.json"]
-                updated += 1
-        else:
-            # NFT metadata files
-            metadata_filename = f"{path}.json"
-            if metadata_filename in txid_map:
-                data["id"] = txid_map[metadata_filename]
-                updated += 1
-    
-    # Save updated manifest
-    output_file = "arweave_manifest_final.json"
-    with open(output_file, 'w') as f:
-        json.dump(manifest, f, indent=2)
-    
-    print(f"✅ Updated {updated} transaction IDs")
-    print(f"💾 Final manifest saved: {output_file}")
-    print("🚀 Ready to upload to Arweave!")
-    
-    return output_file
-
-if __name__ == "__main__":
-    # Update this with your actual export CSV file
-    export_csv = "arweave_export_final.csv"
-    manifest_file = "arweave_manifest_complete.json"
-    
-    if Path(export_csv).exists() and Path(manifest_file).exists():
-        update_manifest_with_txids(manifest_file, export_csv)
+    if Path(__file__).with_name("update_manifest.py").exists():
+        print("🔧 Manifest update script: update_manifest.py")
     else:
-        print("❌ Required files not found:")
-        print(f"   • Manifest: {manifest_file}")
-        print(f"   • Export CSV: {export_csv}")
-'''
-    
-    with open("update_manifest.py", 'w', encoding='utf-8') as f:
-        f.write(script_content)
-    
-    print("🔧 Manifest update script created: update_manifest.py")
+        print("⚠️  update_manifest.py not found; restore it from the repository to fill in transaction IDs")
 
 def main():
     """Main function"""
+    ap = argparse.ArgumentParser(description="Create the placeholder Arweave path manifest")
+    ap.add_argument("--out", default="arweave_manifest_complete.json", help="Manifest file to write")
+    ap.add_argument("--style", choices=MANIFEST_STYLES, default="pretty", help="minified drops all whitespace (smaller upload)")
+    ap.add_argument("--supply", type=int, default=10000, help="Number of token metadata paths")
+    args = ap.parse_args()
+
     print("🦨 Skunk Squad NFT - Arweave Manifest Generator")
     print("=" * 50)
     print()
     
-    manifest_file = create_arweave_manifest()
+    manifest_file = create_arweave_manifest(args.out, args.style, args.supply)
     create_manifest_update_script()
     
     print("\n🎯 Next Steps:")
@@ -4,13 +4,113 @@ Metadata Generator with Arweave Transaction IDs
 For use after uploading images to ArDrive
 """
 
+import argparse
 import json
 import csv
+import os
+import re
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
-def generate_metadata_from_txids(txid_file="txid_mapping.csv"):
+from metadata_writer import METADATA_STYLES, dumps_metadata, write_bytes
+
+TOKEN_FILE_RE = re.compile(r"^(\d+)\.json$")
+# Tokens per worker task; smaller jobs run in-process
+CHUNK_SIZE = 256
+
+
+def parse_token_spec(spec):
+    """'1-100,250,300-310' → sorted token ids (None for an empty spec)."""
+    if not spec:
+        return None
+    tokens = set()
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        start, _, end = part.partition("-")
+        tokens.update(range(int(start), int(end or start) + 1))
+    return sorted(tokens)
+
+
+def load_txid_map(txid_file):
+    """{token_id: image_txid} from a token_id,image_txid CSV."""
+    txid_map = {}
+    with open(txid_file, 'r', newline='', encoding='utf-8') as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            token_id = int(row['token_id'])
+            txid = row['image_txid'].strip()
+            txid_map[token_id] = txid
+    return txid_map
+
+
+def rewrite_token(token_id, txid, metadata_dir, output_dir, style="pretty"):
+    """
+    Rewrite one token's metadata with its ar:// image. The output is only replaced
+    (atomically) when its bytes would change. Returns 'written', 'unchanged' or 'missing';
+    a malformed source or failed write raises.
+    """
+    try:
+        with open(Path(metadata_dir) / f"{token_id}.json", 'rb') as f:
+            metadata = json.loads(f.read())
+    except FileNotFoundError:
+        return "missing"
+
+    # Update image URL with Arweave transaction ID
+    if txid:
+        metadata["image"] = f"ar://{txid}"
+
+        # Also update external_url if it exists
+        if "external_url" in metadata:
+            base_url = metadata["external_url"].split("/token/")[0]
+            metadata["external_url"] = f"{base_url}/token/{token_id}"
+
+    data = dumps_metadata(metadata, style)
+    output_file = Path(output_dir) / f"{token_id}.json"
+    try:
+        if os.stat(output_file).st_size == len(data) and output_file.read_bytes() == data:
+            return "unchanged"
+    except FileNotFoundError:
+        pass
+    write_bytes(output_file, data, atomic=True)
+    return "written"
+
+
+def _rewrite_chunk(job):
+    """
+    Pool worker: (Counter of outcomes, missing token ids, first written (token_id, txid),
+    (token_id, error) for invalid files) for a chunk. One bad file doesn't stop the chunk.
+    """
+    items, metadata_dir, output_dir, style = job
+    outcomes = Counter()
+    missing = []
+    written = []
+    invalid = []
+    for token_id, txid in items:
+        try:
+            result = rewrite_token(token_id, txid, metadata_dir, output_dir, style)
+        except (OSError, ValueError, AttributeError, TypeError) as e:
+            result = "invalid"
+            invalid.append((token_id, str(e)))
+        outcomes[result] += 1
+        if result == "missing":
+            missing.append(token_id)
+        elif result == "written" and txid and len(written) < 5:
+            written.append((token_id, txid))
+    return outcomes, missing, written, invalid
+
+
+def generate_metadata_from_txids(txid_file="txid_mapping.csv", style="pretty", tokens=None,
+                                 metadata_dir="output/metadata", output_dir="metadata_arweave", workers=None):
     """
     Generate metadata files with Arweave ar:// URLs
+    (style: pretty, compact or canonical, see metadata_writer.py)
+
+    tokens: token ids to process (default: every <id>.json in metadata_dir plus every
+    token in the mapping). Only files whose content changes are rewritten, by a pool
+    of worker processes, so re-running after a partial re-upload is quick.
     
     Expected CSV format:
     token_id,image_txid
@@ -31,58 +131,58 @@ def generate_metadata_from_txids(txid_file="txid_mapping.csv"):
         return False
         
     # Load transaction ID mapping
-    txid_map = {}
-    with open(txid_file, 'r') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            token_id = int(row['token_id'])
-            txid = row['image_txid'].strip()
-            txid_map[token_id] = txid
-            
+    txid_map = load_txid_map(txid_file)
     print(f"📊 Loaded {len(txid_map)} transaction IDs")
     
     # Create output directory
-    output_dir = Path("metadata_arweave")
+    metadata_dir = Path(metadata_dir)
+    output_dir = Path(output_dir)
     output_dir.mkdir(exist_ok=True)
-    
+
+    if tokens is None:
+        on_disk = set()
+        if metadata_dir.is_dir():
+            with os.scandir(metadata_dir) as it:
+                on_disk = {int(m.group(1)) for m in (TOKEN_FILE_RE.match(e.name) for e in it) if m}
+        tokens = sorted(on_disk | set(txid_map))
+    items = [(token_id, txid_map.get(token_id)) for token_id in tokens]
+
+    no_txid = [token_id for token_id, txid in items if not txid]
+    for token_id in no_txid[:10]:
+        print(f"   ⚠️ NFT #{token_id}: No transaction ID found")
+    if len(no_txid) > 10:
+        print(f"   ⚠️ ... and {len(no_txid) - 10} more without a transaction ID")
+
     # Process each metadata file
-    metadata_dir = Path("output/metadata")
-    updated_count = 0
-    
-    for i in range(1, 10001):
-        original_file = metadata_dir / f"{i}.json"
-        
-        if not original_file.exists():
-            print(f"⚠️ Original metadata missing: {i}.json")
-            continue
-            
-        # Load original metadata
-        with open(original_file, 'r') as f:
-            metadata = json.load(f)
-            
-        # Update image URL with Arweave transaction ID
-        if i in txid_map:
-            txid = txid_map[i]
-            metadata["image"] = f"ar://{txid}"
-            
-            # Also update external_url if it exists
-            if "external_url" in metadata:
-                base_url = metadata["external_url"].split("/token/")[0]
-                metadata["external_url"] = f"{base_url}/token/{i}"
-                
-            updated_count += 1
-            
-            if updated_count <= 5:  # Show first 5 as examples
-                print(f"   📝 NFT #{i}: ar://{txid}")
-        else:
-            print(f"   ⚠️ NFT #{i}: No transaction ID found")
-            
-        # Save updated metadata
-        output_file = output_dir / f"{i}.json"
-        with open(output_file, 'w') as f:
-            json.dump(metadata, f, indent=2)
-            
-    print(f"\n✅ Generated {updated_count} metadata files with Arweave URLs")
+    jobs = [(items[i:i + CHUNK_SIZE], str(metadata_dir), str(output_dir), style) for i in range(0, len(items), CHUNK_SIZE)]
+    outcomes = Counter()
+    missing = []
+    written = []
+    invalid = []
+    if len(jobs) > 1 and workers != 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_rewrite_chunk, jobs))
+    else:
+        results = [_rewrite_chunk(job) for job in jobs]
+    for chunk_outcomes, chunk_missing, chunk_written, chunk_invalid in results:
+        outcomes.update(chunk_outcomes)
+        missing.extend(chunk_missing)
+        written.extend(chunk_written)
+        invalid.extend(chunk_invalid)
+
+    for token_id, txid in written[:5]:  # Show first 5 as examples
+        print(f"   📝 NFT #{token_id}: ar://{txid}")
+
+    for token_id in missing[:10]:
+        print(f"⚠️ Original metadata missing: {token_id}.json")
+    if len(missing) > 10:
+        print(f"⚠️ ... and {len(missing) - 10} more missing")
+    for token_id, error in invalid[:10]:
+        print(f"❌ Could not rewrite {token_id}.json: {error}")
+    if len(invalid) > 10:
+        print(f"❌ ... and {len(invalid) - 10} more invalid")
+    print(f"\n✅ {len(items)} tokens: {outcomes['written']} written, {outcomes['unchanged']} unchanged, "
+          f"{outcomes['missing']} missing, {outcomes['invalid']} invalid ({len(no_txid)} without a transaction ID)")
     print(f"📁 Output directory: {output_dir}")
     print("\n📋 Next steps:")
     print("   1. Upload metadata_arweave/ folder to ArDrive")
@@ -107,17 +207,30 @@ def create_sample_txid_file():
     print("📝 Created sample file: txid_mapping_sample.csv")
     print("📋 Edit this file with your real transaction IDs")
 
-if __name__ == "__main__":
+def main():
+    ap = argparse.ArgumentParser(description="Rewrite metadata images to ar://<image_txid>, touching only changed files")
+    ap.add_argument("--txids", default="txid_mapping.csv", help="token_id,image_txid CSV")
+    ap.add_argument("--metadata", default="output/metadata", help="Source metadata folder")
+    ap.add_argument("--out", default="metadata_arweave", help="Output folder")
+    ap.add_argument("--tokens", default=None, help="Token ids/ranges to process, e.g. '1-500,777' (default: all)")
+    ap.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count; 1 = in-process)")
+    ap.add_argument("--style", choices=METADATA_STYLES, default="pretty", help="Metadata JSON layout")
+    args = ap.parse_args()
+
     print("🦨 Skunk Squad NFT - Arweave Metadata Generator")
     print("=" * 50)
     
     # Check if mapping file exists
-    if Path("txid_mapping.csv").exists():
-        generate_metadata_from_txids()
+    if Path(args.txids).exists():
+        generate_metadata_from_txids(args.txids, args.style, parse_token_spec(args.tokens),
+                                     args.metadata, args.out, args.workers)
     else:
         print("📝 No transaction ID mapping found.")
         choice = input("Create sample file? (y/n): ")
         if choice.lower() == 'y':
             create_sample_txid_file()
         else:
-            print("📋 Please create txid_mapping.csv with your transaction IDs")
\ No newline at end of file
+            print("📋 Please create txid_mapping.csv with your transaction IDs")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,440 @@
+#!/usr/bin/env python3
+"""
+Offline IPFS CAR Builder for Skunk Squad Collection
+
+Computes IPFS CIDs locally and packs images + metadata into a single CAR file,
+so metadata can point at final ipfs:// image URIs without a round trip through
+an upload service:
+
+  1. Every image is chunked (256 KiB, raw leaves, balanced DAG like `ipfs add
+     --cid-version 1`) in a process pool; each worker streams its blocks to a
+     fragment file.
+  2. The images directory CID is computed (HAMT-sharded when large).
+  3. Each metadata JSON gets "image": "ipfs://<IMAGES_CID>/<n>.png" (spliced in, so
+     the file keeps its --metadata-style layout), is written back to disk, and is
+     hashed the same way.
+  4. A root directory {images/, metadata/} is built and everything is written to
+     one CARv1 archive (`ipfs dag import`, web3.storage, etc.).
+
+Usage:
+  python ipfs_car.py --images output/images --metadata output/metadata --out output/collection.car
+  python generate.py ... --ipfs-car output/collection.car     (same, right after generation)
+
+Contract baseURI: ipfs://<METADATA_CID>/
+"""
+
+import argparse
+import base64
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from uri_rewriter import set_field
+
+CHUNK_SIZE = 256 * 1024
+MAX_LINKS = 174
+# Directories whose links exceed this size are HAMT-sharded (same threshold as kubo)
+SHARD_THRESHOLD = 256 * 1024
+HAMT_FANOUT = 256
+HAMT_HASH_MURMUR3 = 0x22
+
+CODEC_RAW = 0x55
+CODEC_DAG_PB = 0x70
+SHA2_256 = 0x12
+
+# UnixFS Data.Type
+UNIXFS_DIRECTORY = 1
+UNIXFS_FILE = 2
+UNIXFS_HAMT_SHARD = 5
+
+
+# --- encoding helpers -------------------------------------------------------
+
+def varint(n):
+    out = bytearray()
+    while True:
+        byte = n & 0x7F
+        n >>= 7
+        if n:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def pb_varint_field(field, value):
+    return varint(field << 3) + varint(value)
+
+
+def pb_bytes_field(field, value):
+    return varint((field << 3) | 2) + varint(len(value)) + value
+
+
+def make_cid(codec, block):
+    digest = hashlib.sha256(block).digest()
+    return varint(1) + varint(codec) + bytes([SHA2_256, len(digest)]) + digest
+
+
+def cid_to_str(cid):
+    """CIDv1 in multibase base32 (the 'bafy…'/'bafk…' form)."""
+    return "b" + base64.b32encode(cid).decode("ascii").lower().rstrip("=")
+
+
+def unixfs_data(kind, filesize=None, blocksizes=(), data=None, hash_type=None, fanout=None):
+    out = pb_varint_field(1, kind)
+    if data is not None:
+        out += pb_bytes_field(2, data)
+    if filesize is not None:
+        out += pb_varint_field(3, filesize)
+    for size in blocksizes:
+        out += pb_varint_field(4, size)
+    if hash_type is not None:
+        out += pb_varint_field(5, hash_type)
+    if fanout is not None:
+        out += pb_varint_field(6, fanout)
+    return out
+
+
+def pb_node(links, data):
+    """dag-pb PBNode: Links (field 2) first, then Data (field 1). links = [(cid, name, tsize)]."""
+    out = b""
+    for cid, name, tsize in links:
+        link = pb_bytes_field(1, cid) + pb_bytes_field(2, name.encode("utf-8")) + pb_varint_field(3, tsize)
+        out += pb_bytes_field(2, link)
+    return out + pb_bytes_field(1, data)
+
+
+def car_section(cid, block):
+    return varint(len(cid) + len(block)) + cid + block
+
+
+def car_header(root_cid):
+    """dag-cbor {"roots": [CID], "version": 1} (keys in canonical length-first order)."""
+    cid_bytes = b"\x00" + root_cid  # tag 42 payload is the CID with the identity multibase prefix
+    if len(cid_bytes) < 256:
+        cid_cbor = b"\xd8\x2a\x58" + bytes([len(cid_bytes)]) + cid_bytes
+    else:
+        cid_cbor = b"\xd8\x2a\x59" + len(cid_bytes).to_bytes(2, "big") + cid_bytes
+    header = b"\xa2" + b"\x65roots" + b"\x81" + cid_cbor + b"\x67version" + b"\x01"
+    return varint(len(header)) + header
+
+
+# --- murmur3 (x64, 128-bit; first 64 bits) for HAMT bucket selection ---------
+
+def _rotl64(x, r):
+    return ((x << r) | (x >> (64 - r))) & 0xFFFFFFFFFFFFFFFF
+
+
+def _fmix64(k):
+    k ^= k >> 33
+    k = (k * 0xFF51AFD7ED558CCD) & 0xFFFFFFFFFFFFFFFF
+    k ^= k >> 33
+    k = (k * 0xC4CEB9FE1A85EC53) & 0xFFFFFFFFFFFFFFFF
+    k ^= k >> 33
+    return k
+
+
+def murmur3_64(data, seed=0):
+    """Big-endian bytes of the first half of MurmurHash3_x64_128 (go-unixfs HAMT hash)."""
+    mask = 0xFFFFFFFFFFFFFFFF
+    c1, c2 = 0x87C37B91114253D5, 0x4CF5AD432745937F
+    h1 = h2 = seed
+    length = len(data)
+    nblocks = length // 16
+    for i in range(nblocks):
+        k1 = int.from_bytes(data[i * 16:i * 16 + 8], "little")
+        k2 = int.from_bytes(data[i * 16 + 8:i * 16 + 16], "little")
+        k1 = (_rotl64((k1 * c1) & mask, 31) * c2) & mask
+        h1 ^= k1
+        h1 = (_rotl64(h1, 27) + h2) & mask
+        h1 = (h1 * 5 + 0x52DCE729) & mask
+        k2 = (_rotl64((k2 * c2) & mask, 33) * c1) & mask
+        h2 ^= k2
+        h2 = (_rotl64(h2, 31) + h1) & mask
+        h2 = (h2 * 5 + 0x38495AB5) & mask
+    tail = data[nblocks * 16:]
+    k1 = k2 = 0
+    if len(tail) > 8:
+        k2 = int.from_bytes(tail[8:], "little")
+        k2 = (_rotl64((k2 * c2) & mask, 33) * c1) & mask
+        h2 ^= k2
+    if tail:
+        k1 = int.from_bytes(tail[:8], "little")
+        k1 = (_rotl64((k1 * c1) & mask, 31) * c2) & mask
+        h1 ^= k1
+    h1 ^= length
+    h2 ^= length
+    h1 = (h1 + h2) & mask
+    h2 = (h2 + h1) & mask
+    h1 = _fmix64(h1)
+    h2 = _fmix64(h2)
+    h1 = (h1 + h2) & mask
+    return h1.to_bytes(8, "big")
+
+
+# --- DAG builders -------------------------------------------------------------
+
+def add_file_blocks(data_iter, emit):
+    """
+    Balanced UnixFS file DAG with raw leaves. emit(cid, block) receives every block.
+    Returns (root_cid, tsize, filesize).
+    """
+    leaves = iter(data_iter)
+
+    def new_leaf(chunk):
+        cid = make_cid(CODEC_RAW, chunk)
+        emit(cid, chunk)
+        return cid, len(chunk), len(chunk)
+
+    def commit(children):
+        links = [(cid, "", tsize) for cid, tsize, _ in children]
+        sizes = [fsize for _, _, fsize in children]
+        block = pb_node(links, unixfs_data(UNIXFS_FILE, filesize=sum(sizes), blocksizes=sizes))
+        cid = make_cid(CODEC_DAG_PB, block)
+        emit(cid, block)
+        return cid, len(block) + sum(t for _, t, _ in children), sum(sizes)
+
+    pending = [None]
+
+    def next_chunk():
+        if pending[0] is not None:
+            chunk, pending[0] = pending[0], None
+            return chunk
+        return next(leaves, None)
+
+    def has_more():
+        if pending[0] is None:
+            pending[0] = next(leaves, None)
+        return pending[0] is not None
+
+    def fill(children, depth):
+        while len(children) < MAX_LINKS and has_more():
+            if depth == 1:
+                children.append(new_leaf(next_chunk()))
+            else:
+                children.append(commit(fill([], depth - 1)))
+        return children
+
+    first = next_chunk()
+    root = new_leaf(first if first is not None else b"")
+    depth = 1
+    while has_more():
+        root = commit(fill([root], depth))
+        depth += 1
+    return root
+
+
+def read_chunks(path):
+    with open(path, "rb") as fh:
+        while True:
+            chunk = fh.read(CHUNK_SIZE)
+            if not chunk:
+                return
+            yield chunk
+
+
+def bytes_chunks(data):
+    for i in range(0, len(data), CHUNK_SIZE):
+        yield data[i:i + CHUNK_SIZE]
+
+
+def build_directory(entries, emit):
+    """
+    entries = [(name, cid, tsize)]. Returns (cid, tsize) of a UnixFS directory,
+    HAMT-sharded when a flat node would be larger than SHARD_THRESHOLD.
+    """
+    entries = sorted(entries, key=lambda e: e[0].encode("utf-8"))
+    estimated = sum(len(name.encode("utf-8")) + len(cid) for name, cid, _ in entries)
+    if estimated <= SHARD_THRESHOLD:
+        block = pb_node([(cid, name, tsize) for name, cid, tsize in entries], unixfs_data(UNIXFS_DIRECTORY))
+        cid = make_cid(CODEC_DAG_PB, block)
+        emit(cid, block)
+        return cid, len(block) + sum(t for _, _, t in entries)
+    hashed = [(murmur3_64(name.encode("utf-8")), name, cid, tsize) for name, cid, tsize in entries]
+    return _build_shard(hashed, 0, emit)
+
+
+def _build_shard(entries, level, emit):
+    buckets = {}
+    for entry in entries:
+        buckets.setdefault(entry[0][level], []).append(entry)
+    links = []
+    bitfield = 0
+    for idx in sorted(buckets):
+        bitfield |= 1 << idx
+        prefix = f"{idx:02X}"
+        bucket = buckets[idx]
+        if len(bucket) == 1:
+            _, name, cid, tsize = bucket[0]
+            links.append((cid, prefix + name, tsize))
+        else:
+            child_cid, child_tsize = _build_shard(bucket, level + 1, emit)
+            links.append((child_cid, prefix, child_tsize))
+    data = unixfs_data(
+        UNIXFS_HAMT_SHARD,
+        data=bitfield.to_bytes((bitfield.bit_length() + 7) // 8, "big"),
+        hash_type=HAMT_HASH_MURMUR3,
+        fanout=HAMT_FANOUT,
+    )
+    block = pb_node(links, data)
+    cid = make_cid(CODEC_DAG_PB, block)
+    emit(cid, block)
+    return cid, len(block) + sum(t for _, _, t in links)
+
+
+# --- workers ------------------------------------------------------------------
+
+def _fragment_writer(fragment_path):
+    fh = open(fragment_path, "wb")
+
+    def emit(cid, block):
+        fh.write(car_section(cid, block))
+
+    return fh, emit
+
+
+def hash_image(job):
+    """Worker: hash one file into a CAR fragment. Returns (name, cid, tsize, fragment)."""
+    path, fragment = job
+    fh, emit = _fragment_writer(fragment)
+    with fh:
+        cid, tsize, _ = add_file_blocks(read_chunks(path), emit)
+    return Path(path).name, cid, tsize, fragment
+
+
+def image_name_for(meta_path, image_uri, image_names):
+    """Image file a metadata JSON refers to: the basename of its current URI, else <stem>.png."""
+    if image_uri:
+        candidate = str(image_uri).rstrip("/").rsplit("/", 1)[-1]
+        if candidate in image_names:
+            return candidate
+    return f"{Path(meta_path).stem}.png"
+
+
+def hash_metadata(job):
+    """Worker: point "image" at the images CID, write back if changed, hash into a fragment."""
+    path, fragment, images_cid, image_names = job
+    raw = Path(path).read_bytes()
+    meta = json.loads(raw)
+    changed = False
+    if isinstance(meta, dict) and "image" in meta:
+        image_name = image_name_for(path, meta.get("image"), image_names)
+        uri = f"ipfs://{images_cid}/{image_name}"
+        new = set_field(raw, "image", uri)
+        if new is not None:
+            raw = new
+            tmp = Path(str(path) + ".tmp")
+            tmp.write_bytes(raw)
+            os.replace(tmp, path)
+            changed = True
+    fh, emit = _fragment_writer(fragment)
+    with fh:
+        cid, tsize, _ = add_file_blocks(bytes_chunks(raw), emit)
+    return Path(path).name, cid, tsize, fragment, changed
+
+
+# --- collection CAR -------------------------------------------------------------
+
+def _list_files(directory, suffixes):
+    with os.scandir(directory) as it:
+        return sorted(
+            (e.path for e in it if e.is_file() and Path(e.name).suffix.lower() in suffixes),
+            key=lambda p: Path(p).name,
+        )
+
+
+def _run(jobs, fn, workers):
+    if workers and workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(fn, jobs, chunksize=64))
+    return [fn(job) for job in jobs]
+
+
+def build_collection_car(images_dir, metadata_dir, out_path, workers=None):
+    """
+    Hash images and metadata, rewrite metadata image URIs, write one CAR.
+    Returns {"root": str, "images": str, "metadata": str, "bytes": int}.
+    """
+    workers = workers or os.cpu_count() or 1
+    images_dir, metadata_dir, out_path = Path(images_dir), Path(metadata_dir), Path(out_path)
+    tmpdir = Path(tempfile.mkdtemp(prefix="car_", dir=out_path.parent if out_path.parent.exists() else None))
+    dir_blocks = []
+
+    def emit_dir(cid, block):
+        dir_blocks.append(car_section(cid, block))
+
+    try:
+        image_files = _list_files(images_dir, {".png", ".jpg", ".jpeg", ".webp", ".gif"})
+        print(f"🖼️  Hashing {len(image_files):,} images with {workers} worker(s)...")
+        images = _run([(p, tmpdir / f"i{n}.frag") for n, p in enumerate(image_files)], hash_image, workers)
+        images_cid, images_tsize = build_directory([(name, cid, tsize) for name, cid, tsize, _ in images], emit_dir)
+        images_cid_str = cid_to_str(images_cid)
+        print(f"   ✅ images/ → {images_cid_str}")
+
+        meta_files = _list_files(metadata_dir, {".json"})
+        image_names = frozenset(Path(p).name for p in image_files)
+        print(f"📝 Rewriting + hashing {len(meta_files):,} metadata files...")
+        metas = _run(
+            [(p, tmpdir / f"m{n}.frag", images_cid_str, image_names) for n, p in enumerate(meta_files)],
+            hash_metadata, workers,
+        )
+        rewritten = sum(1 for m in metas if m[4])
+        meta_cid, meta_tsize = build_directory([(name, cid, tsize) for name, cid, tsize, _, _ in metas], emit_dir)
+        meta_cid_str = cid_to_str(meta_cid)
+        print(f"   ✅ metadata/ → {meta_cid_str} ({rewritten:,} image URIs updated)")
+
+        root_cid, _ = build_directory(
+            [("images", images_cid, images_tsize), ("metadata", meta_cid, meta_tsize)], emit_dir
+        )
+
+        # Header, then every fragment (identical files are only stored once), then directory blocks
+        seen = set()
+        with open(out_path, "wb") as out:
+            out.write(car_header(root_cid))
+            for _, cid, _, fragment, *_ in images + metas:
+                if cid in seen:
+                    continue
+                seen.add(cid)
+                with open(fragment, "rb") as fh:
+                    shutil.copyfileobj(fh, out, 1024 * 1024)
+            for section in dir_blocks:
+                out.write(section)
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+    result = {
+        "root": cid_to_str(root_cid),
+        "images": images_cid_str,
+        "metadata": meta_cid_str,
+        "bytes": out_path.stat().st_size,
+    }
+    print(f"\n📦 CAR written: {out_path} ({result['bytes']:,} bytes)")
+    print(f"   • Root CID:     {result['root']}")
+    print(f"   • Images CID:   {result['images']}")
+    print(f"   • Metadata CID: {result['metadata']}")
+    print(f"🔗 Contract baseURI: ipfs://{result['metadata']}/")
+    return result
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Build an IPFS CAR for images + metadata with local CIDs")
+    ap.add_argument("--images", type=Path, default=Path("output/images"), help="Images directory")
+    ap.add_argument("--metadata", type=Path, default=Path("output/metadata"), help="Metadata directory (image URIs are rewritten in place)")
+    ap.add_argument("--out", type=Path, default=Path("output/collection.car"), help="CAR file to write")
+    ap.add_argument("--workers", type=int, default=None, help="Hashing processes (default: CPU count)")
+    args = ap.parse_args()
+
+    for d in (args.images, args.metadata):
+        if not d.is_dir():
+            print(f"❌ Directory not found: {d}")
+            return 1
+    build_collection_car(args.images, args.metadata, args.out, workers=args.workers)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
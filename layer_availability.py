@@ -1,38 +1,34 @@
 #!/usr/bin/env python3
 import csv
-import re
 from pathlib import Path
 from collections import defaultdict
 
+from asset_index import AssetIndex, catalog_assets, is_remote
+
 CSV = Path('traits_catalog.csv')
 if not CSV.exists():
     print(f"ERROR: {CSV} not found")
     raise SystemExit(2)
 
-csv_parent = CSV.resolve().parent
-remote_re = re.compile(r'^[a-zA-Z]+://')
-
 per_layer = defaultdict(lambda: {'total':0,'local':0,'missing':0,'remote':0})
 
-with CSV.open(newline='', encoding='utf-8') as f:
-    reader = csv.DictReader(f)
-    for row in reader:
-        layer = row.get('layer','').strip()
-        raw = (row.get('file') or '').strip()
-        per_layer[layer]['total'] += 1
-        if not raw:
-            per_layer[layer]['missing'] += 1
-            continue
-        if remote_re.match(raw):
-            per_layer[layer]['remote'] += 1
-            continue
-        p = Path(raw)
-        if not p.is_absolute():
-            p = (csv_parent / p).resolve()
-        if p.exists():
-            per_layer[layer]['local'] += 1
-        else:
-            per_layer[layer]['missing'] += 1
+# Paths resolve like generate.py; existence comes from the shared asset index
+rows = catalog_assets(CSV)
+with AssetIndex() as index:
+    available = index.present([resolved for _, _, _, resolved in rows if resolved])
+
+for layer, trait, raw, resolved in rows:
+    per_layer[layer]['total'] += 1
+    if not raw:
+        per_layer[layer]['missing'] += 1
+        continue
+    if is_remote(resolved):
+        per_layer[layer]['remote'] += 1
+        continue
+    if available[resolved]:
+        per_layer[layer]['local'] += 1
+    else:
+        per_layer[layer]['missing'] += 1
 
 # Print per-layer summary
 print('Layer availability summary:')
@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+Manifest Diff / Patch Engine for Skunk Squad Arweave Manifests
+
+update_manifest.py, update_metadata_manifest.py and update_folder_manifest.py used
+to load an export into a dict, walk and rewrite every manifest entry. They now go
+through this engine:
+
+  diff     manifest vs manifest (all paths), or manifest vs export rows, where only
+           the export's rows are looked up in the manifest's {path: txid} index.
+           Either way the result is a patch holding only what changed:
+             added       {path: txid}
+             removed     {path: txid}
+             retargeted  {path: {"from": old txid, "to": new txid}}
+  apply    streams the base manifest through manifest_writer.py, substituting the
+           patch's entries. Every removed/retargeted path must still point at its
+           "from" txid and added paths must be new, so a stale patch is rejected
+           (PatchConflict) instead of silently undoing newer changes.
+  changelog  <out>_changelog.csv lists each change (change, path, old_id, new_id).
+           After an incremental re-upload only these rows need verifying.
+
+Export schemes map ArDrive export file names to manifest paths:
+  flat      N.json → N, contract.json / unrevealed.json kept  (arweave_manifest_*.json)
+  metadata  X.json → X                                         (metadata_manifest*.json)
+  folder    N.json → metadata/N, contract.json → metadata/contract, N.png → images/N
+
+Usage:
+  python manifest_patch.py diff folder_based_manifest_final.json --export latest_export.csv --scheme folder --patch upload.patch.json
+  python manifest_patch.py diff old_manifest.json new_manifest.json --patch upload.patch.json
+  python manifest_patch.py apply folder_based_manifest_final.json upload.patch.json --out folder_based_manifest_v2.json
+"""
+
+import argparse
+import csv
+import json
+import re
+from pathlib import Path
+
+from manifest_writer import MANIFEST_STYLES, ManifestWriter, format_size, path_sort_key
+
+MAX_CHANGES_SHOWN = 10
+
+
+class PatchConflict(ValueError):
+    """The base manifest no longer matches what the patch expects."""
+
+
+def _flat_path(name):
+    if name in ("contract.json", "unrevealed.json"):
+        return name
+    return name[:-5] if name.endswith(".json") else None
+
+
+def _metadata_path(name):
+    return name[:-5] if name.endswith(".json") else None
+
+
+def _folder_path(name):
+    if name == "contract.json":
+        return "metadata/contract"
+    if re.fullmatch(r"\d+\.json", name):
+        return f"metadata/{name[:-5]}"
+    if re.fullmatch(r"\d+\.png", name):
+        return f"images/{name[:-4]}"
+    return None
+
+
+EXPORT_SCHEMES = {"flat": _flat_path, "metadata": _metadata_path, "folder": _folder_path}
+
+
+class ManifestPatch:
+    """Changes between two versions of a manifest's paths."""
+
+    def __init__(self, added=None, removed=None, retargeted=None):
+        self.added = dict(added or {})
+        self.removed = dict(removed or {})
+        self.retargeted = dict(retargeted or {})  # path → (old txid, new txid)
+
+    def __len__(self):
+        return len(self.added) + len(self.removed) + len(self.retargeted)
+
+    def summary(self):
+        return f"{len(self.added):,} added, {len(self.removed):,} removed, {len(self.retargeted):,} retargeted"
+
+    def changes(self):
+        """(change, path, old_id, new_id) rows in path order."""
+        rows = [("added", p, "", t) for p, t in self.added.items()]
+        rows += [("removed", p, t, "") for p, t in self.removed.items()]
+        rows += [("retargeted", p, old, new) for p, (old, new) in self.retargeted.items()]
+        return sorted(rows, key=lambda row: path_sort_key(row[1]))
+
+    def to_json(self):
+        return {
+            "added": self.added,
+            "removed": self.removed,
+            "retargeted": {p: {"from": old, "to": new} for p, (old, new) in self.retargeted.items()},
+        }
+
+    @classmethod
+    def from_json(cls, doc):
+        retargeted = {p: (r["from"], r["to"]) for p, r in doc.get("retargeted", {}).items()}
+        return cls(doc.get("added"), doc.get("removed"), retargeted)
+
+    def save(self, path):
+        Path(path).write_text(json.dumps(self.to_json(), indent=2), encoding="utf-8")
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding="utf-8") as f:
+            return cls.from_json(json.load(f))
+
+
+def load_manifest(manifest_file):
+    """(manifest dict, {path: txid} index)."""
+    with open(manifest_file, encoding="utf-8") as f:
+        manifest = json.load(f)
+    return manifest, {path: entry["id"] for path, entry in manifest.get("paths", {}).items()}
+
+
+def diff_manifests(old_paths, new_paths):
+    """Patch turning old_paths into new_paths (both {path: txid})."""
+    patch = ManifestPatch()
+    for path, txid in new_paths.items():
+        old = old_paths.get(path)
+        if old is None:
+            patch.added[path] = txid
+        elif old != txid:
+            patch.retargeted[path] = (old, txid)
+    for path, txid in old_paths.items():
+        if path not in new_paths:
+            patch.removed[path] = txid
+    return patch
+
+
+def diff_targets(paths, targets, add_new=False):
+    """
+    Patch from (path, txid) targets against a manifest's {path: txid} index; only the
+    targets are looked at. Paths missing from the manifest are added with add_new and
+    otherwise returned as the second value. Later targets for the same path win.
+    """
+    patch, unknown = ManifestPatch(), {}
+    for path, txid in targets:
+        old = paths.get(path)
+        if old is None:
+            if add_new:
+                patch.added[path] = txid
+            else:
+                unknown[path] = txid
+        elif old != txid:
+            patch.retargeted[path] = (old, txid)
+        else:
+            patch.retargeted.pop(path, None)
+    return patch, unknown
+
+
+def export_targets(export_csv, scheme):
+    """(manifest path, txid) for every export row the scheme maps to a path."""
+    to_path = EXPORT_SCHEMES[scheme]
+    with open(export_csv, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            path = to_path((row.get("File Name") or "").strip())
+            txid = (row.get("Data Transaction ID") or "").strip()
+            if path is not None and txid:
+                yield path, txid
+
+
+def apply_patch(manifest, patch, out_file, style="pretty", strict=True):
+    """
+    Stream manifest (a loaded manifest dict) with patch applied into out_file. Added
+    paths go after the existing ones. Conflicts raise PatchConflict unless strict is
+    off, in which case the patch wins. Top-level keys other than "paths" (such as
+    "fallback") are kept, in their original order. Returns the ManifestWriter
+    (paths, bytes, index_found).
+    """
+    conflicts = []
+    base = manifest.get("paths", {})
+    index = manifest.get("index")
+    index = index["path"] if isinstance(index, dict) and list(index) == ["path"] else None
+    keys = list(manifest)
+    split = keys.index("paths") if "paths" in keys else len(keys)
+    standard = {"manifest", "version", "paths"} | ({"index"} if index is not None else set())
+    extra = {k: manifest[k] for k in keys[:split] if k not in standard}
+    trailing = {k: manifest[k] for k in keys[split:] if k not in standard}
+    writer = ManifestWriter(out_file, style, manifest.get("version", "0.1.0"), index, extra, trailing)
+    with writer:
+        for path, entry in base.items():
+            txid = entry["id"]
+            if path in patch.added:
+                conflicts.append(f"{path}: added by the patch but already in the manifest")
+                txid = patch.added[path]
+            elif path in patch.removed:
+                if patch.removed[path] != txid:
+                    conflicts.append(f"{path}: to be removed from {patch.removed[path]} but is {txid}")
+                continue
+            elif path in patch.retargeted:
+                old, new = patch.retargeted[path]
+                if old != txid:
+                    conflicts.append(f"{path}: to be retargeted from {old} but is {txid}")
+                txid = new
+            writer.add(path, txid)
+        for path, txid in sorted(patch.added.items(), key=lambda item: path_sort_key(item[0])):
+            if path not in base:
+                writer.add(path, txid)
+        conflicts += [f"{path}: not in the manifest" for path in (*patch.removed, *patch.retargeted) if path not in base]
+        if conflicts and strict:
+            raise PatchConflict(f"{len(conflicts)} conflict(s): " + "; ".join(conflicts[:MAX_CHANGES_SHOWN]))
+    return writer
+
+
+def changelog_path(out_file):
+    out_file = Path(out_file)
+    return out_file.with_name(f"{out_file.stem}_changelog.csv")
+
+
+def write_changelog(patch, path):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["change", "path", "old_id", "new_id"])
+        writer.writerows(patch.changes())
+
+
+def print_changes(patch):
+    print(f"🧩 Patch: {patch.summary()}")
+    changes = patch.changes()
+    for change, path, old, new in changes[:MAX_CHANGES_SHOWN]:
+        print(f"   {change:<10} {path}: {old or '-'} → {new or '-'}")
+    if len(changes) > MAX_CHANGES_SHOWN:
+        print(f"   ... and {len(changes) - MAX_CHANGES_SHOWN:,} more")
+
+
+def patch_manifest(manifest_file, targets, out_file, style="pretty", add_new=False):
+    """
+    The update_*_manifest.py flow: diff export targets against manifest_file, apply the
+    patch into out_file and write its changelog. Returns (patch, unknown paths, writer).
+    """
+    manifest, paths = load_manifest(manifest_file)
+    patch, unknown = diff_targets(paths, targets, add_new)
+    writer = apply_patch(manifest, patch, out_file, style)
+    write_changelog(patch, changelog_path(out_file))
+    return patch, unknown, writer
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Diff and patch Arweave path manifests")
+    sub = ap.add_subparsers(dest="command", required=True)
+    d = sub.add_parser("diff", help="Compute a patch")
+    d.add_argument("manifest", type=Path, help="Base manifest")
+    d.add_argument("new_manifest", type=Path, nargs="?", help="Manifest to diff against (or use --export)")
+    d.add_argument("--export", type=Path, help="ArDrive export CSV to diff against")
+    d.add_argument("--scheme", choices=sorted(EXPORT_SCHEMES), default="folder", help="Export file name → manifest path mapping")
+    d.add_argument("--add", action="store_true", help="Add export paths the manifest doesn't have yet")
+    d.add_argument("--patch", type=Path, default=Path("manifest.patch.json"), help="Patch file to write")
+    a = sub.add_parser("apply", help="Apply a patch")
+    a.add_argument("manifest", type=Path, help="Base manifest")
+    a.add_argument("patch", type=Path, help="Patch file from 'diff'")
+    a.add_argument("--out", type=Path, required=True, help="Patched manifest to write")
+    a.add_argument("--style", choices=MANIFEST_STYLES, default="pretty", help="minified drops all whitespace (smaller upload)")
+    a.add_argument("--force", action="store_true", help="Apply even if the base changed since the diff")
+    args = ap.parse_args()
+
+    if not args.manifest.exists():
+        print(f"❌ Manifest not found: {args.manifest}")
+        return 1
+    manifest, paths = load_manifest(args.manifest)
+
+    if args.command == "diff":
+        if (args.new_manifest is None) == (args.export is None):
+            print("❌ Give either a second manifest or --export")
+            return 2
+        if args.export is not None:
+            patch, unknown = diff_targets(paths, export_targets(args.export, args.scheme), args.add)
+            if unknown:
+                print(f"ℹ️  {len(unknown):,} export paths not in the manifest (use --add to include them)")
+        else:
+            patch = diff_manifests(paths, load_manifest(args.new_manifest)[1])
+        print_changes(patch)
+        patch.save(args.patch)
+        print(f"💾 Patch saved: {args.patch}")
+        return 0
+
+    patch = ManifestPatch.load(args.patch)
+    try:
+        writer = apply_patch(manifest, patch, args.out, args.style, strict=not args.force)
+    except PatchConflict as e:
+        print(f"❌ {e}")
+        return 1
+    write_changelog(patch, changelog_path(args.out))
+    print_changes(patch)
+    print(f"💾 {args.out}: {writer.paths:,} paths, {format_size(writer.bytes)}; changelog {changelog_path(args.out)}")
+    index = (manifest.get("index") or {}).get("path")
+    if index is not None and not writer.index_found:
+        print(f"⚠️  Index path '{index}' is not in the patched manifest")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
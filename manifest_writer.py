@@ -0,0 +1,184 @@
+"""
+Streaming arweave/paths manifest writer.
+
+The manifest scripts used to build {"paths": {...}} for every file in memory and
+json.dump(indent=2) it. ManifestWriter writes each (path, txid) entry as it
+arrives, so memory stays flat for any number of paths:
+
+    with ManifestWriter("nft_manifest_ready.json", index="1") as manifest:
+        manifest.add_all(sorted_paths(txids.items()))
+    print(manifest.paths, manifest.bytes)
+
+  * Paths are written in the order given; pass them in path_sort_key order (1, 2, ...,
+    10, contract.json) for deterministic manifests. Sorted input is checked for
+    duplicates against the previous path alone.
+  * Every path also leaves a 64-bit hash in an array (8 bytes per path), which is
+    sorted and checked when the manifest is closed if the input arrived unsorted.
+  * style 'pretty' is byte-identical to json.dump(manifest, indent=2); 'minified'
+    drops all whitespace (manifest size is what gets paid for and what gateways
+    fetch to resolve every ar://MANIFEST/<path>).
+  * The file is written to <name>.tmp and renamed into place on success, so a
+    failed or rejected manifest never replaces a good one.
+  * index can be given up front (written before "paths", as json.dump would) or
+    set while streaming with set_index() (written after "paths"); index_found tells
+    whether an up-front index was among the paths.
+  * Other top-level keys (e.g. "fallback") go in extra (written before "paths") or
+    trailing (written after it), so a loaded manifest can be rewritten with its keys
+    in their original order.
+
+Used by generate_arweave_manifest.py, create_folder_manifest.py, extract_metadata_txids.py,
+arweave_pipeline.py and manifest_patch.py (which the update_*manifest.py scripts go through).
+"""
+
+import json
+import os
+import re
+from array import array
+from pathlib import Path
+
+MANIFEST_TYPE = "arweave/paths"
+MANIFEST_STYLES = ("pretty", "minified")
+_DIGITS_RE = re.compile(r"(\d+)")
+
+
+class ManifestError(ValueError):
+    """Duplicate or invalid manifest paths."""
+
+
+def path_sort_key(path):
+    """Natural order: numbers compare as numbers ('metadata/2' < 'metadata/10'), text as text."""
+    parts = _DIGITS_RE.split(path)
+    return tuple((0, int(p), p) if i % 2 else (1, 0, p) for i, p in enumerate(parts)), path
+
+
+def sorted_paths(pairs):
+    """(path, txid) pairs sorted with path_sort_key, for callers that collected them unordered."""
+    return sorted(pairs, key=lambda pair: path_sort_key(pair[0]))
+
+
+class ManifestWriter:
+    """Writes one arweave/paths manifest entry by entry; see the module docstring."""
+
+    def __init__(self, out_path, style="pretty", version="0.1.0", index=None, extra=None, trailing=None):
+        if style not in MANIFEST_STYLES:
+            raise ValueError(f"Unknown manifest style '{style}' (expected one of {', '.join(MANIFEST_STYLES)})")
+        self.out_path = Path(out_path)
+        self.style = style
+        self.paths = 0
+        self.bytes = 0
+        self._index = index
+        self.index_found = False
+        self._index_written = index is not None
+        self._trailing = dict(trailing or {})
+        self._hashes = array("q")
+        self._last_key = None
+        self._sorted = True
+        self._tmp = self.out_path.with_name(self.out_path.name + ".tmp")
+        self._f = open(self._tmp, "w", encoding="utf-8", newline="\n", buffering=1 << 20)
+        pretty = style == "pretty"
+        self._sep_first = "\n    " if pretty else ""
+        self._sep = ",\n    " if pretty else ","
+        self._entry = '{}: {{\n      "id": {}\n    }}' if pretty else '{}:{{"id":{}}}'
+        head = {"manifest": MANIFEST_TYPE, "version": version}
+        if index is not None:
+            head["index"] = {"path": index}
+        head.update(extra or {})
+        if pretty:
+            text = json.dumps(head, indent=2)[:-2] + ',\n  "paths": {'
+        else:
+            text = json.dumps(head, separators=(",", ":"))[:-1] + ',"paths":{'
+        self._f.write(text)
+
+    def add(self, path, txid):
+        if not isinstance(path, str) or not path:
+            raise ManifestError(f"Invalid manifest path {path!r}")
+        if self._sorted:
+            key = path_sort_key(path)
+            if self._last_key is not None and key <= self._last_key:
+                if key == self._last_key:
+                    raise ManifestError(f"Duplicate manifest path '{path}'")
+                self._sorted = False
+            self._last_key = key
+        self._hashes.append(hash(path))
+        if path == self._index:
+            self.index_found = True
+        self._f.write((self._sep if self.paths else self._sep_first)
+                      + self._entry.format(json.dumps(path), json.dumps(txid)))
+        self.paths += 1
+
+    def add_all(self, pairs):
+        for path, txid in pairs:
+            self.add(path, txid)
+        return self
+
+    def set_index(self, path):
+        """Index path for a manifest whose index wasn't known when it was opened."""
+        if self._index_written:
+            raise ManifestError("The index was already written at the top of the manifest")
+        self._index = path
+        self.index_found = True
+
+    def _check_unique(self):
+        if self._sorted or len(self._hashes) < 2:
+            return
+        import numpy as np
+
+        hashes = np.sort(np.frombuffer(self._hashes, dtype=np.int64))
+        duplicates = int(np.count_nonzero(hashes[1:] == hashes[:-1]))
+        if duplicates:
+            raise ManifestError(f"{duplicates} duplicate manifest path(s)")
+
+    def close(self):
+        """Finish the manifest and move it into place; returns its size in bytes."""
+        if self._f.closed:
+            return self.bytes
+        try:
+            self._check_unique()
+            pretty = self.style == "pretty"
+            tail = ("\n  }" if self.paths else "}") if pretty else "}"
+            if self._index is not None and not self._index_written:
+                index = json.dumps(self._index)
+                tail += f',\n  "index": {{\n    "path": {index}\n  }}' if pretty else f',"index":{{"path":{index}}}'
+            if self._trailing:
+                tail += "," + (json.dumps(self._trailing, indent=2)[1:-2] if pretty
+                               else json.dumps(self._trailing, separators=(",", ":"))[1:-1])
+            self._f.write(tail + ("\n}" if pretty else "}"))
+            self._f.close()
+        except BaseException:
+            self.abort()
+            raise
+        os.replace(self._tmp, self.out_path)
+        self.bytes = self.out_path.stat().st_size
+        self._hashes = array("q")
+        return self.bytes
+
+    def abort(self):
+        """Discard the partial manifest; the previous file at out_path is left untouched."""
+        if not self._f.closed:
+            self._f.close()
+        self._tmp.unlink(missing_ok=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+        return False
+
+
+def write_manifest(out_path, pairs, style="pretty", version="0.1.0", index=None, extra=None, trailing=None):
+    """Stream (path, txid) pairs into out_path. Returns (number of paths, bytes written)."""
+    with ManifestWriter(out_path, style, version, index, extra, trailing) as manifest:
+        manifest.add_all(pairs)
+    return manifest.paths, manifest.bytes
+
+
+def format_size(n):
+    """Human-readable byte count for reports."""
+    for unit in ("B", "KB", "MB", "GB"):
+        if n < 1024 or unit == "GB":
+            return f"{n:,} {unit}" if unit == "B" else f"{n:,.1f} {unit}"
+        n /= 1024
@@ -2,12 +2,22 @@
 """
 Attempt to map trait CSV entries to local PNG files in the workspace.
 Creates `traits_catalog.mapped.csv` with updated `file` paths when a unique local match is found.
+
+Candidates come from an n-gram inverted index over normalized file names, so each row
+only scores files that share its terms; the directory listing is cached in .cache/
+and only re-read for folders whose mtime changed.
 """
 import csv
+import heapq
+import json
+import os
+from collections import Counter, defaultdict
 from pathlib import Path
 import re
 import sys
 
+from asset_index import AssetIndex, is_remote, resolve_asset_path
+
 ROOT = Path('.').resolve()
 CSV = ROOT / 'traits_catalog.csv'
 OUT = ROOT / 'traits_catalog.mapped.csv'
@@ -16,14 +26,89 @@ if not CSV.exists():
     print('traits_catalog.csv not found', file=sys.stderr)
     sys.exit(2)
 
+LISTING_CACHE = ROOT / '.cache' / 'map_assets_listing.json'
+NGRAM = 3
+
+
+def list_pngs(root, cache_path=LISTING_CACHE):
+    """
+    All *.png under root outside any 'output' folder (same set as rglob). Each directory's
+    entries are cached with its mtime, so unchanged directories are stat'ed, not listed.
+    """
+    try:
+        cache = json.loads(cache_path.read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        cache = {}
+    fresh = {}
+    found = []
+    if 'output' in root.parts:
+        return found
+    stack = ['']
+    while stack:
+        rel = stack.pop()
+        d = root / rel
+        try:
+            mtime = d.stat().st_mtime_ns
+        except OSError:
+            continue
+        entry = cache.get(rel)
+        if entry is None or entry['mtime'] != mtime:
+            files, dirs = [], []
+            try:
+                with os.scandir(d) as it:
+                    for e in it:
+                        if e.name.endswith('.png'):
+                            files.append(e.name)
+                        if e.is_dir() and not e.is_symlink() and e.name != 'output':
+                            dirs.append(e.name)
+            except OSError:
+                continue
+            entry = {'mtime': mtime, 'files': files, 'dirs': dirs}
+        fresh[rel] = entry
+        found.extend(d / name for name in entry['files'])
+        stack.extend(f'{rel}/{name}' if rel else name for name in entry['dirs'])
+    if fresh != cache:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        cache_path.write_text(json.dumps(fresh), encoding='utf-8')
+    return found
+
+
 # Gather all png files under repo (exclude output folder)
-pngs = [p for p in ROOT.rglob('*.png') if 'output' not in p.parts]
+pngs = list_pngs(ROOT)
 png_basenames = [p.name for p in pngs]
 
 def normalize(s):
     return re.sub(r'[^a-z0-9]+', '_', s.lower()).strip('_')
 
 png_tokens = [(p, normalize(p.name)) for p in pngs]
+png_paths = [str(p) for p in pngs]
+
+# Inverted index: every 1..NGRAM-character substring of a normalized name -> file ids.
+# Substring queries intersect the postings of their n-grams and verify the survivors,
+# so only files that can match are ever scored.
+postings = defaultdict(set)
+for i, (_, token) in enumerate(png_tokens):
+    for n in range(1, NGRAM + 1):
+        for j in range(len(token) - n + 1):
+            postings[token[j:j + n]].add(i)
+
+_match_cache = {}
+
+
+def files_containing(term):
+    """Ids of files whose normalized name contains term (same as `term in token`)."""
+    hit = _match_cache.get(term)
+    if hit is None:
+        if not term:
+            hit = set(range(len(png_tokens)))
+        elif len(term) <= NGRAM:
+            hit = postings.get(term, set())
+        else:
+            grams = sorted((postings.get(term[j:j + NGRAM], set()) for j in range(len(term) - NGRAM + 1)), key=len)
+            candidates = set.intersection(*grams) if grams[0] else set()
+            hit = {i for i in candidates if term in png_tokens[i][1]}
+        _match_cache[term] = hit
+    return hit
 
 mapped = []
 ambiguous = []
@@ -34,6 +119,10 @@ with CSV.open(newline='', encoding='utf-8') as f:
     headers = reader.fieldnames
     rows = list(reader)
 
+# Existing catalog paths are checked against the shared asset index
+with AssetIndex() as index:
+    available = index.present([resolve_asset_path(r['file'], CSV.parent) for r in rows if (r.get('file') or '').strip()])
+
 for row in rows:
     raw = (row.get('file') or '').strip()
     trait = (row.get('trait_name') or '').strip()
@@ -42,34 +131,28 @@ for row in rows:
         key = f'{layer} {trait}'
     else:
         # if already a local path and exists, keep
-        if not re.match(r'^[a-zA-Z]+://', raw):
-            p = Path(raw)
-            if not p.is_absolute():
-                p = (CSV.parent / p).resolve()
-            if p.exists():
+        resolved = resolve_asset_path(raw, CSV.parent)
+        if not is_remote(resolved):
+            p = Path(resolved)
+            if available[resolved]:
                 mapped.append((row, str(p.relative_to(ROOT))))
                 row['file'] = str(p.relative_to(ROOT)).replace('\\','/')
                 continue
     # try to find a candidate
     needle = normalize(layer + ' ' + trait)
-    scores = []
-    for p, token in png_tokens:
-        score = 0
-        if needle in token:
-            score += 10
-        # incremental token matching
-        for t in normalize(trait).split('_'):
-            if t and t in token:
-                score += 1
-        for t in normalize(layer).split('_'):
-            if t and t in token:
-                score += 1
-        if score>0:
-            scores.append((score, p))
-    if not scores:
+    counts = Counter()
+    for i in files_containing(needle):
+        counts[i] += 10
+    # incremental token matching
+    for t in normalize(trait).split('_') + normalize(layer).split('_'):
+        if t:
+            counts.update(files_containing(t))
+    if not counts:
         notfound.append((layer, trait))
         continue
-    scores.sort(key=lambda x: (-x[0], str(x[1])))
+    # only the best three are ever used, in (-score, path) order
+    best3 = heapq.nsmallest(3, counts.items(), key=lambda x: (-x[1], png_paths[x[0]]))
+    scores = [(score, png_tokens[i][0]) for i, score in best3]
     # check top two if tie
     if len(scores)>1 and scores[0][0]==scores[1][0]:
         ambiguous.append((layer, trait, scores[:3]))
@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+"""
+Consolidated Metadata Store for Skunk Squad Collection
+
+One SQLite file keyed by token_id instead of thousands of loose JSON files spread
+over output/metadata, metadata_arweave, metadata_out, test_metadata_arweave, ...
+
+  tokens(token_id PRIMARY KEY, metadata  -- minified JSON in the imported key order
+         image, image_txid, metadata_txid, source, updated_at,    (metadata_writer 'compact')
+         ensure_ascii)                    -- 0 if the source file held raw non-ASCII text
+
+Keys keep the order they were imported in and non-ASCII text is escaped (or not)
+as in the source file, so `export --style pretty` reproduces json.dump(indent=2)
+files byte for byte; `--style canonical` sorts them on the way out. Files that
+aren't a JSON object are skipped on import.
+
+Lookups, bulk image rewrites and audits run against the indexed table; per-token
+.json files are only materialized by `export` when a folder is needed for upload.
+
+Usage:
+  python metadata_store.py import output/metadata                 # load / refresh from a folder
+  python metadata_store.py set-txids txid_mapping.csv --rewrite   # image → ar://<image_txid>
+  python metadata_store.py show 42
+  python metadata_store.py audit --expected 10000
+  python metadata_store.py export metadata_arweave --style pretty
+"""
+
+import argparse
+import csv
+import json
+import os
+import re
+import sqlite3
+import time
+from pathlib import Path
+
+from metadata_writer import METADATA_STYLES, MetadataWriter, dumps_metadata
+
+DEFAULT_DB = Path("output/metadata_store.sqlite")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tokens (
+    token_id      INTEGER PRIMARY KEY,
+    metadata      TEXT NOT NULL,
+    image         TEXT,
+    image_txid    TEXT,
+    metadata_txid TEXT,
+    source        TEXT,
+    updated_at    REAL NOT NULL,
+    ensure_ascii  INTEGER NOT NULL DEFAULT 1
+);
+CREATE INDEX IF NOT EXISTS tokens_image ON tokens(image);
+CREATE INDEX IF NOT EXISTS tokens_image_txid ON tokens(image_txid);
+"""
+
+TXID_RE = re.compile(r"^[A-Za-z0-9_-]{43}$")
+TOKEN_FILE_RE = re.compile(r"^(\d+)\.json$")
+
+
+def _image_txid(image):
+    """TXID from an ar://<txid> or arweave.net/<txid> URI, else None."""
+    if not image:
+        return None
+    tail = str(image).rstrip("/").rsplit("/", 1)[-1]
+    return tail if TXID_RE.match(tail) and ("ar://" in image or "arweave" in image) else None
+
+
+class MetadataStore:
+    """Thin wrapper around the SQLite file; every bulk operation is a single transaction."""
+
+    def __init__(self, path=DEFAULT_DB):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.path))
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(tokens)")}
+        if "ensure_ascii" not in columns:  # stores created before the column existed
+            self.conn.execute("ALTER TABLE tokens ADD COLUMN ensure_ascii INTEGER NOT NULL DEFAULT 1")
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM tokens").fetchone()[0]
+
+    # --- write ---------------------------------------------------------------------
+
+    def put_many(self, items, source=None):
+        """
+        Insert or replace (token_id, metadata_dict) pairs. Existing TXIDs are kept. An
+        optional third item, ensure_ascii (default True), is how pretty exports escape
+        non-ASCII text for that token.
+        """
+        now = time.time()
+
+        def rows():
+            for token_id, meta, *ascii_flag in items:
+                if not isinstance(meta, dict):
+                    raise TypeError(f"Token {token_id}: metadata must be a JSON object, not {type(meta).__name__}")
+                yield (token_id, dumps_metadata(meta, "compact").decode("utf-8"), meta.get("image"),
+                       _image_txid(meta.get("image")), source, now, int(ascii_flag[0] if ascii_flag else True))
+
+        with self.conn:
+            cur = self.conn.executemany(
+                """INSERT INTO tokens (token_id, metadata, image, image_txid, source, updated_at, ensure_ascii)
+                   VALUES (?, ?, ?, ?, ?, ?, ?)
+                   ON CONFLICT(token_id) DO UPDATE SET
+                       metadata = excluded.metadata,
+                       image = excluded.image,
+                       image_txid = COALESCE(excluded.image_txid, tokens.image_txid),
+                       source = excluded.source,
+                       updated_at = excluded.updated_at,
+                       ensure_ascii = excluded.ensure_ascii""",
+                rows(),
+            )
+        return cur.rowcount
+
+    def import_directory(self, directory):
+        """Load every <token_id>.json object in directory. Returns (imported, skipped_names)."""
+        directory = Path(directory)
+        skipped = []
+
+        def items():
+            with os.scandir(directory) as it:
+                for entry in it:
+                    m = TOKEN_FILE_RE.match(entry.name)
+                    if not m:
+                        if entry.name.endswith(".json"):
+                            skipped.append(entry.name)
+                        continue
+                    try:
+                        with open(entry.path, "rb") as fh:
+                            raw = fh.read()
+                        meta = json.loads(raw)
+                    except (OSError, ValueError):
+                        skipped.append(entry.name)
+                        continue
+                    if not isinstance(meta, dict):
+                        skipped.append(entry.name)
+                        continue
+                    # Raw non-ASCII bytes mean the file was written with ensure_ascii=False
+                    yield int(m.group(1)), meta, raw.isascii()
+
+        count = self.put_many(items(), source=str(directory))
+        return count, skipped
+
+    def set_txids(self, mapping, rewrite_images=False):
+        """
+        mapping: {token_id: (image_txid or None, metadata_txid or None)}.
+        With rewrite_images, each token's "image" becomes ar://<image_txid> in the stored JSON.
+        """
+        with self.conn:
+            cur = self.conn.executemany(
+                """UPDATE tokens SET
+                       image_txid = COALESCE(?, image_txid),
+                       metadata_txid = COALESCE(?, metadata_txid),
+                       updated_at = ?
+                   WHERE token_id = ?""",
+                ((img, meta, time.time(), tid) for tid, (img, meta) in mapping.items()),
+            )
+            updated = cur.rowcount
+            if rewrite_images:
+                self.rewrite_images("'ar://' || image_txid", where="image_txid IS NOT NULL")
+        return updated
+
+    def rewrite_images(self, sql_expr, where="1=1", params=()):
+        """
+        Bulk-set "image" with one UPDATE; sql_expr may use columns, e.g.
+        "'ipfs://CID/' || token_id || '.png'". json_set keeps the stored key order.
+        """
+        with self.conn:
+            cur = self.conn.execute(
+                f"""UPDATE tokens SET
+                        image = {sql_expr},
+                        metadata = json_set(metadata, '$.image', {sql_expr}),
+                        updated_at = ?
+                    WHERE {where}""",
+                (*params, *params, time.time()),  # sql_expr appears twice
+            )
+        return cur.rowcount
+
+    # --- read ------------------------------------------------------------------------
+
+    def get(self, token_id):
+        row = self.conn.execute("SELECT metadata FROM tokens WHERE token_id = ?", (token_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def iter_rows(self, start=None, end=None):
+        """Yield (token_id, metadata_json_text, image, image_txid, metadata_txid, ensure_ascii) in token order."""
+        sql = "SELECT token_id, metadata, image, image_txid, metadata_txid, ensure_ascii FROM tokens"
+        clauses, params = [], []
+        if start is not None:
+            clauses.append("token_id >= ?")
+            params.append(start)
+        if end is not None:
+            clauses.append("token_id <= ?")
+            params.append(end)
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        yield from self.conn.execute(sql + " ORDER BY token_id", params)
+
+    def export(self, outdir, style="pretty", start=None, end=None, fsync=False):
+        """Materialize <token_id>.json files. Returns the number written."""
+        outdir = Path(outdir)
+        outdir.mkdir(parents=True, exist_ok=True)
+        with MetadataWriter(fsync=fsync) as writer:
+            for token_id, text, _, _, _, ensure_ascii in self.iter_rows(start, end):
+                if style == "compact":
+                    data = text.encode("utf-8")
+                else:
+                    data = dumps_metadata(json.loads(text), style, ensure_ascii=bool(ensure_ascii))
+                writer.write(outdir / f"{token_id}.json", data)
+        return writer.files
+
+    def audit(self, expected=None):
+        """Counts of gaps, missing images/TXIDs and duplicated image URIs."""
+        q = lambda sql: self.conn.execute(sql).fetchone()[0]
+        total = len(self)
+        max_id = q("SELECT COALESCE(MAX(token_id), 0) FROM tokens")
+        upper = expected or max_id
+        present = {r[0] for r in self.conn.execute("SELECT token_id FROM tokens WHERE token_id BETWEEN 1 AND ?", (upper,))}
+        return {
+            "tokens": total,
+            "max_token_id": max_id,
+            "missing_token_ids": [t for t in range(1, upper + 1) if t not in present],
+            "missing_image": q("SELECT COUNT(*) FROM tokens WHERE image IS NULL OR image = ''"),
+            "missing_image_txid": q("SELECT COUNT(*) FROM tokens WHERE image_txid IS NULL"),
+            "missing_metadata_txid": q("SELECT COUNT(*) FROM tokens WHERE metadata_txid IS NULL"),
+            "placeholder_images": q("SELECT COUNT(*) FROM tokens WHERE image LIKE '%CID%' OR image LIKE '%TXID%' OR image LIKE '%REPLACE%'"),
+            "duplicate_images": [
+                (image, n) for image, n in self.conn.execute(
+                    "SELECT image, COUNT(*) FROM tokens WHERE image IS NOT NULL GROUP BY image HAVING COUNT(*) > 1 ORDER BY 2 DESC LIMIT 20"
+                )
+            ],
+        }
+
+
+def load_txid_csv(path):
+    """token_id,image_txid[,metadata_txid] CSV (process_arweave_export.py / ans104_bundle.py layout)."""
+    mapping = {}
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            try:
+                token_id = int(row["token_id"])
+            except (KeyError, TypeError, ValueError):
+                continue
+            image_txid = (row.get("image_txid") or "").strip() or None
+            metadata_txid = (row.get("metadata_txid") or "").strip() or None
+            mapping[token_id] = (image_txid, metadata_txid)
+    return mapping
+
+
+def parse_range(text):
+    if not text:
+        return None, None
+    start, _, end = text.partition("-")
+    return int(start), int(end or start)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Consolidated SQLite store for token metadata, image URIs and TXIDs")
+    ap.add_argument("--db", type=Path, default=DEFAULT_DB, help="SQLite store path")
+    sub = ap.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("import", help="Load <token_id>.json files from one or more folders (later folders win)")
+    p.add_argument("dirs", type=Path, nargs="+")
+
+    p = sub.add_parser("set-txids", help="Attach TXIDs from a token_id,image_txid[,metadata_txid] CSV")
+    p.add_argument("csv", type=Path)
+    p.add_argument("--rewrite", action="store_true", help="Also set image to ar://<image_txid>")
+
+    p = sub.add_parser("set-image-base", help="Bulk-set image to <base><token_id><suffix>")
+    p.add_argument("base", help="e.g. ipfs://IMAGES_CID/")
+    p.add_argument("--suffix", default=".png")
+
+    p = sub.add_parser("show", help="Print one token's metadata")
+    p.add_argument("token_id", type=int)
+
+    p = sub.add_parser("audit", help="Report gaps, missing TXIDs and duplicate images")
+    p.add_argument("--expected", type=int, default=None, help="Expected supply (default: highest token_id)")
+
+    p = sub.add_parser("export", help="Materialize <token_id>.json files for upload")
+    p.add_argument("outdir", type=Path)
+    p.add_argument("--style", choices=METADATA_STYLES, default="pretty")
+    p.add_argument("--range", dest="token_range", default=None, help="e.g. 1-100")
+    p.add_argument("--fsync", action="store_true", help="fsync each file and write atomically")
+
+    args = ap.parse_args()
+
+    with MetadataStore(args.db) as store:
+        if args.command == "import":
+            for d in args.dirs:
+                if not d.is_dir():
+                    print(f"❌ Directory not found: {d}")
+                    return 1
+                count, skipped = store.import_directory(d)
+                print(f"✅ Imported {count:,} tokens from {d}")
+                if skipped:
+                    print(f"   ⚠️ Skipped {len(skipped)} non-token or unreadable file(s): {', '.join(sorted(skipped)[:5])}")
+            print(f"📦 Store now holds {len(store):,} tokens ({args.db})")
+
+        elif args.command == "set-txids":
+            if not args.csv.exists():
+                print(f"❌ CSV not found: {args.csv}")
+                return 1
+            mapping = load_txid_csv(args.csv)
+            updated = store.set_txids(mapping, rewrite_images=args.rewrite)
+            print(f"✅ Updated TXIDs for {updated:,} of {len(mapping):,} rows")
+
+        elif args.command == "set-image-base":
+            updated = store.rewrite_images("? || token_id || ?", params=(args.base, args.suffix))
+            print(f"✅ Rewrote image URI for {updated:,} tokens")
+
+        elif args.command == "show":
+            meta = store.get(args.token_id)
+            if meta is None:
+                print(f"❌ Token {args.token_id} not in store")
+                return 1
+            print(json.dumps(meta, indent=2, ensure_ascii=False))
+
+        elif args.command == "audit":
+            report = store.audit(args.expected)
+            missing = report["missing_token_ids"]
+            print(f"📊 Tokens: {report['tokens']:,} (max id {report['max_token_id']:,})")
+            print(f"   • Missing token ids: {len(missing):,}" + (f" (first: {missing[:10]})" if missing else ""))
+            print(f"   • Missing image: {report['missing_image']:,}")
+            print(f"   • Placeholder image URIs: {report['placeholder_images']:,}")
+            print(f"   • Missing image TXID: {report['missing_image_txid']:,}")
+            print(f"   • Missing metadata TXID: {report['missing_metadata_txid']:,}")
+            for image, n in report["duplicate_images"]:
+                print(f"   ⚠️ {n} tokens share image {image}")
+            return 0 if not missing and not report["duplicate_images"] else 1
+
+        elif args.command == "export":
+            start, end = parse_range(args.token_range)
+            written = store.export(args.outdir, style=args.style, start=start, end=end, fsync=args.fsync)
+            print(f"✅ Exported {written:,} metadata files to {args.outdir}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,180 @@
+"""
+Shared metadata JSON serialization and batched file writing.
+
+Styles:
+  - pretty:    json.dumps(indent=2), byte-identical to what the scripts always wrote
+  - compact:   no whitespace, UTF-8 kept as-is (smallest files, still key-ordered as built)
+  - canonical: compact + sorted keys, a stable minified form for on-chain / content-addressed
+               hosting (same input → same bytes → same CID / hash)
+
+MetadataTemplate precomputes the parts shared by every edition (name prefix,
+description) so per-edition serialization only encodes what changes.
+MetadataWriter hands (path, bytes) jobs to a background thread so file creation
+overlaps with rendering; fsync is off by default (same durability as a plain
+open/write) and can be turned on for durable atomic writes.
+
+Used by generate.py, scripts/prepare-metadata.py, generate_arweave_metadata.py and
+build_metadata.py.
+"""
+
+import json
+import os
+import queue
+import threading
+import time
+from pathlib import Path
+
+METADATA_STYLES = ("pretty", "compact", "canonical")
+
+
+def dumps_metadata(meta, style="pretty", ensure_ascii=True):
+    """Serialize one metadata dict to UTF-8 bytes. ensure_ascii only applies to 'pretty'."""
+    if style == "pretty":
+        return json.dumps(meta, indent=2, ensure_ascii=ensure_ascii).encode("utf-8")
+    if style == "compact":
+        return json.dumps(meta, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    if style == "canonical":
+        return json.dumps(meta, separators=(",", ":"), ensure_ascii=False, sort_keys=True).encode("utf-8")
+    raise ValueError(f"Unknown metadata style '{style}' (expected one of {', '.join(METADATA_STYLES)})")
+
+
+def _encode(value, style):
+    if style == "pretty":
+        return json.dumps(value)
+    return json.dumps(value, ensure_ascii=False)
+
+
+class MetadataTemplate:
+    """
+    Generator metadata ({name, description, image, attributes}) with precomputed fragments.
+    render() produces exactly dumps_metadata(meta, style) for the same dict.
+    """
+
+    def __init__(self, name_prefix, description, style="pretty"):
+        if style not in METADATA_STYLES:
+            raise ValueError(f"Unknown metadata style '{style}'")
+        self.style = style
+        # Encoded prefix without its closing quote, so the edition number can be appended
+        name_open = _encode(name_prefix, style)[:-1]
+        description = _encode(description, style)
+        if style == "pretty":
+            self._head = '{\n  "name": ' + name_open
+            self._middle = '",\n  "description": ' + description + ',\n  "image": '
+            self._attrs_key = ',\n  "attributes": '
+            self._tail = "\n}"
+        elif style == "compact":
+            self._head = '{"name":' + name_open
+            self._middle = '","description":' + description + ',"image":'
+            self._attrs_key = ',"attributes":'
+            self._tail = "}"
+        else:
+            # Sorted keys: attributes, description, image, name
+            self._description = description
+            self._name_open = name_open
+
+    def _attributes(self, attributes):
+        if self.style == "pretty":
+            if not attributes:
+                return "[]"
+            # Nested one level deeper than a top-level dump
+            return json.dumps(attributes, indent=2).replace("\n", "\n  ")
+        return json.dumps(attributes, separators=(",", ":"), ensure_ascii=False, sort_keys=self.style == "canonical")
+
+    def render(self, edition, image, attributes):
+        attrs = self._attributes(attributes)
+        image = _encode(image, self.style)
+        if self.style == "canonical":
+            text = ('{"attributes":' + attrs + ',"description":' + self._description
+                    + ',"image":' + image + ',"name":' + self._name_open + f'{edition}"' + "}")
+        else:
+            text = self._head + str(edition) + self._middle + image + self._attrs_key + attrs + self._tail
+        return text.encode("utf-8")
+
+
+def write_bytes(path, data, fsync=False, atomic=False):
+    """
+    Write data to path. With atomic, write a temp file and rename it into place; fsync
+    also syncs the temp file first (atomic + durable).
+    """
+    path = Path(path)
+    if not (fsync or atomic):
+        with open(path, "wb") as fh:
+            fh.write(data)
+        return
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as fh:
+        fh.write(data)
+        if fsync:
+            fh.flush()
+            os.fsync(fh.fileno())
+    os.replace(tmp, path)
+
+
+class MetadataWriter:
+    """
+    Background writer thread for many small files.
+
+        with MetadataWriter() as writer:
+            writer.write(path, data)
+        print(writer.files, writer.bytes)
+
+    The first error (I/O or otherwise, e.g. a TypeError from data that isn't bytes) is
+    re-raised from write() or close(); the thread keeps draining the queue after it, so
+    neither call can block on a dead writer.
+    """
+
+    def __init__(self, fsync=False, max_pending=1024):
+        self.fsync = fsync
+        self.files = 0
+        self.bytes = 0
+        self.seconds = 0.0
+        self._error = None
+        self._queue = queue.Queue(max_pending)
+        self._started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="metadata-writer", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            if self._error is not None:
+                continue
+            path, data = job
+            try:
+                write_bytes(path, data, fsync=self.fsync)
+                self.files += 1
+                self.bytes += len(data)
+            except BaseException as e:
+                self._error = e
+
+    def write(self, path, data):
+        if self._error is not None:
+            raise self._error
+        self._queue.put((path, data))
+
+    def write_json(self, path, meta, style="pretty", ensure_ascii=True):
+        self.write(path, dumps_metadata(meta, style, ensure_ascii=ensure_ascii))
+
+    def close(self):
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+            self.seconds = time.perf_counter() - self._started
+        if self._error is not None:
+            raise self._error
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            # Don't mask the original exception with a writer error
+            try:
+                self.close()
+            except Exception:
+                pass
+        return False
@@ -0,0 +1,119 @@
+"""
+Perceptual hashing and near-duplicate lookup for rendered editions.
+
+Two different trait combinations can render the same picture (a "None" trait
+pointing at transparent.png, or a layer fully hidden by another one), which
+combo signatures cannot see. Each edition gets a perceptual hash made of a
+difference hash (dHash, structure) plus a coarse Gray-coded color layout (so flat
+areas of different colors still differ), and hashes are kept in a BK-tree so
+"anything within N bits?" queries only visit a small part of the index instead
+of comparing every pair.
+
+Used by generate.py (--visual-dupes).
+"""
+
+from typing import Iterator, List, Optional, Tuple
+
+from PIL import Image
+
+# 16×16 gradients → 256 bits; fine enough that small traits (emblem, shoes) still flip bits
+HASH_SIZE = 16
+# 4×4 grid × RGB × 4-bit Gray code → 192 bits of absolute color
+COLOR_GRID = 4
+COLOR_BITS = 4
+HASH_BITS = HASH_SIZE * HASH_SIZE + COLOR_GRID * COLOR_GRID * 3 * COLOR_BITS
+MATTE = (127, 127, 127)
+
+
+def _flatten(img: Image.Image) -> Image.Image:
+    """Composite transparent images over a neutral matte so alpha doesn't skew the hash."""
+    if img.mode in ("RGBA", "LA", "P"):
+        img = img.convert("RGBA")
+        flat = Image.new("RGBA", img.size, MATTE + (255,))
+        flat.alpha_composite(img)
+        img = flat
+    return img.convert("RGB")
+
+
+def perceptual_hash(img: Image.Image) -> int:
+    """dHash bits followed by color-layout bits; HASH_BITS wide."""
+    flat = _flatten(img)
+    value = dhash(flat)
+    small = flat.resize((COLOR_GRID, COLOR_GRID), Image.BOX).tobytes()
+    shift = 8 - COLOR_BITS
+    for channel_value in small:
+        level = channel_value >> shift
+        # Gray code: neighbouring color levels differ by a single bit
+        value = (value << COLOR_BITS) | (level ^ (level >> 1))
+    return value
+
+
+def dhash(img: Image.Image, hash_size: int = HASH_SIZE) -> int:
+    """Horizontal difference hash of img flattened over a neutral matte."""
+    gray = _flatten(img).convert("L").resize((hash_size + 1, hash_size), Image.BOX)
+    px = gray.tobytes()
+    value = 0
+    width = hash_size + 1
+    for row in range(hash_size):
+        base = row * width
+        for col in range(hash_size):
+            value = (value << 1) | (px[base + col] > px[base + col + 1])
+    return value
+
+
+def hamming(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+def format_hash(value: int, bits: int = HASH_BITS) -> str:
+    return f"{value:0{bits // 4}x}"
+
+
+class BKTree:
+    """Burkhard-Keller tree over integer hashes with Hamming distance."""
+
+    def __init__(self):
+        self._root: Optional[list] = None  # node = [hash, item, {distance: child}]
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add(self, value: int, item) -> None:
+        self._size += 1
+        if self._root is None:
+            self._root = [value, item, {}]
+            return
+        node = self._root
+        while True:
+            d = hamming(value, node[0])
+            child = node[2].get(d)
+            if child is None:
+                node[2][d] = [value, item, {}]
+                return
+            node = child
+
+    def search(self, value: int, max_distance: int) -> List[Tuple[int, object]]:
+        """Return [(distance, item)] for every stored hash within max_distance, closest first."""
+        found = []
+        if self._root is None:
+            return found
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            d = hamming(value, node[0])
+            if d <= max_distance:
+                found.append((d, node[1]))
+            # Triangle inequality: only children at distance d±max_distance can match
+            for child_d, child in node[2].items():
+                if d - max_distance <= child_d <= d + max_distance:
+                    stack.append(child)
+        found.sort(key=lambda x: x[0])
+        return found
+
+    def items(self) -> Iterator[Tuple[int, object]]:
+        stack = [self._root] if self._root else []
+        while stack:
+            node = stack.pop()
+            yield node[0], node[1]
+            stack.extend(node[2].values())
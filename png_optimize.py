@@ -0,0 +1,110 @@
+"""
+Size-optimized PNG encoding for Skunk Squad images.
+
+Arweave storage is paid per byte, so every rendered edition can be re-encoded
+through a few candidate PNG layouts and the smallest one kept:
+
+  - lossless: drop the alpha channel when fully opaque, use an exact palette
+    (PLTE + tRNS) when the image has at most 256 RGBA colors, and try several
+    zlib strategies at level 9 on the most promising layouts.
+  - quantize: additionally try a 256-color quantized palette, accepted only when
+    its PSNR against the original is at least `min_psnr` dB.
+
+Used by generate.py (--png-mode) inside the render worker pool.
+"""
+
+import io
+from typing import List, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+PNG_MODES = ("default", "lossless", "quantize")
+
+# zlib strategies passed through Pillow's PNG encoder (compress_type):
+# 0 = Z_DEFAULT_STRATEGY, 1 = Z_FILTERED, 3 = Z_RLE. The baseline encode is RGBA at
+# level 6, so the default strategy still needs its own level-9 pass on every layout.
+ZLIB_STRATEGIES = (0, 1, 3)
+# Cheap encode used to rank pixel layouts before the expensive level-9 passes.
+# The level-6 ranking doesn't always match the level-9 one, so the best PROBE_KEEP
+# layouts all get level-9 passes and the smallest final encode wins. With at most
+# three layouts this skips only the clear loser: the result is the smallest of the
+# encodes tried, not a guaranteed global minimum, for a third fewer level-9 passes.
+PROBE_PARAMS = {"compress_level": 6, "compress_type": 3}
+PROBE_KEEP = 2
+
+DEFAULT_MIN_PSNR = 38.0
+
+
+def encode_png(img: Image.Image, **params) -> bytes:
+    buf = io.BytesIO()
+    img.save(buf, format="PNG", **params)
+    return buf.getvalue()
+
+
+def exact_palette(img: Image.Image) -> Optional[Image.Image]:
+    """Return a lossless 'P' image (with per-entry alpha) if img has <= 256 colors, else None."""
+    rgba = np.asarray(img.convert("RGBA"))
+    packed = rgba.view(np.uint32).reshape(rgba.shape[:2])
+    colors, index = np.unique(packed, return_inverse=True)
+    if len(colors) > 256:
+        return None
+    entries = colors.view(np.uint8).reshape(-1, 4)
+    pal_img = Image.fromarray(index.reshape(packed.shape).astype(np.uint8), mode="P")
+    pal_img.putpalette(entries[:, :3].tobytes(), rawmode="RGB")
+    if (entries[:, 3] != 255).any():
+        pal_img.info["transparency"] = entries[:, 3].tobytes()
+    return pal_img
+
+
+def psnr(a: Image.Image, b: Image.Image) -> float:
+    x = np.asarray(a.convert("RGBA"), dtype=np.float32)
+    y = np.asarray(b.convert("RGBA"), dtype=np.float32)
+    mse = float(np.mean((x - y) ** 2))
+    if mse == 0:
+        return float("inf")
+    return 10.0 * np.log10(255.0 ** 2 / mse)
+
+
+def candidate_images(img: Image.Image, mode: str, min_psnr: float) -> List[Tuple[str, Image.Image]]:
+    """Pixel layouts worth encoding for the given mode (all lossless except 'quantized')."""
+    img = img.convert("RGBA")
+    candidates = [("rgba", img)]
+    if img.getextrema()[3] == (255, 255):
+        candidates.append(("rgb", img.convert("RGB")))
+    pal = exact_palette(img)
+    if pal is not None:
+        candidates.append(("palette", pal))
+    elif mode == "quantize":
+        quant = img.quantize(colors=256, method=Image.Quantize.FASTOCTREE, dither=Image.Dither.NONE)
+        if psnr(img, quant) >= min_psnr:
+            candidates.append(("quantized", quant))
+    return candidates
+
+
+def optimize_png(img: Image.Image, mode: str = "lossless",
+                 min_psnr: float = DEFAULT_MIN_PSNR) -> Tuple[bytes, str, int]:
+    """
+    Encode img as small as possible for `mode`.
+    Returns (png_bytes, method_label, baseline_size) where baseline_size is the size of
+    a plain `img.save(path)` encode, so callers can report savings.
+    """
+    baseline = encode_png(img)
+    if mode == "default":
+        return baseline, "default", len(baseline)
+
+    def encode(candidate, **params):
+        if "transparency" in candidate.info:
+            params["transparency"] = candidate.info["transparency"]
+        return encode_png(candidate, **params)
+
+    best, best_label = baseline, "default"
+    # Rank layouts with a fast probe, then spend level-9 passes on the best PROBE_KEEP
+    probes = [(len(encode(c, **PROBE_PARAMS)), i, label, c)
+              for i, (label, c) in enumerate(candidate_images(img, mode, min_psnr))]
+    for _, _, label, candidate in sorted(probes, key=lambda p: p[:2])[:PROBE_KEEP]:
+        for strategy in ZLIB_STRATEGIES:
+            data = encode(candidate, compress_level=9, compress_type=strategy)
+            if len(data) < len(best):
+                best, best_label = data, f"{label}/z{strategy}"
+    return best, best_label, len(baseline)
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Analytical Rarity Score Distribution for Skunk Squad Collection
+
+Computes the exact probability distribution of analyze_rarity's rarity score
+(and of legendary / rare trait counts) straight from the traits catalog weights,
+so tier weights can be tuned without generating a collection first.
+
+Each scored layer contributes one (tier weight, legendary?, rare?) outcome, drawn
+with the same probabilities generate.py uses. The per-layer distributions are
+convolved with NumPy into a joint distribution over (base score, legendary count,
+rare count), and the multi-legendary / multi-rare bonus tiers are then applied
+per (legendary, rare) cell, so the result matches calculate_rarity_score exactly.
+
+Assumes independent draws per layer; generate.py's duplicate-combination rejection
+slightly flattens the real distribution for small trait spaces.
+
+Usage:
+  python rarity_distribution.py
+  python rarity_distribution.py --rarity-weights "legendary=2,rare=15,common=80" --threshold 40 --threshold 60
+  python rarity_distribution.py --supply 10000 --json output/score_distribution.json
+  python rarity_distribution.py --compare output/manifest.csv    # check against a generated manifest
+"""
+
+import argparse
+import json
+from collections import defaultdict
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from analyze_rarity import RARITY_TIER_WEIGHTS, UNSCORED_LAYERS, calculate_rarity_score, rarity_bonus
+from generate import (
+    apply_rarity_weights,
+    build_layer_tables,
+    filter_usable_tables,
+    load_catalog,
+    load_from_dir,
+    parse_layer_order,
+    parse_rarity_weights,
+)
+
+# 'Ultra Rare Hunter' badge threshold (backend/db/badges-schema.sql)
+DEFAULT_THRESHOLDS = (150,)
+PERCENTILES = (50, 90, 99, 99.9)
+
+
+def layer_outcomes(opts):
+    """{(tier_weight, is_legendary, is_rare): probability} for one layer's trait options."""
+    weights = np.array([float(w) for _, _, w, _ in opts])
+    if weights.sum() <= 0:
+        weights = np.ones(len(opts))  # choose_trait falls back to uniform
+    probs = weights / weights.sum()
+    outcomes = defaultdict(float)
+    for (_, _, _, rarity), p in zip(opts, probs):
+        tier = str(rarity).lower()
+        outcomes[(RARITY_TIER_WEIGHTS.get(tier, 1), tier == "legendary", tier == "rare")] += p
+    return outcomes
+
+
+def score_distribution(layer_tables):
+    """
+    Exact distributions for the scored layers in layer_tables ({layer: options}).
+    Returns (score_pmf, legendary_pmf, rare_pmf); index = value.
+    """
+    joint = np.ones((1, 1, 1))  # P[base score, legendary count, rare count]
+    for opts in layer_tables.values():
+        outcomes = layer_outcomes(opts)
+        s, l, r = joint.shape
+        new = np.zeros((s + max(w for w, _, _ in outcomes), l + 1, r + 1))
+        for (w, is_leg, is_rare), p in outcomes.items():
+            new[w:w + s, int(is_leg):int(is_leg) + l, int(is_rare):int(is_rare) + r] += p * joint
+        joint = new
+
+    s, l, r = joint.shape
+    leg_counts, rare_counts = np.meshgrid(np.arange(l), np.arange(r), indexing="ij")
+    bonus = rarity_bonus(leg_counts, rare_counts)
+    score_pmf = np.zeros(s + int(bonus.max()))
+    for i in range(l):
+        for j in range(r):
+            b = int(bonus[i, j])
+            score_pmf[b:b + s] += joint[:, i, j]
+    return score_pmf, joint.sum(axis=(0, 2)), joint.sum(axis=(0, 1))
+
+
+def summarize(pmf):
+    values = np.arange(len(pmf))
+    mean = float((values * pmf).sum())
+    std = float(np.sqrt(((values - mean) ** 2 * pmf).sum()))
+    cdf = np.cumsum(pmf)
+    percentiles = {p: int(np.searchsorted(cdf, p / 100.0 - 1e-12)) for p in PERCENTILES}
+    nonzero = np.nonzero(pmf > 1e-15)[0]
+    return {
+        "mean": mean,
+        "std": std,
+        "min": int(nonzero[0]),
+        "max": int(nonzero[-1]),
+        "percentiles": percentiles,
+    }
+
+
+def tail_probability(pmf, threshold):
+    """P(score >= threshold)."""
+    return float(pmf[int(threshold):].sum()) if threshold < len(pmf) else 0.0
+
+
+def scored_tables(args):
+    df = load_from_dir(args.traits_dir) if args.traits_dir else load_catalog(args.csv)
+    tables = apply_rarity_weights(build_layer_tables(df), parse_rarity_weights(args.rarity_weights))
+    usable = filter_usable_tables(tables) if not args.include_missing else tables
+    layers = {}
+    for layer in parse_layer_order(args.layer_order):
+        if layer in UNSCORED_LAYERS:
+            continue
+        if layer not in usable:
+            print(f"⚠️  Layer '{layer}' has no usable traits; generate.py would refuse to run")
+            continue
+        layers[layer] = usable[layer]
+    return layers
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Exact rarity score distribution from catalog weights")
+    ap.add_argument("--csv", type=Path, default=Path(__file__).parent.joinpath("traits_catalog.csv"), help="Traits catalog CSV")
+    ap.add_argument("--traits-dir", type=Path, default=None, help="Traits directory (alternative to --csv)")
+    ap.add_argument("--rarity-weights", type=str, default=None, help="Same overrides as generate.py, e.g. 'legendary=0.1,rare=1,common=10'")
+    ap.add_argument("--layer-order", type=str, default=None, help="Same as generate.py --layer-order")
+    ap.add_argument("--include-missing", action="store_true", help="Also count traits whose asset file is missing (generate.py skips them)")
+    ap.add_argument("--threshold", type=int, action="append", default=None, help="Report P(score >= N) (repeatable; default 150)")
+    ap.add_argument("--supply", type=int, default=10000, help="Collection size for expected counts")
+    ap.add_argument("--json", type=Path, default=None, help="Write full distributions to this JSON file")
+    ap.add_argument("--compare", type=Path, default=None, help="Compare against a generated manifest.csv")
+    args = ap.parse_args()
+
+    layers = scored_tables(args)
+    if not layers:
+        print("❌ No scored layers found")
+        return 1
+    score_pmf, leg_pmf, rare_pmf = score_distribution(layers)
+    summary = summarize(score_pmf)
+    thresholds = args.threshold or list(DEFAULT_THRESHOLDS)
+
+    print("📊 RARITY SCORE DISTRIBUTION (exact, from catalog weights)")
+    print("=" * 60)
+    print(f"Scored layers: {', '.join(layers)}")
+    if args.rarity_weights:
+        print(f"Weight overrides: {args.rarity_weights}")
+    print(f"Mean {summary['mean']:.2f} | Std {summary['std']:.2f} | Range {summary['min']}–{summary['max']}")
+    print("Percentiles: " + ", ".join(f"p{p}={v}" for p, v in summary["percentiles"].items()))
+    for t in thresholds:
+        p = tail_probability(score_pmf, t)
+        print(f"P(score ≥ {t}) = {p:.6g}  → ~{p * args.supply:,.1f} of {args.supply:,} editions")
+    print("\nLegendary traits per edition:")
+    for k, p in enumerate(leg_pmf):
+        if p > 1e-12:
+            print(f"   {k}: {p:8.4%}")
+    print("Rare traits per edition:")
+    for k, p in enumerate(rare_pmf):
+        if p > 1e-12:
+            print(f"   {k}: {p:8.4%}")
+
+    if args.compare:
+        df = pd.read_csv(args.compare)
+        observed = calculate_rarity_score(df)["rarity_score"]
+        print(f"\n🔍 {args.compare}: {len(observed):,} editions, observed mean {observed.mean():.2f} "
+              f"(expected {summary['mean']:.2f} ± {summary['std'] / max(1, len(observed)) ** 0.5:.2f})")
+        for t in thresholds:
+            print(f"   score ≥ {t}: observed {(observed >= t).sum():,}, expected {tail_probability(score_pmf, t) * len(observed):,.1f}")
+
+    if args.json:
+        args.json.parent.mkdir(parents=True, exist_ok=True)
+        doc = {
+            "layers": list(layers),
+            "rarity_weights": parse_rarity_weights(args.rarity_weights),
+            "summary": summary,
+            "score_pmf": {str(v): float(p) for v, p in enumerate(score_pmf) if p > 0},
+            "legendary_pmf": [float(p) for p in leg_pmf],
+            "rare_pmf": [float(p) for p in rare_pmf],
+            "thresholds": {str(t): tail_probability(score_pmf, t) for t in thresholds},
+        }
+        args.json.write_text(json.dumps(doc, indent=2), encoding="utf-8")
+        print(f"\n📁 Distribution saved to: {args.json}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
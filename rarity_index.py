@@ -0,0 +1,358 @@
+#!/usr/bin/env python3
+"""
+Statistical Rarity Index for Skunk Squad Collection
+
+Ranks editions by how often their traits actually occur, instead of the fixed
+tier weights in analyze_rarity.py:
+
+  - information_content: Σ −log2(count(trait) / N) over layers, in bits
+  - trait_normalized:    Σ (N / count(trait)) / traits_in_layer — the usual
+                         "rarity score", exported as rarity_score
+
+A layer missing from an edition counts as the trait "None", so every edition is
+scored over the same layers. Both scores are a per-edition term that does not
+depend on N, combined with a factor shared by all editions, so ranks are kept on
+those terms: adding or changing an edition only re-scores editions sharing one of
+its traits (everything when a layer gains or loses a trait, since rarity_score is
+exported for both methods and divides by traits_in_layer). Ranks are ordered on
+exact values (the product of trait counts for IC, a Fraction for trait_normalized),
+so equal scores tie regardless of float rounding or layer order, and ties are
+broken by edition number: incremental and full builds give the same ranks.
+
+Usage:
+  python rarity_index.py                                  # from output/manifest.csv
+  python rarity_index.py --metadata output/metadata       # from metadata JSON attributes
+  python rarity_index.py --incremental                    # reuse output/rarity_index.json, only apply changes
+                                                          # (editions gone from the input are dropped)
+  python rarity_index.py --method normalized --top 50
+
+Writes output/rarity_index.json, which backend/services/badge-service.js reads for
+the 'rarity_score' badge type.
+"""
+
+import argparse
+import bisect
+import json
+import math
+import os
+import re
+from collections import Counter, defaultdict
+from fractions import Fraction
+from pathlib import Path
+
+import pandas as pd
+
+METHODS = ("ic", "normalized")
+MISSING_TRAIT = "None"
+# Attributes that are derived from rarity rather than being traits themselves
+IGNORED_TRAIT_TYPES = {"Rarity Score"}
+DEFAULT_INDEX_PATH = Path("output/rarity_index.json")
+
+
+class RarityIndex:
+    """Per-layer trait frequency tables with incrementally maintained scores and ranks."""
+
+    def __init__(self, method="ic"):
+        if method not in METHODS:
+            raise ValueError(f"Unknown method '{method}' (expected one of {', '.join(METHODS)})")
+        self.method = method
+        self.layers = []                      # known layers, in first-seen order
+        self.counts = defaultdict(Counter)    # layer -> trait -> editions with it
+        self.members = defaultdict(set)       # (layer, trait) -> editions
+        self.editions = {}                    # edition -> {layer: trait}
+        self._log_sum = {}                    # edition -> Σ log2(count)       (IC = L·log2 N − this)
+        self._inv_sum = {}                    # edition -> Σ 1/(count·k_layer) (normalized = N · this)
+        self._exact = {}                      # edition -> (Π count, Σ 1/(count·k_layer) as a Fraction)
+        self._keys = {}                       # edition -> sort key in self._ranked
+        self._ranked = []                     # sorted keys, rarest first
+
+    def __len__(self):
+        return len(self.editions)
+
+    # --- scoring ----------------------------------------------------------------------
+
+    def _rank_key(self, edition):
+        product, inv_sum = self._exact[edition]
+        return (product, edition) if self.method == "ic" else (-inv_sum, edition)
+
+    def _rescore(self, edition):
+        traits = self.editions[edition]
+        product, inv_sum = 1, Fraction(0)
+        for layer in self.layers:
+            count = self.counts[layer][traits[layer]]
+            product *= count
+            inv_sum += Fraction(1, count * len(self.counts[layer]))
+        self._exact[edition] = (product, inv_sum)
+        self._log_sum[edition] = math.log2(product)
+        self._inv_sum[edition] = float(inv_sum)
+        key = self._rank_key(edition)
+        old = self._keys.get(edition)
+        if old == key:
+            return
+        if old is not None:
+            del self._ranked[bisect.bisect_left(self._ranked, old)]
+        bisect.insort(self._ranked, key)
+        self._keys[edition] = key
+
+    def information_content(self, edition):
+        return len(self.layers) * math.log2(len(self.editions)) - self._log_sum[edition]
+
+    def trait_normalized(self, edition):
+        return len(self.editions) * self._inv_sum[edition]
+
+    def rank(self, edition):
+        """1-based rank, rarest first."""
+        return bisect.bisect_left(self._ranked, self._keys[edition]) + 1
+
+    def top(self, n):
+        return [key[1] for key in self._ranked[:n]]
+
+    # --- updates ----------------------------------------------------------------------
+
+    def _add_layer(self, layer):
+        self.layers.append(layer)
+        for edition, traits in self.editions.items():
+            traits[layer] = MISSING_TRAIT
+            self.counts[layer][MISSING_TRAIT] += 1
+            self.members[(layer, MISSING_TRAIT)].add(edition)
+
+    def _detach(self, edition):
+        """Remove an edition's traits from the tables; returns the (layer, trait) pairs touched."""
+        touched = set()
+        for layer, trait in self.editions.pop(edition).items():
+            self.counts[layer][trait] -= 1
+            self.members[(layer, trait)].discard(edition)
+            if not self.counts[layer][trait]:
+                del self.counts[layer][trait]
+                del self.members[(layer, trait)]
+            touched.add((layer, trait))
+        del self._ranked[bisect.bisect_left(self._ranked, self._keys.pop(edition))]
+        del self._log_sum[edition], self._inv_sum[edition], self._exact[edition]
+        return touched
+
+    def _affected(self, touched, layer_sizes_before):
+        """Editions whose scores change after the (layer, trait) pairs in touched changed count."""
+        if any(len(self.counts[l]) != layer_sizes_before.get(l, 0) for l in self.layers):
+            return set(self.editions)  # traits_in_layer changed: every edition's rarity_score moves
+        affected = set()
+        for pair in touched:
+            affected |= self.members.get(pair, set())
+        return affected
+
+    def set_many(self, items):
+        """
+        Add or replace editions: items = {edition: {layer: trait}}.
+        Returns the set of editions whose scores were recomputed.
+        """
+        sizes_before = {l: len(self.counts[l]) for l in self.layers}
+        touched = set()
+        new_layers = False
+        for edition, traits in items.items():
+            traits = {str(layer): str(trait) for layer, trait in traits.items()}
+            if edition in self.editions:
+                if set(traits) <= set(self.layers) and \
+                        self.editions[edition] == {l: traits.get(l, MISSING_TRAIT) for l in self.layers}:
+                    continue
+                touched |= self._detach(edition)
+            for layer in traits:
+                if layer not in self.layers:
+                    self._add_layer(layer)
+                    new_layers = True
+            full = {layer: traits.get(layer, MISSING_TRAIT) for layer in self.layers}
+            self.editions[edition] = full
+            for layer, trait in full.items():
+                self.counts[layer][trait] += 1
+                self.members[(layer, trait)].add(edition)
+                touched.add((layer, trait))
+        # Changed and new editions are members of the pairs they were added to, so they are covered
+        affected = set(self.editions) if new_layers else self._affected(touched, sizes_before)
+        for edition in affected:
+            self._rescore(edition)
+        return affected
+
+    def remove(self, edition):
+        return self.remove_many([edition])
+
+    def remove_many(self, editions):
+        """Drop editions; returns the set of remaining editions whose scores were recomputed."""
+        sizes_before = {l: len(self.counts[l]) for l in self.layers}
+        touched = set()
+        for edition in editions:
+            touched |= self._detach(edition)
+        affected = self._affected(touched, sizes_before)
+        for other in affected:
+            self._rescore(other)
+        return affected
+
+    # --- persistence ------------------------------------------------------------------
+
+    def to_json(self, extra=None):
+        """Index document; 'state' holds the exact per-edition terms so --incremental can skip a rescore."""
+        editions = {}
+        for edition in sorted(self.editions):
+            entry = {
+                "rank": self.rank(edition),
+                "rarity_score": round(self.trait_normalized(edition), 4),
+                "information_content": round(self.information_content(edition), 4),
+                "traits": self.editions[edition],
+            }
+            if extra and edition in extra:
+                entry.update(extra[edition])
+            editions[str(edition)] = entry
+        return {
+            "method": self.method,
+            "total": len(self.editions),
+            "layers": {layer: dict(self.counts[layer].most_common()) for layer in self.layers},
+            "editions": editions,
+            "state": {str(e): [self._exact[e][0], str(self._exact[e][1])] for e in sorted(self.editions)},
+        }
+
+    @classmethod
+    def from_json(cls, doc, method=None):
+        index = cls(method or doc.get("method", "ic"))
+        index.layers = list(doc.get("layers", {}))
+        state = doc.get("state", {})
+        for key, entry in doc.get("editions", {}).items():
+            edition = int(key)
+            traits = {layer: entry["traits"].get(layer, MISSING_TRAIT) for layer in index.layers}
+            index.editions[edition] = traits
+            for layer, trait in traits.items():
+                index.counts[layer][trait] += 1
+                index.members[(layer, trait)].add(edition)
+        # Indexes written before the exact state was kept store float sums: rescore those
+        if set(state) != set(doc.get("editions", {})) or \
+                any(not isinstance(s[0], int) or not isinstance(s[1], str) for s in state.values()):
+            for edition in index.editions:
+                index._rescore(edition)
+            return index
+        for edition in index.editions:
+            product, inv_sum = state[str(edition)]
+            inv_sum = Fraction(inv_sum)
+            index._exact[edition] = (product, inv_sum)
+            index._log_sum[edition], index._inv_sum[edition] = math.log2(product), float(inv_sum)
+            index._keys[edition] = index._rank_key(edition)
+        index._ranked = sorted(index._keys.values())
+        return index
+
+
+# --- inputs ------------------------------------------------------------------------------
+
+def traits_from_manifest(df):
+    """{edition: {layer: trait}} from the generator manifest's '<layer>_trait' columns."""
+    layers = [c[:-len("_trait")] for c in df.columns if c.endswith("_trait")]
+    columns = [df[f"{layer}_trait"].fillna(MISSING_TRAIT).astype(str).tolist() for layer in layers]
+    return {
+        int(edition): dict(zip(layers, values))
+        for edition, values in zip(df["edition"].tolist(), zip(*columns))
+    }
+
+
+def source_stamp(entry):
+    """Fingerprint of a metadata file; an edition whose stamp is unchanged is not re-read."""
+    stat = entry.stat()
+    return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def traits_from_metadata(directory, known_stamps=None):
+    """
+    ({edition: {trait_type: value}}, {edition: stamp}) from <edition>.json attribute lists.
+    Files whose stamp matches known_stamps are not parsed; every edition file present is stamped.
+    """
+    result, stamps = {}, {}
+    known_stamps = known_stamps or {}
+    with os.scandir(directory) as it:
+        for entry in it:
+            m = re.match(r"^(\d+)\.json$", entry.name)
+            if not m:
+                continue
+            edition = int(m.group(1))
+            try:
+                stamps[edition] = source_stamp(entry)
+            except OSError:
+                continue
+            if known_stamps.get(edition) == stamps[edition]:
+                continue
+            try:
+                with open(entry.path, "rb") as fh:
+                    meta = json.loads(fh.read())
+            except (OSError, ValueError):
+                del stamps[edition]
+                continue
+            if not isinstance(meta, dict):
+                del stamps[edition]
+                continue
+            result[edition] = {
+                str(a["trait_type"]): str(a.get("value"))
+                for a in meta.get("attributes", [])
+                if isinstance(a, dict) and "trait_type" in a and a["trait_type"] not in IGNORED_TRAIT_TYPES
+            }
+    return result, stamps
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Frequency-based rarity ranking (information content / trait-normalized)")
+    ap.add_argument("--manifest", type=Path, default=Path("output/manifest.csv"), help="Generator manifest CSV")
+    ap.add_argument("--metadata", type=Path, default=None, help="Read traits from a metadata JSON folder instead of the manifest")
+    ap.add_argument("--out", type=Path, default=DEFAULT_INDEX_PATH, help="Index JSON to write")
+    ap.add_argument("--method", choices=METHODS, default="ic", help="Rank by information content (ic) or trait-normalized score")
+    ap.add_argument("--incremental", action="store_true", help="Start from the existing --out index and only apply changed editions")
+    ap.add_argument("--top", type=int, default=25, help="How many of the rarest editions to print")
+    args = ap.parse_args()
+
+    index = RarityIndex(args.method)
+    known_stamps = {}
+    if args.incremental and args.out.exists():
+        doc = json.loads(args.out.read_text(encoding="utf-8"))
+        index = RarityIndex.from_json(doc, method=args.method)
+        known_stamps = {int(e): s for e, s in doc.get("sources", {}).items() if int(e) in index.editions}
+        print(f"📂 Loaded index with {len(index):,} editions from {args.out}")
+
+    tier_scores, stamps = {}, None
+    if args.metadata:
+        if not args.metadata.is_dir():
+            print(f"❌ Metadata folder not found: {args.metadata}")
+            return 1
+        # Incremental metadata runs only parse files whose size or mtime changed since the last run
+        items, stamps = traits_from_metadata(args.metadata, known_stamps)
+        present = set(stamps)
+    else:
+        if not args.manifest.exists():
+            print(f"❌ Manifest not found: {args.manifest}")
+            return 1
+        df = pd.read_csv(args.manifest)
+        items = traits_from_manifest(df)
+        if any(c.endswith("_rarity") for c in df.columns):
+            from analyze_rarity import calculate_rarity_score
+
+            scores = calculate_rarity_score(df)
+            tier_scores = {int(e): {"tier_score": int(s)} for e, s in zip(scores["edition"], scores["rarity_score"])}
+        present = set(items)
+
+    gone = [e for e in index.editions if e not in present]
+    changed = index.remove_many(gone) if gone else set()
+    changed = (changed | index.set_many(items)) & set(index.editions)
+    print(f"🔄 {len(items):,} editions read, {len(gone):,} removed, {len(changed):,} rescored, {len(index):,} in index")
+    if not len(index):
+        print("⚠️  No editions found; nothing to rank.")
+        return 1
+
+    label = "IC bits" if args.method == "ic" else "score"
+    print(f"\n🏆 TOP {min(args.top, len(index))} RAREST BY {'INFORMATION CONTENT' if args.method == 'ic' else 'TRAIT-NORMALIZED SCORE'}")
+    print("=" * 60)
+    for edition in index.top(args.top):
+        value = index.information_content(edition) if args.method == "ic" else index.trait_normalized(edition)
+        print(f"#{index.rank(edition):4d}  Skunk Squad #{edition:<6d} {value:10.3f} {label}")
+
+    args.out.parent.mkdir(parents=True, exist_ok=True)
+    tmp = args.out.with_name(args.out.name + ".tmp")
+    doc = index.to_json(tier_scores)
+    if stamps is not None:
+        doc["sources"] = {str(e): stamps[e] for e in sorted(stamps) if e in index.editions}
+    tmp.write_text(json.dumps(doc, separators=(",", ":")), encoding="utf-8")
+    os.replace(tmp, args.out)
+    print(f"\n📁 Index saved to: {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
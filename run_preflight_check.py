@@ -1,4 +1,5 @@
 from generate import load_catalog, build_layer_tables
+from asset_index import AssetIndex, is_remote, resolve_asset_path
 from pathlib import Path
 from functools import reduce
 from operator import mul
@@ -8,11 +9,13 @@ if __name__ == '__main__':
     tables = build_layer_tables(df)
     print('Layers found:', ', '.join(sorted(tables.keys())))
     missing = []
+    with AssetIndex() as index:
+        available = index.present([resolve_asset_path(path) for opts in tables.values() for _, path, _, _ in opts])
     for l, opts in tables.items():
         for trait, path, weight, rarity in opts:
-            p = Path(str(path))
-            if not p.exists() and not str(p).startswith('http'):
-                missing.append((l, trait, str(p)))
+            p = resolve_asset_path(path)
+            if not available[p] and not is_remote(p):
+                missing.append((l, trait, p))
     print('Missing count:', len(missing))
     for m in missing[:40]:
         print(' -', m)
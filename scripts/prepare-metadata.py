@@ -3,15 +3,125 @@
 Prepare NFT metadata for upload to IPFS or web hosting.
 This script converts the CSV manifest to individual JSON metadata files
 following the ERC-721 metadata standard.
+
+Trait columns come from the manifest itself: every '<layer>_trait' column the
+generator wrote becomes an attribute (known layers keep their display names,
+e.g. arm_left → "Left Arm"), plus 'rarity_score' when present. Attribute lists
+are built column by column, and each distinct (trait, value) attribute is
+serialized once and reused, so only name/image/URL are encoded per token.
+Files are written by a thread pool, each through a temp file + rename.
+
+Usage:
+  python scripts/prepare-metadata.py --csv output/manifest.csv --images output/images --output final_metadata
+  python scripts/prepare-metadata.py --csv output/manifest.csv --images output/images --output final_metadata \
+      --base-uri ipfs://IMAGES_CID/ --style compact --workers 16
 """
 
 import os
+import sys
 import json
+import time
 import pandas as pd
 import argparse
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from pathlib import Path
 
-def create_metadata_files(csv_path, images_dir, output_dir, base_image_uri=""):
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from metadata_writer import METADATA_STYLES, dumps_metadata, write_bytes
+
+# Display names for the layers this script has always labelled; other layers are title-cased
+TRAIT_LABELS = {
+    'background': 'Background',
+    'body': 'Body',
+    'head': 'Head',
+    'eyes': 'Eyes',
+    'mouth': 'Mouth',
+    'arm_left': 'Left Arm',
+    'arm_right': 'Right Arm',
+    'accessory': 'Accessory',
+}
+WRITE_CHUNK = 512
+
+
+def trait_columns(columns):
+    """[(column, trait_type)] for the manifest's '<layer>_trait' columns, known layers first."""
+    layers = [c[:-len('_trait')] for c in columns if c.endswith('_trait')]
+    ordered = [l for l in TRAIT_LABELS if l in layers] + [l for l in layers if l not in TRAIT_LABELS]
+    return [(f'{l}_trait', TRAIT_LABELS.get(l, l.replace('_', ' ').title())) for l in ordered]
+
+
+def attribute_columns(df):
+    """
+    Per-token attribute lists as [[(trait_type, value), ...]], built one column at a time.
+    Missing values and the 'None' trait are left out, as before.
+    """
+    attributes = [[] for _ in range(len(df))]
+    columns = trait_columns(df.columns)
+    if 'rarity_score' in df.columns:
+        columns.append(('rarity_score', 'Rarity Score'))
+    for column, trait_type in columns:
+        series = df[column]
+        keep = series.notna() & (series.astype(str) != 'None')
+        values = series.tolist()  # plain Python str/int/float, safe for json
+        for i in keep.to_numpy().nonzero()[0].tolist():
+            attributes[i].append((trait_type, values[i]))
+    return attributes
+
+
+class TokenRenderer:
+    """
+    Renders token metadata ({name, description, image, external_url, attributes}) with
+    per-attribute fragments cached. render() produces exactly dumps_metadata(meta, style).
+    """
+
+    def __init__(self, base_image_uri, style='pretty'):
+        if style not in METADATA_STYLES:
+            raise ValueError(f"Unknown metadata style '{style}'")
+        self.base_image_uri = base_image_uri
+        self.style = style
+        self._fragments = {}
+
+    def _str(self, value):
+        return json.dumps(value, ensure_ascii=self.style == 'pretty')
+
+    def _fragment(self, trait_type, value):
+        key = (trait_type, type(value), value)
+        frag = self._fragments.get(key)
+        if frag is None:
+            attr = {"trait_type": trait_type, "value": value}
+            if self.style == 'pretty':
+                frag = json.dumps(attr, indent=2).replace('\n', '\n    ')
+            else:
+                frag = json.dumps(attr, separators=(',', ':'), ensure_ascii=False, sort_keys=self.style == 'canonical')
+            self._fragments[key] = frag
+        return frag
+
+    def render(self, token_id, attributes):
+        name = self._str(f"Skunk Squad #{token_id}")
+        description = self._str(f"Skunk Squad #{token_id} is a unique NFT with {len(attributes)} traits.")
+        image = self._str(f"{self.base_image_uri}{token_id}.png")
+        url = self._str(f"https://skunksquadnft.com/token/{token_id}")
+        frags = [self._fragment(t, v) for t, v in attributes]
+        if self.style == 'pretty':
+            attrs = ('[\n    ' + ',\n    '.join(frags) + '\n  ]') if frags else '[]'
+            text = (f'{{\n  "name": {name},\n  "description": {description},\n  "image": {image},'
+                    f'\n  "external_url": {url},\n  "attributes": {attrs}\n}}')
+        elif self.style == 'compact':
+            text = (f'{{"name":{name},"description":{description},"image":{image},'
+                    f'"external_url":{url},"attributes":[{",".join(frags)}]}}')
+        else:
+            text = (f'{{"attributes":[{",".join(frags)}],"description":{description},'
+                    f'"external_url":{url},"image":{image},"name":{name}}}')
+        return text.encode('utf-8')
+
+
+def _write_chunk(jobs, fsync):
+    for path, data in jobs:
+        write_bytes(path, data, fsync=fsync, atomic=True)
+    return len(jobs)
+
+
+def create_metadata_files(csv_path, images_dir, output_dir, base_image_uri="", style="pretty", fsync=False, workers=None):
     """
     Create individual JSON metadata files for each NFT.
     
@@ -20,10 +130,14 @@ def create_metadata_files(csv_path, images_dir, output_dir, base_image_uri=""):
         images_dir: Directory containing the generated images
         output_dir: Directory to save JSON metadata files
         base_image_uri: Base URI where images will be hosted (e.g., "ipfs://QmHash/" or "https://api.skunksquadnft.com/images/")
+        style: JSON layout, one of metadata_writer.METADATA_STYLES
+        fsync: fsync each file before it is renamed into place (slower)
+        workers: Writer threads (default: min(32, CPU count + 4))
     """
     
     # Read the manifest CSV
     print(f"📖 Reading manifest from: {csv_path}")
+    started = time.perf_counter()
     df = pd.read_csv(csv_path)
     
     # Create output directory
@@ -39,10 +153,6 @@ def create_metadata_files(csv_path, images_dir, output_dir, base_image_uri=""):
         "fee_recipient": "0x16Be43d7571Edf69cec8D6221044638d161aA994"
     }
     
-    # Save contract metadata
-    with open(os.path.join(output_dir, "contract.json"), 'w') as f:
-        json.dump(contract_metadata, f, indent=2)
-    
     # Unrevealed metadata
     unrevealed_metadata = {
         "name": "Skunk Squad NFT",
@@ -51,64 +161,34 @@ def create_metadata_files(csv_path, images_dir, output_dir, base_image_uri=""):
         "attributes": []
     }
     
-    # Save unrevealed metadata
-    with open(os.path.join(output_dir, "unrevealed.json"), 'w') as f:
-        json.dump(unrevealed_metadata, f, indent=2)
-    
     print(f"📁 Creating metadata files in: {output_dir}")
     print(f"🖼️  Base image URI: {base_image_uri}")
+    traits = trait_columns(df.columns)
+    print(f"🏷️  Trait columns: {', '.join(label for _, label in traits) or 'none'}")
     
-    # Process each NFT
-    for index, row in df.iterrows():
-        token_id = index + 1  # Token IDs start from 1
-        
-        # Extract attributes from CSV columns
-        attributes = []
-        
-        # Map CSV columns to trait attributes
-        trait_mapping = {
-            'background_trait': 'Background',
-            'body_trait': 'Body',
-            'head_trait': 'Head',
-            'eyes_trait': 'Eyes',
-            'mouth_trait': 'Mouth',
-            'arm_left_trait': 'Left Arm',
-            'arm_right_trait': 'Right Arm',
-            'accessory_trait': 'Accessory'
-        }
-        
-        for csv_col, trait_name in trait_mapping.items():
-            if csv_col in row and pd.notna(row[csv_col]) and row[csv_col] != 'None':
-                attributes.append({
-                    "trait_type": trait_name,
-                    "value": row[csv_col]
-                })
-        
-        # Add rarity score if available
-        if 'rarity_score' in row and pd.notna(row['rarity_score']):
-            attributes.append({
-                "trait_type": "Rarity Score",
-                "value": row['rarity_score']
-            })
-        
-        # Create metadata for this token
-        metadata = {
-            "name": f"Skunk Squad #{token_id}",
-            "description": f"Skunk Squad #{token_id} is a unique NFT with {len(attributes)} traits.",
-            "image": f"{base_image_uri}{token_id}.png",
-            "external_url": f"https://skunksquadnft.com/token/{token_id}",
-            "attributes": attributes
-        }
-        
-        # Save individual metadata file
-        metadata_file = os.path.join(output_dir, f"{token_id}.json")
-        with open(metadata_file, 'w') as f:
-            json.dump(metadata, f, indent=2)
-        
-        if token_id % 100 == 0:
-            print(f"✅ Processed {token_id} metadata files...")
+    attributes = attribute_columns(df)
+    renderer = TokenRenderer(base_image_uri, style)
+    workers = workers or min(32, (os.cpu_count() or 1) + 4)
+    written = 0
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = {pool.submit(_write_chunk, [
+            (os.path.join(output_dir, "contract.json"), dumps_metadata(contract_metadata, style)),
+            (os.path.join(output_dir, "unrevealed.json"), dumps_metadata(unrevealed_metadata, style)),
+        ], fsync)}
+        # Token IDs start from 1; chunks are rendered here while earlier ones are being written
+        for start in range(0, len(df), WRITE_CHUNK):
+            jobs = [(os.path.join(output_dir, f"{i + 1}.json"), renderer.render(i + 1, attributes[i]))
+                    for i in range(start, min(start + WRITE_CHUNK, len(df)))]
+            pending.add(pool.submit(_write_chunk, jobs, fsync))
+            if len(pending) > 2 * workers:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    written += future.result()
+        for future in pending:
+            written += future.result()
     
-    print(f"🎉 Created {len(df)} metadata files successfully!")
+    elapsed = time.perf_counter() - started
+    print(f"🎉 Created {len(df)} metadata files successfully! ({written} files written in {elapsed:.2f}s)")
     print(f"📄 Contract metadata: {output_dir}/contract.json")
     print(f"🎭 Unrevealed metadata: {output_dir}/unrevealed.json")
     print(f"🔢 Token metadata: {output_dir}/1.json to {output_dir}/{len(df)}.json")
@@ -126,6 +206,9 @@ def main():
     parser.add_argument('--images', required=True, help='Directory containing images')
     parser.add_argument('--output', required=True, help='Output directory for metadata')
     parser.add_argument('--base-uri', default='', help='Base URI for images (e.g., ipfs://QmHash/ or https://api.domain.com/images/)')
+    parser.add_argument('--style', choices=METADATA_STYLES, default='pretty', help='JSON layout: pretty, compact or canonical (minified, sorted keys)')
+    parser.add_argument('--fsync', action='store_true', help='fsync each file before renaming it into place')
+    parser.add_argument('--workers', type=int, default=None, help='Writer threads (default: min(32, CPU count + 4))')
     
     args = parser.parse_args()
     
@@ -143,7 +226,10 @@ def main():
             csv_path=args.csv,
             images_dir=args.images,
             output_dir=args.output,
-            base_image_uri=args.base_uri
+            base_image_uri=args.base_uri,
+            style=args.style,
+            fsync=args.fsync,
+            workers=args.workers
         )
         
         print("\n📋 Summary:")
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Test local IPFS CID computation and CAR output against known CIDs
+"""
+
+import hashlib
+import json
+import tempfile
+from pathlib import Path
+
+from ipfs_car import (
+    CHUNK_SIZE, CODEC_DAG_PB, CODEC_RAW, add_file_blocks, build_collection_car, build_directory,
+    bytes_chunks, cid_to_str, make_cid,
+)
+
+
+def file_cid(data):
+    blocks = []
+    cid, _, size = add_file_blocks(bytes_chunks(data), lambda c, b: blocks.append((c, b)))
+    assert size == len(data)
+    return cid_to_str(cid), blocks
+
+
+def read_varint(buf, i):
+    value = shift = 0
+    while True:
+        byte = buf[i]
+        value |= (byte & 0x7F) << shift
+        i += 1
+        if not byte & 0x80:
+            return value, i
+        shift += 7
+
+
+def car_blocks(path):
+    """{cid bytes: block} from a CARv1 file, checking each block hashes to its CID."""
+    buf = Path(path).read_bytes()
+    length, i = read_varint(buf, 0)
+    i += length
+    blocks = {}
+    while i < len(buf):
+        length, i = read_varint(buf, i)
+        section = buf[i:i + length]
+        i += length
+        codec = section[1]
+        cid, block = section[:36], section[36:]
+        assert cid == make_cid(codec, block)
+        blocks[cid] = block
+    return blocks
+
+
+def test_known_cids():
+    # `ipfs add --cid-version 1 --raw-leaves` / `ipfs object new unixfs-dir` reference values
+    assert file_cid(b"")[0] == "bafkreihdwdcefgh4dqkjv67uzcmw7ojee6xedzdetojuzjevtenxquvyku"
+    assert file_cid(b"hello world")[0] == "bafkreifzjut3te2nhyekklss27nh3k72ysco7y32koao5eei66wof36n5e"
+    empty_dir, _ = build_directory([], lambda c, b: None)
+    assert cid_to_str(empty_dir) == "bafybeiczsscdsbs7ffqz55asqdf3smv6klcw3gofszvwlyarci47bgf354"
+
+
+def test_multi_chunk_file_links_raw_leaves():
+    data = bytes(range(256)) * (CHUNK_SIZE // 256 * 2 + 10)
+    cid, blocks = file_cid(data)
+    assert cid.startswith("bafybei")  # dag-pb root over raw leaves
+    leaves = [b for c, b in blocks if c[1] == CODEC_RAW]
+    assert b"".join(leaves) == data and len(leaves) == 3
+    assert [c[1] for c, _ in blocks].count(CODEC_DAG_PB) == 1
+
+
+def test_collection_car_keeps_metadata_layout_and_cids():
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        (tmp / "images").mkdir()
+        (tmp / "metadata").mkdir()
+        for i in (1, 2):
+            (tmp / "images" / f"{i}.png").write_bytes(hashlib.sha256(bytes([i])).digest() * 100)
+            meta = {"name": f"Skünk #{i}", "image": f"ipfs://OLD/{i}.png"}
+            (tmp / "metadata" / f"{i}.json").write_bytes(
+                json.dumps(meta, separators=(",", ":"), ensure_ascii=False).encode("utf-8"))
+        result = build_collection_car(tmp / "images", tmp / "metadata", tmp / "c.car", workers=1)
+
+        image_cids = {i: file_cid((tmp / "images" / f"{i}.png").read_bytes())[0] for i in (1, 2)}
+        blocks = car_blocks(tmp / "c.car")
+        for i in (1, 2):
+            raw = (tmp / "metadata" / f"{i}.json").read_bytes()
+            expected = {"name": f"Skünk #{i}", "image": f"ipfs://{result['images']}/{i}.png"}
+            assert raw == json.dumps(expected, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+            assert make_cid(CODEC_RAW, raw) in blocks
+        assert all(any(cid_to_str(c) == image_cids[i] for c in blocks) for i in (1, 2))
+
+        # Same inputs, same CIDs (metadata already points at the images CID now)
+        again = build_collection_car(tmp / "images", tmp / "metadata", tmp / "d.car", workers=2)
+        assert again["root"] == result["root"]
+
+
+if __name__ == "__main__":
+    test_known_cids()
+    test_multi_chunk_file_links_raw_leaves()
+    test_collection_car_keeps_metadata_layout_and_cids()
+    print("✅ ipfs_car tests passed")
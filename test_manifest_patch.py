@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Test manifest diff / patch round trips and stale-patch rejection
+"""
+
+import csv
+import json
+import tempfile
+from pathlib import Path
+
+from manifest_patch import (
+    ManifestPatch, PatchConflict, apply_patch, changelog_path, diff_manifests, export_targets,
+    load_manifest, patch_manifest,
+)
+from manifest_writer import write_manifest
+
+
+def tx(label):
+    return (label * 43)[:43]
+
+
+def make_manifest(path, paths, index="metadata/1"):
+    write_manifest(path, list(paths.items()), index=index)
+    return load_manifest(path)
+
+
+def test_diff_apply_round_trip():
+    old = {"metadata/1": tx("a"), "metadata/2": tx("b"), "images/1": tx("c"), "images/2": tx("d")}
+    new = {"metadata/1": tx("a"), "metadata/2": tx("B"), "images/1": tx("c"), "metadata/3": tx("e")}
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        manifest, paths = make_manifest(tmp / "old.json", old)
+        patch = diff_manifests(paths, new)
+        assert (patch.added, patch.removed, patch.retargeted) == (
+            {"metadata/3": tx("e")}, {"images/2": tx("d")}, {"metadata/2": (tx("b"), tx("B"))})
+
+        patch.save(tmp / "p.json")
+        writer = apply_patch(manifest, ManifestPatch.load(tmp / "p.json"), tmp / "new.json")
+        patched, patched_paths = load_manifest(tmp / "new.json")
+        assert patched_paths == new and patched["index"] == {"path": "metadata/1"} and writer.index_found
+
+        # Reverse patch restores the original manifest
+        apply_patch(patched, diff_manifests(patched_paths, paths), tmp / "back.json")
+        assert load_manifest(tmp / "back.json")[1] == old
+
+
+def test_unknown_top_level_keys_survive():
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        doc = {"manifest": "arweave/paths", "version": "0.2.0", "index": {"path": "metadata/1"},
+               "fallback": {"id": tx("f")}, "paths": {"metadata/1": {"id": tx("a")}}}
+        (tmp / "m.json").write_text(json.dumps(doc, indent=2), encoding="utf-8")
+        patch_manifest(tmp / "m.json", [("metadata/1", tx("A"))], tmp / "v2.json")
+        doc["paths"]["metadata/1"]["id"] = tx("A")
+        assert (tmp / "v2.json").read_text(encoding="utf-8") == json.dumps(doc, indent=2)
+
+
+def test_stale_patch_rejected_unless_forced():
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        manifest, paths = make_manifest(tmp / "m.json", {"metadata/1": tx("a"), "metadata/2": tx("b")})
+        stale = ManifestPatch(added={"metadata/1": tx("x")}, removed={"metadata/2": tx("z")},
+                              retargeted={"metadata/9": (tx("q"), tx("r"))})
+        (tmp / "out.json").write_text("previous", encoding="utf-8")
+        try:
+            apply_patch(manifest, stale, tmp / "out.json")
+        except PatchConflict as e:
+            assert str(e).startswith("3 conflict(s)")
+        else:
+            raise AssertionError("stale patch applied")
+        assert (tmp / "out.json").read_text(encoding="utf-8") == "previous"
+
+        apply_patch(manifest, stale, tmp / "out.json", strict=False)
+        assert load_manifest(tmp / "out.json")[1] == {"metadata/1": tx("x")}
+
+
+def test_patch_manifest_from_export():
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        make_manifest(tmp / "m.json", {"metadata/1": tx("a"), "images/1": tx("b"), "metadata/contract": tx("c")})
+        with open(tmp / "export.csv", "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(["File Name", "Data Transaction ID"])
+            writer.writerows([["1.json", tx("A")], ["1.png", tx("b")], ["contract.json", tx("c")],
+                              ["2.json", tx("d")], ["notes.txt", tx("e")]])
+        targets = list(export_targets(tmp / "export.csv", "folder"))
+        assert ("notes.txt", tx("e")) not in targets and len(targets) == 4
+
+        patch, unknown, writer = patch_manifest(tmp / "m.json", targets, tmp / "v2.json")
+        assert unknown == {"metadata/2": tx("d")}
+        assert patch.retargeted == {"metadata/1": (tx("a"), tx("A"))} and not patch.added
+        assert load_manifest(tmp / "v2.json")[1]["metadata/1"] == tx("A")
+        with open(changelog_path(tmp / "v2.json"), newline="", encoding="utf-8") as f:
+            assert list(csv.reader(f)) == [["change", "path", "old_id", "new_id"],
+                                           ["retargeted", "metadata/1", tx("a"), tx("A")]]
+        assert json.loads((tmp / "v2.json").read_text(encoding="utf-8"))["version"] == "0.1.0"
+
+
+if __name__ == "__main__":
+    test_diff_apply_round_trip()
+    test_unknown_top_level_keys_survive()
+    test_stale_patch_rejected_unless_forced()
+    test_patch_manifest_from_export()
+    print("✅ manifest_patch tests passed")
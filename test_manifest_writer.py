@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Test the streaming manifest writer against json.dump output
+"""
+
+import json
+import random
+import tempfile
+from pathlib import Path
+
+from manifest_writer import ManifestError, ManifestWriter, path_sort_key, sorted_paths, write_manifest
+
+
+def expected_manifest(pairs, index=None, version="0.1.0"):
+    manifest = {"manifest": "arweave/paths", "version": version}
+    if index is not None:
+        manifest["index"] = {"path": index}
+    manifest["paths"] = {path: {"id": txid} for path, txid in pairs}
+    return manifest
+
+
+def sample_pairs(n, seed=0):
+    rng = random.Random(seed)
+    paths = [f"metadata/{i}" for i in range(1, n + 1)] + [f"images/{i}" for i in range(1, n + 1)]
+    paths += ["contract.json", "unrevealed.json", "dir/ü name.json"]
+    return sorted_paths((p, "".join(rng.choice("abcXYZ019_-") for _ in range(43))) for p in paths)
+
+
+def test_pretty_is_byte_identical_to_json_dump():
+    with tempfile.TemporaryDirectory() as tmp:
+        for pairs, index in ((sample_pairs(25), "metadata/1"), (sample_pairs(3), None), ([], None), ([], "x")):
+            out = Path(tmp) / "m.json"
+            paths, size = write_manifest(out, pairs, index=index)
+            with open(Path(tmp) / "ref.json", "w", encoding="utf-8") as f:
+                json.dump(expected_manifest(pairs, index), f, indent=2)
+            assert out.read_bytes() == (Path(tmp) / "ref.json").read_bytes()
+            assert (paths, size) == (len(pairs), out.stat().st_size)
+
+
+def test_minified_and_late_index():
+    pairs = sample_pairs(10)
+    with tempfile.TemporaryDirectory() as tmp:
+        out = Path(tmp) / "m.json"
+        write_manifest(out, pairs, style="minified", index="metadata/1")
+        assert out.read_bytes() == json.dumps(expected_manifest(pairs, "metadata/1"), separators=(",", ":")).encode()
+
+        with ManifestWriter(out, style="minified") as manifest:
+            manifest.add_all(pairs)
+            manifest.set_index("metadata/2")
+        doc = json.loads(out.read_text(encoding="utf-8"))
+        assert doc["index"] == {"path": "metadata/2"} and len(doc["paths"]) == len(pairs)
+
+
+def test_extra_top_level_keys_keep_their_place():
+    pairs = sample_pairs(4)
+    fallback = {"id": "f" * 43}
+    with tempfile.TemporaryDirectory() as tmp:
+        out = Path(tmp) / "m.json"
+        for style, dump in (("pretty", lambda m: json.dumps(m, indent=2)),
+                            ("minified", lambda m: json.dumps(m, separators=(",", ":")))):
+            write_manifest(out, pairs, style=style, index="metadata/1", extra={"fallback": fallback})
+            manifest = expected_manifest(pairs, "metadata/1")
+            manifest = {**{k: v for k, v in manifest.items() if k != "paths"}, "fallback": fallback, "paths": manifest["paths"]}
+            assert out.read_text(encoding="utf-8") == dump(manifest)
+
+            write_manifest(out, pairs, style=style, trailing={"fallback": fallback, "note": ["a", 1]})
+            manifest = {**expected_manifest(pairs), "fallback": fallback, "note": ["a", 1]}
+            assert out.read_text(encoding="utf-8") == dump(manifest)
+
+
+def test_duplicates_rejected_and_previous_file_kept():
+    pairs = sample_pairs(10)
+    shuffled = pairs[:]
+    random.Random(1).shuffle(shuffled)
+    with tempfile.TemporaryDirectory() as tmp:
+        out = Path(tmp) / "m.json"
+        out.write_text("previous", encoding="utf-8")
+        for bad in (pairs + [pairs[-1]], shuffled + [shuffled[3]]):
+            try:
+                write_manifest(out, bad)
+            except ManifestError:
+                pass
+            else:
+                raise AssertionError("duplicate path accepted")
+            assert out.read_text(encoding="utf-8") == "previous"
+            assert not list(Path(tmp).glob("*.tmp"))
+        write_manifest(out, shuffled)  # unsorted but unique is fine
+        assert json.loads(out.read_text(encoding="utf-8"))["paths"].keys() == dict(shuffled).keys()
+
+
+def test_path_sort_key_is_natural():
+    paths = ["metadata/10", "metadata/2", "contract.json", "metadata/1", "images/2", "10", "9"]
+    assert sorted(paths, key=path_sort_key) == ["9", "10", "contract.json", "images/2",
+                                                "metadata/1", "metadata/2", "metadata/10"]
+
+
+if __name__ == "__main__":
+    test_pretty_is_byte_identical_to_json_dump()
+    test_minified_and_late_index()
+    test_extra_top_level_keys_keep_their_place()
+    test_duplicates_rejected_and_previous_file_kept()
+    test_path_sort_key_is_natural()
+    print("✅ ManifestWriter tests passed")
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Test RarityIndex incremental updates against full rebuilds
+"""
+
+import json
+import random
+import tempfile
+from pathlib import Path
+
+from rarity_index import RarityIndex, traits_from_metadata
+
+
+def random_traits(rng, layers=4, traits_per_layer=4):
+    return {f"layer{l}": f"t{rng.randrange(traits_per_layer)}" for l in range(rng.randrange(1, layers + 1))}
+
+
+def snapshot(index):
+    doc = index.to_json()
+    return {e: (v["rank"], v["rarity_score"], v["information_content"]) for e, v in doc["editions"].items()}
+
+
+def full_build(method, editions):
+    index = RarityIndex(method)
+    index.set_many(editions)
+    return index
+
+
+def test_incremental_matches_full_rebuild():
+    for method in ("ic", "normalized"):
+        for seed in range(40):
+            rng = random.Random(seed)
+            editions = {e: random_traits(rng) for e in range(1, 31)}
+            index = full_build(method, editions)
+            for _ in range(8):
+                batch = {rng.randrange(1, 41): random_traits(rng) for _ in range(rng.randrange(1, 5))}
+                index.set_many(batch)
+                editions.update(batch)
+                if rng.random() < 0.3 and len(editions) > 1:
+                    gone = rng.choice(sorted(editions))
+                    index.remove(gone)
+                    del editions[gone]
+                assert snapshot(index) == snapshot(full_build(method, editions)), (method, seed)
+
+
+def test_unchanged_editions_are_not_rescored():
+    rng = random.Random(3)
+    editions = {e: random_traits(rng) for e in range(1, 31)}
+    index = full_build("ic", editions)
+    assert index.set_many(editions) == set()
+    assert index.remove_many([]) == set()
+    index.remove_many([1, 2, 3])
+    for e in (1, 2, 3):
+        del editions[e]
+    assert snapshot(index) == snapshot(full_build("ic", editions))
+
+
+def test_metadata_stamps_skip_unchanged_files():
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        for e in (1, 2):
+            (tmp / f"{e}.json").write_text(json.dumps({"attributes": [{"trait_type": "Hat", "value": f"h{e}"}]}))
+        (tmp / "3.json").write_text("[]")
+        items, stamps = traits_from_metadata(tmp)
+        assert items == {1: {"Hat": "h1"}, 2: {"Hat": "h2"}} and set(stamps) == {1, 2}
+
+        (tmp / "2.json").write_text(json.dumps({"attributes": [{"trait_type": "Hat", "value": "edited"}]}))
+        items, again = traits_from_metadata(tmp, stamps)
+        assert items == {2: {"Hat": "edited"}} and set(again) == {1, 2}
+
+
+def test_ties_ranked_by_edition_regardless_of_layer_order():
+    # Tied editions whose float sums came out one ulp apart depending on layer order
+    a = {1: {"l0": "t0", "l1": "t2", "l2": "t1", "l3": "t0"}, 2: {"l0": "t1", "l1": "t1", "l2": "t1", "l3": "t2"},
+         3: {"l0": "t0", "l1": "t2", "l2": "t2", "l3": "t1"}, 4: {"l0": "t2", "l1": "t1", "l2": "t2", "l3": "t2"}}
+    b = {e: dict(reversed(list(t.items()))) for e, t in a.items()}
+    for method in ("ic", "normalized"):
+        index_a, index_b = full_build(method, a), full_build(method, b)
+        assert {e: index_a.rank(e) for e in a} == {e: index_b.rank(e) for e in b}
+        assert len({index_a.rank(e) for e in a}) == len(a)
+
+
+def test_json_round_trip_keeps_ranks():
+    rng = random.Random(7)
+    editions = {e: random_traits(rng) for e in range(1, 51)}
+    for method in ("ic", "normalized"):
+        index = full_build(method, editions)
+        doc = json.loads(json.dumps(index.to_json()))
+        assert snapshot(RarityIndex.from_json(doc)) == snapshot(index)
+        other = "normalized" if method == "ic" else "ic"
+        assert snapshot(RarityIndex.from_json(doc, method=other)) == snapshot(full_build(other, editions))
+
+
+if __name__ == "__main__":
+    test_incremental_matches_full_rebuild()
+    test_unchanged_editions_are_not_rescored()
+    test_metadata_stamps_skip_unchanged_files()
+    test_ties_ranked_by_edition_regardless_of_layer_order()
+    test_json_round_trip_keeps_ranks()
+    print("✅ RarityIndex tests passed")
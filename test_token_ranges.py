@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Test TokenRanges set algebra against plain Python sets
+"""
+
+import random
+
+from token_ranges import TokenRanges, format_run
+
+
+def random_ids(rng, limit=60):
+    return {rng.randrange(limit) for _ in range(rng.randrange(0, limit))}
+
+
+def check_runs(r):
+    # Normalized: sorted, non-empty, neither overlapping nor touching
+    for (s1, e1), (s2, e2) in zip(r.runs, r.runs[1:]):
+        assert s1 <= e1 and e1 + 1 < s2
+    assert all(s <= e for s, e in r.runs)
+
+
+def test_set_algebra_matches_python_sets():
+    rng = random.Random(0)
+    for _ in range(2000):
+        a, b = random_ids(rng), random_ids(rng)
+        ra, rb = TokenRanges.from_ids(a), TokenRanges.from_ids(b)
+        for result, expected in ((ra | rb, a | b), (ra & rb, a & b), (ra - rb, a - b), (rb - ra, b - a)):
+            check_runs(result)
+            assert set(result) == expected and len(result) == len(expected)
+            assert result == TokenRanges.from_ids(expected)
+        if a:
+            assert set(ra.gaps()) == set(range(min(a), max(a) + 1)) - a
+        assert set(ra.gaps(-3, 70)) == set(range(-3, 71)) - a
+        assert all((i in ra) == (i in a) for i in range(-2, 63))
+
+
+def test_unnormalized_runs_and_parse_round_trip():
+    rng = random.Random(1)
+    for _ in range(500):
+        runs = [(s, s + rng.randrange(-2, 6)) for s in (rng.randrange(50) for _ in range(rng.randrange(8)))]
+        expected = {i for s, e in runs for i in range(s, e + 1)}
+        r = TokenRanges(runs)
+        check_runs(r)
+        assert set(r) == expected and TokenRanges.parse(str(r)) == r
+        assert (r.min, r.max) == ((min(expected), max(expected)) if expected else (None, None))
+    assert str(TokenRanges([(5, 9), (1, 3), (4, 4), (12, 12)])) == "1-9,12"
+    assert TokenRanges.parse(" 1-3, 5 ,,7-7") == TokenRanges.from_ids([1, 2, 3, 5, 7])
+    assert not TokenRanges.parse("") and not TokenRanges.span(5, 4) and not TokenRanges().gaps()
+    assert hash(TokenRanges.parse("1-3")) == hash(TokenRanges.from_ids([3, 1, 2]))
+
+
+def test_format_run():
+    assert format_run(17, 17) == "#17"
+    assert format_run(4001, 4250) == "#4,001 to #4,250 (250 NFTs)"
+
+
+if __name__ == "__main__":
+    test_set_algebra_matches_python_sets()
+    test_unnormalized_runs_and_parse_round_trip()
+    test_format_run()
+    print("✅ TokenRanges tests passed")
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Test byte-level URI splicing, escape handling and the full-parse fallback
+"""
+
+import json
+import tempfile
+from pathlib import Path
+
+from uri_rewriter import rewrite_bytes, rewrite_directory, rewrite_parsed, set_field, string_spans
+
+RULES = [("ipfs://OLD/", "ar://NEW/")]
+FIELDS = ("image", "external_url")
+
+
+def expected(raw):
+    meta = json.loads(raw)
+    rewrite_parsed(meta, FIELDS, RULES)
+    return meta
+
+
+def test_only_top_level_fields_are_spliced():
+    raw = ('{\n  "name": "has \\"image\\": \\"ipfs://OLD/x\\"",\n  "image": "ipfs://OLD/1.png",\n'
+           '  "attributes": [{"image": "ipfs://OLD/nested"}],\n  "external_url": "ipfs://OLD/page"\n}').encode()
+    new, fallback = rewrite_bytes(raw, FIELDS, RULES)
+    assert not fallback
+    assert new == raw.replace(b'"ipfs://OLD/1.png"', b'"ar://NEW/1.png"').replace(b'"ipfs://OLD/page"', b'"ar://NEW/page"')
+    assert json.loads(new) == expected(raw)
+
+
+def test_escapes_follow_the_file():
+    # Escaped values are matched on their decoded text and re-encoded in the file's convention
+    ascii_raw = b'{"name":"Sk\\u00fcnk","image":"ipfs:\\/\\/OLD\\/caf\\u00e9.png"}'
+    new, _ = rewrite_bytes(ascii_raw, FIELDS, [("ipfs://OLD/", "ar://NÉW/")])
+    assert new == b'{"name":"Sk\\u00fcnk","image":"ar://N\\u00c9W/caf\\u00e9.png"}'
+
+    utf8_raw = '{"name":"Skünk","image":"ipfs://OLD/café.png"}'.encode("utf-8")
+    new, _ = rewrite_bytes(utf8_raw, FIELDS, [("ipfs://OLD/", "ar://NÉW/")])
+    assert new == '{"name":"Skünk","image":"ar://NÉW/café.png"}'.encode("utf-8")
+
+    quoted = b'{"image":"ipfs://OLD/a\\"b\\\\c.png"}'
+    new, _ = rewrite_bytes(quoted, FIELDS, RULES)
+    assert json.loads(new) == {"image": 'ar://NEW/a"b\\c.png'}
+
+
+def test_duplicate_keys_and_unchanged_files():
+    raw = b'{"image": "ipfs://OLD/first", "image": "ipfs://OLD/second"}'
+    spans = string_spans(raw.decode(), ("image",))
+    assert spans["image"][2] == "ipfs://OLD/second"
+    assert json.loads(rewrite_bytes(raw, FIELDS, RULES)[0]) == expected(raw)
+    assert rewrite_bytes(b'{"image": "ar://NEW/1.png"}', FIELDS, RULES) == (None, False)
+
+
+def test_fallback_for_unexpected_structure():
+    raw = b'[{"image": "ipfs://OLD/1.png"}]'
+    assert rewrite_bytes(raw, FIELDS, RULES) == (None, True)
+    pretty = b'{\n  "image": "ipfs://OLD/1.png",\n  "image": 5\n}'
+    new, fallback = rewrite_bytes(pretty, FIELDS, RULES)
+    assert new is None and not fallback  # the later non-string value wins, as in json.loads
+
+
+def test_set_field_keeps_layout():
+    compact = '{"name":"Skünk","image":"ipfs://OLD/1.png","attributes":[]}'.encode("utf-8")
+    assert set_field(compact, "image", "ar://X") == '{"name":"Skünk","image":"ar://X","attributes":[]}'.encode("utf-8")
+    assert set_field(compact, "image", "ipfs://OLD/1.png") is None
+    assert set_field(b'{\n  "image": 5\n}', "image", "ar://X") == b'{\n  "image": "ar://X"\n}'
+
+
+def test_rewrite_directory_with_verification():
+    with tempfile.TemporaryDirectory() as tmp:
+        src, out = Path(tmp) / "src", Path(tmp) / "out"
+        src.mkdir()
+        for i in range(1, 6):
+            (src / f"{i}.json").write_text(json.dumps({"name": f"#{i}", "image": f"ipfs://OLD/{i}.png"}, indent=2))
+        (src / "6.json").write_text(json.dumps({"name": "#6", "image": "ar://NEW/6.png"}))
+        totals, failures = rewrite_directory(src, RULES, out_dir=out, verify_rate=1.0, workers=1)
+        assert not failures and (totals["files"], totals["rewritten"], totals["unchanged"]) == (6, 5, 1)
+        assert totals["verified"] == 5 and not totals["errors"]
+        for i in range(1, 7):
+            assert json.loads((out / f"{i}.json").read_text())["image"] == f"ar://NEW/{i}.png"
+        assert json.loads((src / "1.json").read_text())["image"] == "ipfs://OLD/1.png"
+
+
+if __name__ == "__main__":
+    test_only_top_level_fields_are_spliced()
+    test_escapes_follow_the_file()
+    test_duplicate_keys_and_unchanged_files()
+    test_fallback_for_unexpected_structure()
+    test_set_field_keeps_layout()
+    test_rewrite_directory_with_verification()
+    print("✅ uri_rewriter tests passed")
@@ -0,0 +1,175 @@
+"""
+Run-length sets of token IDs.
+
+check_missing_tokens.py, analyze_metadata.py, analyze_uploaded_vs_local.py and
+compare_nfts.py compare which tokens exist where (manifest, exports, local metadata,
+the collection's supply). Collections are almost always a few long runs, so
+TokenRanges stores sorted, disjoint, non-adjacent closed runs [(start, end), ...]:
+
+    have = TokenRanges.from_ids(int(p.stem) for p in Path("metadata_arweave").glob("*.json"))
+    missing = TokenRanges.span(1, 10000) - have
+    print(missing)                      # "17,4001-4250"
+    for start, end in missing.runs: ...
+
+Union (|), intersection (&) and difference (-) merge the two run lists in
+O(runs); len(), min/max, membership (bisect) and gaps() never expand the IDs.
+str() / TokenRanges.parse() give a compact "1-100,105,200-300" form for reports
+and files.
+"""
+
+from bisect import bisect_right
+
+
+class TokenRanges:
+    """Immutable set of ints stored as sorted closed runs."""
+
+    __slots__ = ("runs", "_count")
+
+    def __init__(self, runs=()):
+        """Runs may overlap, touch or be unsorted; they are normalized."""
+        self.runs = _normalize(sorted((int(s), int(e)) for s, e in runs if int(s) <= int(e)))
+        self._count = sum(e - s + 1 for s, e in self.runs)
+
+    @classmethod
+    def _from_normalized(cls, runs):
+        obj = cls.__new__(cls)
+        obj.runs = runs
+        obj._count = sum(e - s + 1 for s, e in runs)
+        return obj
+
+    @classmethod
+    def from_ids(cls, ids):
+        runs = []
+        for i in sorted(set(ids)):
+            if runs and runs[-1][1] == i - 1:
+                runs[-1] = (runs[-1][0], i)
+            else:
+                runs.append((i, i))
+        return cls._from_normalized(runs)
+
+    @classmethod
+    def span(cls, start, end):
+        """All IDs from start to end inclusive (empty if end < start)."""
+        return cls._from_normalized([(start, end)] if start <= end else [])
+
+    @classmethod
+    def parse(cls, text):
+        """Inverse of str(): '1-100,105' → runs [(1, 100), (105, 105)]."""
+        runs = []
+        for part in text.replace(" ", "").split(","):
+            if not part:
+                continue
+            start, sep, end = part.partition("-")
+            runs.append((int(start), int(end) if sep else int(start)))
+        return cls(runs)
+
+    def __len__(self):
+        return self._count
+
+    def __bool__(self):
+        return bool(self.runs)
+
+    def __iter__(self):
+        for start, end in self.runs:
+            yield from range(start, end + 1)
+
+    def __contains__(self, token_id):
+        i = bisect_right(self.runs, (token_id, float("inf"))) - 1
+        return i >= 0 and self.runs[i][0] <= token_id <= self.runs[i][1]
+
+    def __eq__(self, other):
+        return isinstance(other, TokenRanges) and self.runs == other.runs
+
+    def __hash__(self):
+        return hash(tuple(self.runs))
+
+    def __repr__(self):
+        return f"TokenRanges('{self}')"
+
+    def __str__(self):
+        return ",".join(str(s) if s == e else f"{s}-{e}" for s, e in self.runs)
+
+    @property
+    def min(self):
+        return self.runs[0][0] if self.runs else None
+
+    @property
+    def max(self):
+        return self.runs[-1][1] if self.runs else None
+
+    def __or__(self, other):
+        return TokenRanges._from_normalized(_normalize(_merge_sorted(self.runs, other.runs)))
+
+    def __and__(self, other):
+        out, i, j = [], 0, 0
+        a, b = self.runs, other.runs
+        while i < len(a) and j < len(b):
+            start, end = max(a[i][0], b[j][0]), min(a[i][1], b[j][1])
+            if start <= end:
+                out.append((start, end))
+            if a[i][1] < b[j][1]:
+                i += 1
+            else:
+                j += 1
+        return TokenRanges._from_normalized(out)
+
+    def __sub__(self, other):
+        out, j = [], 0
+        b = other.runs
+        for start, end in self.runs:
+            while j < len(b) and b[j][1] < start:
+                j += 1
+            k = j
+            while k < len(b) and b[k][0] <= end:
+                if b[k][0] > start:
+                    out.append((start, b[k][0] - 1))
+                start = max(start, b[k][1] + 1)
+                if start > end:
+                    break
+                k += 1
+            if start <= end:
+                out.append((start, end))
+        return TokenRanges._from_normalized(out)
+
+    def gaps(self, start=None, end=None):
+        """IDs between start and end (default: min..max) that are not in the set."""
+        if start is None:
+            start = self.min
+        if end is None:
+            end = self.max
+        if start is None or end is None:
+            return TokenRanges()
+        return TokenRanges.span(start, end) - self
+
+
+def _merge_sorted(a, b):
+    out, i, j = [], 0, 0
+    while i < len(a) and j < len(b):
+        if a[i] <= b[j]:
+            out.append(a[i])
+            i += 1
+        else:
+            out.append(b[j])
+            j += 1
+    out.extend(a[i:])
+    out.extend(b[j:])
+    return out
+
+
+def _normalize(runs):
+    """Coalesce sorted runs that overlap or touch."""
+    out = []
+    for start, end in runs:
+        if out and start <= out[-1][1] + 1:
+            if end > out[-1][1]:
+                out[-1] = (out[-1][0], end)
+        else:
+            out.append((start, end))
+    return out
+
+
+def format_run(start, end, unit="NFTs"):
+    """'#17' or '#4,001 to #4,250 (250 NFTs)' for report lines."""
+    if start == end:
+        return f"#{start}"
+    return f"#{start:,} to #{end:,} ({end - start + 1:,} {unit})"
@@ -1,9 +1,13 @@
 import argparse
+import sys
 from pathlib import Path
 import pandas as pd
-import re
 import math
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from asset_index import AssetIndex, catalog_assets, is_remote
+from combination_forecast import forecast_tables, load_usable_tables, print_summary, retry_warning
+
 DEFAULT_LAYER_ORDER = [
     "background",
     "tail",
@@ -19,6 +23,8 @@ DEFAULT_LAYER_ORDER = [
 parser = argparse.ArgumentParser()
 parser.add_argument('--csv', type=str, default='traits_catalog.mapped.csv')
 parser.add_argument('--layer-order', type=str, default=None)
+parser.add_argument('--supply', type=int, default=10000, help='Unique editions wanted (for the weighted forecast)')
+parser.add_argument('--max-retries', type=int, default=100000, help='generate.py --max-retries to check against')
 args = parser.parse_args()
 
 csv_path = Path(args.csv)
@@ -31,8 +37,6 @@ if 'layer' not in df.columns or 'file' not in df.columns:
     print('CSV missing required columns')
     raise SystemExit(1)
 
-csv_parent = csv_path.parent
-
 # determine layer order
 if args.layer_order:
     layer_order = [x.strip() for x in args.layer_order.split(',') if x.strip()]
@@ -40,17 +44,14 @@ else:
     layer_order = DEFAULT_LAYER_ORDER
 
 layers = {}
-for _, row in df.iterrows():
-    layer = str(row['layer']).strip()
-    raw_path = str(row['file']).strip()
-    # resolve similar to generator
-    if csv_parent and not re.match(r'^[a-zA-Z]+://', raw_path) and not Path(raw_path).is_absolute():
-        filepath = (csv_parent / raw_path).resolve()
-    else:
-        filepath = Path(raw_path)
-    exists = filepath.exists()
-    is_url = bool(re.match(r'^[a-zA-Z]+://', str(raw_path)))
-    layers.setdefault(layer, []).append({'raw': raw_path, 'resolved': str(filepath), 'exists': exists, 'is_url': is_url})
+# resolve like the generator; existence comes from the shared asset index
+rows = catalog_assets(csv_path)
+with AssetIndex() as index:
+    available = index.present([resolved for _, _, _, resolved in rows if resolved])
+for layer, trait, raw_path, resolved in rows:
+    is_url = is_remote(resolved)
+    exists = bool(resolved) and not is_url and available[resolved]
+    layers.setdefault(layer, []).append({'raw': raw_path, 'resolved': resolved, 'exists': exists, 'is_url': is_url})
 
 # report per-layer counts
 print('Per-layer counts (total / local_exists / remote_urls):')
@@ -111,4 +112,13 @@ if zero_layers:
     for o in layers.get(l, [])[:10]:
         print(f"- {o['raw']} -> resolved {o['resolved']}, exists={o['exists']}, is_url={o['is_url']}")
 
+# weighted forecast over the options generate.py would actually use (local files + URLs)
+if combos_remote:
+    print(f"\nWeighted forecast for {args.supply} unique editions:")
+    summary = forecast_tables(load_usable_tables(csv_path), layer_order, args.supply, args.max_retries)
+    print_summary(summary)
+    warning = retry_warning(summary)
+    if warning:
+        print(f"WARNING: {warning}")
+
 # exit with code 0
@@ -4,13 +4,15 @@ Update Folder-Based Manifest with Transaction IDs
 Handles the actual ArDrive folder structure
 """
 
-import json
-import csv
 from pathlib import Path
 
+from manifest_patch import changelog_path, export_targets, patch_manifest, print_changes
+from manifest_writer import format_size
+
 def update_folder_manifest(manifest_file="folder_based_manifest.json", 
                           metadata_export="metadata_export.csv",
-                          images_export="arweave_export_final.csv"):
+                          images_export="arweave_export_final.csv",
+                          style="pretty"):
     """Update manifest with transaction IDs from both exports"""
     
     print("🔄 Updating folder-based manifest with transaction IDs...")
@@ -20,80 +22,36 @@ def update_folder_manifest(manifest_file="folder_based_manifest.json",
         print(f"❌ Manifest file not found: {manifest_file}")
         return None
     
-    # Load manifest
-    with open(manifest_file, 'r') as f:
-        manifest = json.load(f)
-    
-    updated_metadata = 0
-    updated_images = 0
-    
-    # Update metadata transaction IDs
+    # Only the exports' rows are diffed against the manifest (manifest_patch.py):
+    # metadata export "1.json" -> metadata/1, "contract.json" -> metadata/contract,
+    # images export "1.png" -> images/1
+    sources = []
     if Path(metadata_export).exists():
         print(f"📄 Loading metadata transaction IDs from {metadata_export}")
-        metadata_txids = {}
-        
-        with open(metadata_export, 'r') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                filename = row['File Name']
-                txid = row['Data Transaction ID']
-                
-                if filename.endswith('.json'):
-                    if filename == 'contract.json':
-                        metadata_txids['metadata/contract'] = txid
-                    else:
-                        # Extract number from filename (e.g., "1.json" -> "1")
-                        file_number = filename[:-5]
-                        if file_number.isdigit():
-                            metadata_txids[f'metadata/{file_number}'] = txid
-        
-        # Update manifest with metadata TXIDs
-        for path in metadata_txids:
-            if path in manifest["paths"]:
-                manifest["paths"][path]["id"] = metadata_txids[path]
-                updated_metadata += 1
-                
-        print(f"✅ Updated {updated_metadata} metadata transaction IDs")
+        sources.append(t for t in export_targets(metadata_export, "folder") if t[0].startswith("metadata/"))
     else:
         print(f"⚠️  Metadata export not found: {metadata_export}")
-    
-    # Update image transaction IDs
     if Path(images_export).exists():
         print(f"🖼️  Loading image transaction IDs from {images_export}")
-        image_txids = {}
-        
-        with open(images_export, 'r') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                filename = row['File Name']
-                txid = row['Data Transaction ID']
-                
-                if filename.endswith('.png'):
-                    # Extract number from filename (e.g., "1.png" -> "1")
-                    file_number = filename[:-4]
-                    if file_number.isdigit():
-                        image_txids[f'images/{file_number}'] = txid
-        
-        # Update manifest with image TXIDs
-        for path in image_txids:
-            if path in manifest["paths"]:
-                manifest["paths"][path]["id"] = image_txids[path]
-                updated_images += 1
-                
-        print(f"✅ Updated {updated_images} image transaction IDs")
+        sources.append(t for t in export_targets(images_export, "folder") if t[0].startswith("images/"))
     else:
         print(f"⚠️  Images export not found: {images_export}")
     
-    # Save updated manifest
     output_file = "folder_based_manifest_final.json"
-    with open(output_file, 'w') as f:
-        json.dump(manifest, f, indent=2)
+    patch, unknown, writer = patch_manifest(manifest_file, (t for source in sources for t in source), output_file, style)
+    updated_metadata = sum(path.startswith("metadata/") for path in patch.retargeted)
+    updated_images = len(patch.retargeted) - updated_metadata
+    
+    print_changes(patch)
+    if unknown:
+        print(f"ℹ️  {len(unknown)} exported files have no path in the manifest")
     
     total_updated = updated_metadata + updated_images
     print(f"\n✅ Updated {total_updated} total transaction IDs")
     print(f"   • Metadata: {updated_metadata}")
     print(f"   • Images: {updated_images}")
-    print(f"💾 Final manifest saved: {output_file}")
+    print(f"💾 Final manifest saved: {output_file} ({format_size(writer.bytes)})")
+    print(f"📋 Changelog: {changelog_path(output_file)}")
     
     print("\n🚀 Next Steps:")
     print("1. Upload folder_based_manifest_final.json to your manifest/ folder in ArDrive")
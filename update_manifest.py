@@ -4,58 +4,30 @@ Update Arweave Manifest with Real Transaction IDs
 Run this after uploading files to Arweave to replace placeholder TXIDs.
 """
 
-import json
-import csv
 from pathlib import Path
 
-def update_manifest_with_txids(manifest_file, export_csv):
-    """Update manifest with real transaction IDs from ArDrive export"""
+from manifest_patch import changelog_path, export_targets, patch_manifest, print_changes
+from manifest_writer import format_size
+
+def update_manifest_with_txids(manifest_file, export_csv, style="pretty"):
+    """
+    Update manifest with real transaction IDs from ArDrive export.
+    Only the export's rows are diffed against the manifest (manifest_patch.py); the
+    result is streamed out with a changelog of what was retargeted.
+    """
     
     print("🔄 Updating manifest with real transaction IDs...")
     
-    # Load manifest
-    with open(manifest_file, 'r') as f:
-        manifest = json.load(f)
-    
-    # Load transaction IDs from export CSV
-    txid_map = {}
-    with open(export_csv, 'r') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            filename = row['File Name']
-            txid = row['Data Transaction ID']
-            txid_map[filename] = txid
-    
-    print(f"📊 Loaded {len(txid_map)} transaction IDs from export")
-    
-    # Update manifest paths
-    updated = 0
-    for path, data in manifest["paths"].items():
-        if path == "index.html":
-            # Update if you have an index.html file
-            continue
-        elif path == "contract.json":
-            if "contract.json" in txid_map:
-                data["id"] = txid_map["contract.json"]
-                updated += 1
-        elif path == "unrevealed.json":
-            if "unrevealed.json" in txid_map:
-                data["id"] = txid_map["unrevealed.json"]
-                updated += 1
-        else:
-            # NFT metadata files
-            metadata_filename = f"{path}.json"
-            if metadata_filename in txid_map:
-                data["id"] = txid_map[metadata_filename]
-                updated += 1
-    
-    # Save updated manifest
+    # N.json → N, contract.json / unrevealed.json keep their names; index.html is left alone
     output_file = "arweave_manifest_final.json"
-    with open(output_file, 'w') as f:
-        json.dump(manifest, f, indent=2)
-    
-    print(f"✅ Updated {updated} transaction IDs")
-    print(f"💾 Final manifest saved: {output_file}")
+    patch, unknown, writer = patch_manifest(manifest_file, export_targets(export_csv, "flat"), output_file, style)
+    
+    print_changes(patch)
+    if unknown:
+        print(f"ℹ️  {len(unknown)} exported files have no path in the manifest")
+    print(f"✅ Updated {len(patch.retargeted)} transaction IDs")
+    print(f"💾 Final manifest saved: {output_file} ({format_size(writer.bytes)})")
+    print(f"📋 Changelog: {changelog_path(output_file)}")
     print("🚀 Ready to upload to Arweave!")
     
     return output_file
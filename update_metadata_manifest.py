@@ -4,11 +4,12 @@ Update Metadata Manifest with Transaction IDs
 Run this after uploading metadata files to ArDrive
 """
 
-import json
-import csv
 from pathlib import Path
 
-def update_metadata_manifest(manifest_file="metadata_manifest.json", export_csv="metadata_export.csv"):
+from manifest_patch import changelog_path, export_targets, patch_manifest, print_changes
+from manifest_writer import format_size
+
+def update_metadata_manifest(manifest_file="metadata_manifest.json", export_csv="metadata_export.csv", style="pretty"):
     """Update manifest with real transaction IDs from metadata upload"""
     
     print("🔄 Updating metadata manifest with transaction IDs...")
@@ -23,45 +24,17 @@ def update_metadata_manifest(manifest_file="metadata_manifest.json", export_csv=
         print("Please download the CSV export from ArDrive after uploading metadata")
         return None
     
-    # Load manifest
-    with open(manifest_file, 'r') as f:
-        manifest = json.load(f)
-    
-    # Load transaction IDs from metadata export CSV
-    txid_map = {}
-    with open(export_csv, 'r') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            filename = row['File Name']
-            txid = row['Data Transaction ID']
-            
-            # Extract number from filename (e.g., "1.json" -> "1")
-            if filename.endswith('.json'):
-                file_number = filename[:-5]  # Remove .json extension
-                txid_map[file_number] = txid
-            elif filename in ['contract.json', 'unrevealed.json']:
-                key = filename.split('.')[0]  # contract.json -> contract
-                txid_map[key] = txid
-    
-    print(f"📊 Loaded {len(txid_map)} transaction IDs from metadata export")
-    
-    # Update manifest paths
-    updated = 0
-    for path, data in manifest["paths"].items():
-        if path in txid_map:
-            data["id"] = txid_map[path]
-            updated += 1
-            
-            if updated <= 5:  # Show first few updates
-                print(f"   ✅ Updated {path}: {txid_map[path][:20]}...")
-    
-    # Save updated manifest
+    # Diff only the export's rows against the manifest and stream the patched copy out
+    # (manifest_patch.py); "1.json" -> "1", "contract.json" -> "contract"
     output_file = "metadata_manifest_final.json"
-    with open(output_file, 'w') as f:
-        json.dump(manifest, f, indent=2)
-    
-    print(f"\n✅ Updated {updated} transaction IDs")
-    print(f"💾 Final manifest saved: {output_file}")
+    patch, unknown, writer = patch_manifest(manifest_file, export_targets(export_csv, "metadata"), output_file, style)
+    
+    print_changes(patch)
+    if unknown:
+        print(f"ℹ️  {len(unknown)} exported files have no path in the manifest")
+    print(f"\n✅ Updated {len(patch.retargeted)} transaction IDs")
+    print(f"💾 Final manifest saved: {output_file} ({format_size(writer.bytes)})")
+    print(f"📋 Changelog: {changelog_path(output_file)}")
     print("\n🚀 Next: Upload this manifest to Arweave!")
     print(f"📁 File to upload: {output_file}")
     print("🔗 Use the resulting TXID as your base URI: ar://MANIFEST_TXID/")
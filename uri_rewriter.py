@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+"""
+Byte-Level Metadata URI Rewriter for Skunk Squad Collection
+
+Switching base URIs (ipfs:// → ar:// → https gateway, see BASE_URI_SETUP_GUIDE.txt)
+used to mean json.load + json.dump of every metadata file. This splices only the
+top-level "image" / "external_url" string values in place:
+
+  * The top-level object is walked with the json module's C string/value scanners
+    (escaping fully respected) to find the span of each wanted string value.
+    "image" inside attributes or inside another string is never touched, and the
+    rest of the file (formatting, key order, other values) is left byte-for-byte.
+    Serializing is what makes json.dump slow (indent=2 runs in pure Python); the
+    splice skips it entirely.
+  * Files whose structure the scanner doesn't expect (not a single object) fall
+    back to a full parse and re-serialize (pretty or compact, as detected).
+  * Before decoding, each file is searched for the old prefixes (C-speed find); files
+    that can't match are skipped. Only files of MMAP_THRESHOLD (1 MB) or more are
+    memory-mapped, so big files that can't match are never read into memory. Metadata
+    files are ~1 KB, where mapping costs more than it saves (an mmap/munmap pair and a
+    page fault per file instead of one read: about 2x slower on 20k pretty files), so
+    typical collections are read with a plain read() rather than mapped file by file.
+  * A sample of rewritten files (--verify-rate) is checked by fully parsing the
+    old and new bytes and comparing with the expected result.
+
+Files are processed in chunks on a process pool and replaced atomically.
+
+Usage:
+  python uri_rewriter.py metadata_arweave --replace ipfs://METADATA_CID/images/ ar://IMAGES_TXID/
+  python uri_rewriter.py metadata_arweave --replace ar:// https://arweave.net/ --out metadata_gateway
+  python uri_rewriter.py output/metadata --replace ipfs:// https://ipfs.io/ipfs/ --field image --dry-run
+"""
+
+import argparse
+import json
+import mmap
+import os
+import re
+import time
+import zlib
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from metadata_writer import dumps_metadata, write_bytes
+
+DEFAULT_FIELDS = ("image", "external_url")
+MMAP_THRESHOLD = 1 << 20  # smaller files are read(); see the module docstring
+CHUNK_SIZE = 2048
+DEFAULT_VERIFY_RATE = 0.01
+
+_WS_RE = re.compile(r"[ \t\n\r]*")
+_scan_value = json.JSONDecoder().scan_once  # C scanner: (value, end index) for the value at idx
+_scan_string = json.decoder.scanstring      # C: (decoded string, index after closing quote)
+
+
+class UnexpectedStructure(ValueError):
+    """The scanner can't vouch for a splice; the caller falls back to a full parse."""
+
+
+def string_spans(text, fields):
+    """
+    {field: (start, end, value)} for top-level keys in fields whose value is a string;
+    start/end delimit the raw value between its quotes. Keys and values are skipped with
+    the json module's C scanner, so nested "image" keys and strings that merely contain
+    '"image"' are never matched. Raises UnexpectedStructure for anything but one object.
+    """
+    spans = {}
+    ws = _WS_RE.match
+    i = ws(text, 0).end()
+    if not text.startswith("{", i):
+        raise UnexpectedStructure("not an object")
+    i = ws(text, i + 1).end()
+    if text.startswith("}", i):
+        i += 1
+    else:
+        while True:
+            if not text.startswith('"', i):
+                raise UnexpectedStructure("expected key")
+            key, i = _scan_string(text, i + 1)
+            i = ws(text, i).end()
+            if not text.startswith(":", i):
+                raise UnexpectedStructure("expected ':'")
+            start = ws(text, i + 1).end()
+            try:
+                value, i = _scan_value(text, start)
+            except StopIteration:
+                raise UnexpectedStructure("missing value") from None
+            if key in fields:
+                if isinstance(value, str):
+                    spans[key] = (start + 1, i - 1, value)
+                else:
+                    spans.pop(key, None)  # a later duplicate key wins, as in json.loads
+            i = ws(text, i).end()
+            if text.startswith(",", i):
+                i = ws(text, i + 1).end()
+                continue
+            if text.startswith("}", i):
+                i += 1
+                break
+            raise UnexpectedStructure("expected ',' or '}'")
+    if ws(text, i).end() != len(text):
+        raise UnexpectedStructure("trailing data")
+    return spans
+
+
+def rewrite_value(value, rules):
+    """value with the first matching (old prefix, new prefix) rule applied, else None."""
+    for old, new in rules:
+        if value.startswith(old):
+            return new + value[len(old):]
+    return None
+
+
+def rewrite_parsed(meta, fields, rules):
+    """Expected result of a rewrite on a parsed document (used for fallback and verification)."""
+    changed = False
+    if isinstance(meta, dict):
+        for field in fields:
+            value = meta.get(field)
+            if isinstance(value, str):
+                new = rewrite_value(value, rules)
+                if new is not None and new != value:
+                    meta[field] = new
+                    changed = True
+    return changed
+
+
+def _redump(meta, text, raw):
+    """Fallback serialization in the file's detected layout (pretty or compact)."""
+    style = "pretty" if "\n " in text[:4096] else "compact"
+    return dumps_metadata(meta, style, ensure_ascii=raw.isascii())
+
+
+def _splice(text, raw, edits):
+    """text with each (start, end, new value) span replaced, encoded back to bytes."""
+    parts, pos = [], 0
+    for start, end, value in sorted(edits):
+        parts.append(text[pos:start])
+        # Same escaping convention as the rest of the file (\uXXXX if it is pure ASCII)
+        parts.append(json.dumps(value, ensure_ascii=raw.isascii())[1:-1])
+        pos = end
+    parts.append(text[pos:])
+    return "".join(parts).encode("utf-8")
+
+
+def rewrite_bytes(buf, fields, rules):
+    """(new bytes or None if unchanged, used_fallback)."""
+    raw = bytes(buf)
+    text = raw.decode("utf-8")
+    try:
+        spans = string_spans(text, fields)
+    except (UnexpectedStructure, ValueError):
+        meta = json.loads(text)
+        if not rewrite_parsed(meta, fields, rules):
+            return None, True
+        return _redump(meta, text, raw), True
+
+    edits = []
+    for start, end, value in spans.values():
+        new = rewrite_value(value, rules)
+        if new is not None and new != value:
+            edits.append((start, end, new))
+    if not edits:
+        return None, False
+    return _splice(text, raw, edits), False
+
+
+def set_field(buf, field, value):
+    """
+    buf with the top-level string field set to value (None if it already is), spliced
+    like rewrite_bytes so the file keeps its layout. ipfs_car.py and ans104_bundle.py use
+    this to point "image" at the final image URI.
+    """
+    raw = bytes(buf)
+    text = raw.decode("utf-8")
+    try:
+        span = string_spans(text, (field,)).get(field)
+    except (UnexpectedStructure, ValueError):
+        span = None
+    if span is not None:
+        start, end, current = span
+        return None if current == value else _splice(text, raw, [(start, end, value)])
+    meta = json.loads(text)  # not a string value (or not a plain object): full parse
+    if not isinstance(meta, dict) or meta.get(field) == value:
+        return None
+    meta[field] = value
+    return _redump(meta, text, raw)
+
+
+def may_match(buf, rules):
+    """
+    False only if no rule's old prefix can occur in buf. Works on mmaps without copying;
+    files containing any backslash escape are always scanned.
+    """
+    if buf.find(b"\\") != -1:
+        return True
+    return any(buf.find(old.encode("utf-8")) != -1 for old, _ in rules)
+
+
+def _sampled(name, rate):
+    return rate > 0 and (zlib.crc32(name.encode("utf-8")) % 100000) < rate * 100000
+
+
+def rewrite_file(path, fields, rules, out_dir=None, verify_rate=0.0, dry_run=False):
+    """Rewrite one file; returns a Counter of outcomes."""
+    outcome = Counter()
+    path = Path(path)
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size >= MMAP_THRESHOLD:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+                old = buf[:] if may_match(buf, rules) else None
+        else:
+            old = f.read()
+            old = old if may_match(old, rules) else None
+    new, fallback = rewrite_bytes(old, fields, rules) if old is not None else (None, False)
+    outcome["fallback" if fallback else "spliced"] += new is not None
+    outcome["rewritten" if new is not None else "unchanged"] += 1
+
+    if new is not None and _sampled(path.name, verify_rate):
+        expected = json.loads(old)
+        rewrite_parsed(expected, fields, rules)
+        outcome["verified"] += 1
+        if json.loads(new) != expected:
+            outcome["verify_failed"] += 1
+            return outcome  # never write a file that failed verification
+    if dry_run:
+        return outcome
+    if out_dir is not None:
+        data = new if new is not None else (old if old is not None else path.read_bytes())
+        write_bytes(Path(out_dir) / path.name, data, atomic=True)
+    elif new is not None:
+        write_bytes(path, new, atomic=True)
+    return outcome
+
+
+def _rewrite_chunk(job):
+    paths, fields, rules, out_dir, verify_rate, dry_run = job
+    totals = Counter()
+    failures = []
+    for path in paths:
+        try:
+            result = rewrite_file(path, fields, rules, out_dir, verify_rate, dry_run)
+        except (OSError, ValueError) as e:
+            totals["errors"] += 1
+            failures.append(f"{path}: {e}")
+            continue
+        totals.update(result)
+        if result["verify_failed"]:
+            failures.append(f"{path}: verification failed")
+    return totals, failures
+
+
+def rewrite_directory(directory, rules, fields=DEFAULT_FIELDS, out_dir=None, verify_rate=DEFAULT_VERIFY_RATE,
+                      workers=None, dry_run=False):
+    """Rewrite every *.json in directory. Returns (Counter of outcomes, failure messages)."""
+    with os.scandir(directory) as it:
+        paths = sorted(e.path for e in it if e.name.endswith(".json") and e.is_file())
+    if out_dir is not None and not dry_run:
+        Path(out_dir).mkdir(parents=True, exist_ok=True)
+    jobs = [(paths[i:i + CHUNK_SIZE], tuple(fields), tuple(rules), out_dir, verify_rate, dry_run)
+            for i in range(0, len(paths), CHUNK_SIZE)]
+    totals, failures = Counter(), []
+    if len(jobs) > 1 and workers != 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_rewrite_chunk, jobs))
+    else:
+        results = [_rewrite_chunk(job) for job in jobs]
+    for chunk_totals, chunk_failures in results:
+        totals.update(chunk_totals)
+        failures.extend(chunk_failures)
+    totals["files"] = len(paths)
+    return totals, failures
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Swap metadata base URIs by splicing bytes instead of re-serializing JSON")
+    ap.add_argument("directory", type=Path, help="Folder of metadata *.json files")
+    ap.add_argument("--replace", nargs=2, action="append", metavar=("OLD_PREFIX", "NEW_PREFIX"), required=True,
+                    help="Prefix rule (repeatable; first match wins)")
+    ap.add_argument("--field", action="append", default=None, help=f"Top-level field to rewrite (default: {', '.join(DEFAULT_FIELDS)})")
+    ap.add_argument("--out", type=Path, default=None, help="Write to this folder instead of in place")
+    ap.add_argument("--verify-rate", type=float, default=DEFAULT_VERIFY_RATE, help="Fraction of rewritten files to verify with a full parse")
+    ap.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count; 1 = in-process)")
+    ap.add_argument("--dry-run", action="store_true", help="Count what would change without writing")
+    args = ap.parse_args()
+
+    if not args.directory.is_dir():
+        print(f"❌ Folder not found: {args.directory}")
+        return 1
+    started = time.perf_counter()
+    totals, failures = rewrite_directory(args.directory, [tuple(r) for r in args.replace], args.field or DEFAULT_FIELDS,
+                                         str(args.out) if args.out else None, args.verify_rate, args.workers, args.dry_run)
+    elapsed = time.perf_counter() - started
+
+    verb = "would be rewritten" if args.dry_run else "rewritten"
+    print(f"🔁 {totals['files']:,} files in {elapsed:.2f}s: {totals['rewritten']:,} {verb}, {totals['unchanged']:,} unchanged")
+    print(f"   {totals['spliced']:,} spliced in place, {totals['fallback']:,} via full parse, "
+          f"{totals['verified']:,} verified, {totals['errors']:,} errors")
+    for message in failures[:20]:
+        print(f"   ❌ {message}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())